@@ -0,0 +1,87 @@
+# benchmark_mcts.py
+import argparse
+import os
+import random
+import time
+
+import rng
+from game_logic import Game
+from game_state import GameState
+from solvers.mcts_solver import MCTS, MCTSNode
+
+# Rollouts every worker performs per decision.
+ROLLOUTS_PER_WORKER = 64
+# Rollouts of the serial search whose decisions the others are compared to.
+REFERENCE_ROLLOUTS = 2048
+MAX_DEPTH = 7
+POSITIONS = 12
+SEED = 2048
+
+
+# Mid-game positions reached by random play.
+def sample_positions(count, generator):
+    positions = []
+    while len(positions) < count:
+        game = Game()
+        for _ in range(generator.randint(20, 120)):
+            if game.game_over:
+                break
+            game.play(generator.choice(game.get_legal_moves()))
+        if not game.game_over:
+            positions.append(GameState.from_game(game))
+    return positions
+
+
+# Runs one decision on a fresh tree and returns the chosen move, the mean reward of every
+# root move and the time taken.
+def decide(mcts, state, n_rollouts, workers):
+    mcts.Q.clear()
+    mcts.N.clear()
+    mcts.children.clear()
+    mcts.unexplored.clear()
+    mcts.nodes.clear()
+    root = MCTSNode(state)
+    start = time.perf_counter()
+    mcts.do_rollouts(root, n_rollouts, MAX_DEPTH, workers=workers)
+    elapsed = time.perf_counter() - start
+    values = {child.move: mcts.Q[mcts._key(child)] / mcts.N[mcts._key(child)]
+              for child in mcts.children[root] if mcts.N[mcts._key(child)]}
+    return mcts.choose(root).move, values, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Speedup and decision quality of root-parallel MCTS")
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1,
+                        help="Largest worker count to measure, by default the number of cores")
+    args = parser.parse_args(argv)
+
+    rng.seed(SEED)
+    positions = sample_positions(POSITIONS, random.Random(SEED))
+    reference_mcts = MCTS(exploration_weight=1.4)
+    references = [decide(reference_mcts, state, REFERENCE_ROLLOUTS, 1)[1] for state in positions]
+
+    print(f"{POSITIONS} positions, {ROLLOUTS_PER_WORKER} rollouts per worker, "
+          f"reference: {REFERENCE_ROLLOUTS} serial rollouts")
+    print(f"{'workers':>7} {'rollouts/s':>11} {'speedup':>8} {'agreement':>10} {'regret':>7}")
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        rollouts, elapsed, agreements, regret = 0, 0.0, 0, 0.0
+        with MCTS(exploration_weight=1.4, seed=SEED) as mcts:
+            # Start the worker processes before timing
+            decide(mcts, positions[0], 1, workers)
+            for state, reference in zip(positions, references):
+                move, _, seconds = decide(mcts, state, ROLLOUTS_PER_WORKER, workers)
+                rollouts += ROLLOUTS_PER_WORKER * workers
+                elapsed += seconds
+                best = max(reference, key=reference.get)
+                agreements += move == best
+                # How much worse the chosen move is, measured by the reference search
+                regret += reference[best] - reference.get(move, min(reference.values()))
+        rate = rollouts / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>7} {rate:>11.0f} {rate / baseline:>8.2f} {agreements / POSITIONS:>10.2f} "
+              f"{regret / POSITIONS:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
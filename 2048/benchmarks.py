@@ -0,0 +1,136 @@
+# benchmarks.py
+# Throughput benchmarks of the 2048 game logic and the MCTS solvers.
+#
+# Measures moves per second of Game.move, legal move generation, and nodes per
+# second and bytes per node of MCTS (closed and open loop) and ArrayMCTS, on several
+# grid sizes and tree sizes. Every result is one record with a metric, a unit and
+# whether higher is better; run_benchmarks.py at the repository root runs the suite
+# and compares the records with a stored baseline:
+#
+#   python run_benchmarks.py --suite 2048 --table
+import time
+import tracemalloc
+
+import rng
+from game_logic import Game
+from solvers.mcts_solver import MCTS, MCTSNode
+from solvers.array_mcts import ArrayMCTS
+from run_benchmarks import MIN_TIME, REPEAT, rate, record
+
+SEED = 2048
+# Grid sizes for the game logic and MCTS benchmarks; ArrayMCTS only supports 4x4
+GRID_SIZES = (3, 4, 5, 6)
+# Random moves played from the start to reach each benchmark position
+STAGES = {'early': 10, 'mid': 60}
+MAX_DEPTH = 7
+
+
+# Runs make_tree() and search(tree) REPEAT times from the same seed and returns the last
+# tree and the shortest search time.
+def fastest_search(make_tree, search):
+    best = float('inf')
+    for _ in range(REPEAT):
+        rng.seed(SEED)
+        tree = make_tree()
+        start = time.perf_counter()
+        search(tree)
+        best = min(best, time.perf_counter() - start)
+    return tree, best
+
+
+# A Game after up to `moves` random moves from a seeded start.
+def position(moves, size=4):
+    rng.seed(SEED)
+    game = Game(size)
+    for _ in range(moves):
+        if game.game_over:
+            break
+        game.make_random_move()
+    return game
+
+
+# Moves per second of random play, restarting whenever a game ends.
+def bench_moves(quick):
+    min_time = MIN_TIME[quick]
+    results = []
+    for size in GRID_SIZES:
+        rng.seed(SEED)
+        state = {'game': Game(size)}
+
+        def step():
+            game = state['game']
+            game.move(rng.randrange(4))
+            if not (game.grid == 0).any() and not game.legal_mask().any():
+                state['game'] = Game(size)
+
+        results.append(record('Game.move', {'size': size}, 'moves_per_sec', rate(step, min_time), 'moves/s'))
+    return results
+
+
+def bench_legal_moves(quick):
+    min_time = MIN_TIME[quick]
+    results = []
+    for stage, moves in STAGES.items():
+        for size in GRID_SIZES:
+            game = position(moves, size)
+            results.append(record('Game.get_legal_moves', {'size': size, 'stage': stage}, 'calls_per_sec',
+                                  rate(game.get_legal_moves, min_time), 'calls/s'))
+    return results
+
+
+# Nodes in the tree and traced memory they take after a search on a fresh tree.
+def mcts_memory(make_tree, search, count_nodes):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tree = make_tree()
+        search(tree)
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return count_nodes(tree), used
+
+
+# Nodes per second and bytes per node of the MCTS variants, for each tree size.
+# Speed and memory come from separate runs, since tracing allocations slows the search
+# down several times.
+def bench_mcts(quick):
+    rollout_counts = (128, 512) if quick else (256, 1024, 2048)
+    results = []
+    game = position(STAGES['early'])
+    variants = [
+        ('MCTS', lambda: MCTS(exploration_weight=1.4), lambda tree: len(tree.N)),
+        ('MCTS.open_loop', lambda: MCTS(exploration_weight=1.4, open_loop=True), lambda tree: len(tree.N)),
+    ]
+    for name, make_tree, count_nodes in variants:
+        for n_rollouts in rollout_counts:
+            def search(tree):
+                tree.do_rollouts(MCTSNode(game), n_rollouts, MAX_DEPTH)
+
+            tree, elapsed = fastest_search(make_tree, search)
+            params = {'rollouts': n_rollouts, 'max_depth': MAX_DEPTH}
+            results.append(record(name, params, 'nodes_per_sec', count_nodes(tree) / elapsed, 'nodes/s'))
+            results.append(record(name, params, 'rollouts_per_sec', n_rollouts / elapsed, 'rollouts/s'))
+            rng.seed(SEED)
+            nodes, used = mcts_memory(make_tree, search, count_nodes)
+            results.append(record(name, params, 'bytes_per_node', used / nodes, 'B', higher_is_better=False))
+
+    for n_rollouts in rollout_counts:
+        tree, elapsed = fastest_search(lambda: ArrayMCTS(exploration_weight=1.4, seed=SEED),
+                                       lambda tree: tree.do_rollouts(tree.add_root(game), n_rollouts, MAX_DEPTH))
+        params = {'rollouts': n_rollouts, 'max_depth': MAX_DEPTH}
+        results.append(record('ArrayMCTS', params, 'nodes_per_sec', len(tree) / elapsed, 'nodes/s'))
+        results.append(record('ArrayMCTS', params, 'rollouts_per_sec', n_rollouts / elapsed, 'rollouts/s'))
+        # The arena is allocated ahead, so this counts the capacity the nodes really occupy
+        results.append(record('ArrayMCTS', params, 'bytes_per_node', tree.nbytes / len(tree), 'B',
+                              higher_is_better=False))
+
+    # Grid size changes the cost of every expansion and playout
+    for size in GRID_SIZES:
+        root = MCTSNode(position(STAGES['early'], size))
+        tree, elapsed = fastest_search(lambda: MCTS(exploration_weight=1.4),
+                                       lambda tree: tree.do_rollouts(root, rollout_counts[0], MAX_DEPTH))
+        params = {'rollouts': rollout_counts[0], 'max_depth': MAX_DEPTH, 'size': size}
+        results.append(record('MCTS', params, 'nodes_per_sec', len(tree.N) / elapsed, 'nodes/s'))
+    return results
+
@@ -6,6 +6,7 @@ import pickle
 
 # import custom modules
 from game_logic import Game
+from game_state import GameState
 from game_ui import GameUI
 
 class TwoThousandFortyEightEnv(gym.Env):
@@ -40,13 +41,14 @@ class TwoThousandFortyEightEnv(gym.Env):
         # Get direction from action
         direction = self.action_set[action]
 
-        if direction not in self.game.get_legal_moves():
+        if not self.game.legal_mask()[direction]:
             # Illegal move, penalize
             reward = -100
         else:
             # Legal move, update game state and reward
-            self.game.grid, self.game.score, game_over = self.game.play(self.action_set[action])
+            self.game.play(direction)
             reward = self.game.score
+        game_over = self.game.game_over
 
         # Check if game is truncated
         self.truncated = self.move_count >= self.truncate_at
@@ -61,14 +63,18 @@ class TwoThousandFortyEightEnv(gym.Env):
 
         return self.game.grid, reward, self.terminated, self.truncated, self.info
 
-    def reset(self):
+    def reset(self, state=None):
+        # Start a new game, or continue from a GameState if one is given
         self.move_count = 0
-        self.game = Game(size=self.size, win_tile=self.win_tile)
+        self.game = Game(size=self.size, win_tile=self.win_tile) if state is None else state.to_game()
         self.terminated = False
         self.truncated = False
         self._reset_info()
         return self.game.grid, 0, self.terminated, self.truncated, self.info
 
+    def get_state(self):
+        return GameState.from_game(self.game)
+
     def render(self, mode='human'):
         if self.human_renderer and mode == 'human':
             if self.game_app is None:
@@ -1,16 +1,36 @@
 # game_logic.py
 import numpy as np
-import random
+from collections import namedtuple
+
+import rng
+from zobrist import hash_grid, update_hash
+
+# Journal entry written by Game.make_move: the cells changed by the slide with their
+# previous values, the spawned cell, the merge score, the previous game flags and
+# the previous Zobrist key.
+UndoRecord = namedtuple('UndoRecord', 'cells values spawn score_delta game_over is_win key')
 
 class Game:
-    def __init__(self, size=4, win_tile=2048):
+    def __init__(self, size=4, win_tile=2048, grid=None):
         self.win_tile = win_tile
         self.size = size
-        self.grid = np.zeros((size, size), dtype=int)
+        # Start from two random tiles unless an existing grid is given
+        self.grid = self.new_game(size) if grid is None else grid
         self.score = 0
         self.game_over = False
         self.is_win = False
         self.direction_map = {0: 'up', 1: 'down', 2: 'left', 3: 'right'}
+        self.history = []
+
+    @property
+    def grid(self):
+        return self._grid
+
+    @grid.setter
+    def grid(self, grid):
+        # Assigning a whole grid rehashes it; moves update the key incrementally
+        self._grid = grid
+        self.zobrist_key = hash_grid(grid)
 
     def new_game(self, size):
         grid = np.zeros((size, size), dtype=int)
@@ -18,11 +38,11 @@ class Game:
 
     def place_random(self, grid, count):
         # random value = 2 with probability 0.9, 4 with probability 0.1
-        random_value = 2 if random.random() < 0.9 else 4
-        empty_cells = np.argwhere(grid == 0)
-        indices = np.random.choice(len(empty_cells), size=min(count, len(empty_cells)), replace=False)
-        for index in indices:
-            y, x = empty_cells[index]
+        random_value = 2 if rng.random() < 0.9 else 4
+        empty_cells = np.argwhere(grid == 0).tolist()
+        # Distinct cells: every pick removes its cell from the candidates
+        for _ in range(min(count, len(empty_cells))):
+            y, x = empty_cells.pop(rng.randrange(len(empty_cells)))
             grid[y, x] = random_value
         return grid
 
@@ -39,71 +59,118 @@ class Game:
 
     def merge(self, grid):
         changed = False
+        score = 0
         for row in range(self.size):
             for col in range(self.size - 1):
                 if grid[row, col] == grid[row, col + 1] and grid[row, col] != 0:
                     grid[row, col] *= 2
                     grid[row, col + 1] = 0
-                    self.score += grid[row, col]
+                    score += grid[row, col]
                     changed = True
-        return grid, changed
+        return grid, changed, score
 
-    def move(self, direction_num):
-        string_direction = self.direction_map.get(direction_num, None)
-
-        if string_direction is None:
+    def preview(self, direction_num):
+        # Compute the grid after a move without touching the game or spawning a tile.
+        # Returns the afterstate, whether the move changes the grid and the merge score.
+        if direction_num not in self.direction_map:
             raise ValueError("Invalid numeric direction. Must be 0, 1, 2, or 3.")
 
-        original_grid = self.grid.copy()
         if direction_num == 0:  # Up
-            self.grid = np.rot90(self.grid)
-            compressed_grid, compressed = self.compress(self.grid)
-            merged_grid, merged = self.merge(compressed_grid)
-            self.grid = self.compress(merged_grid)[0]
-            self.grid = np.rot90(self.grid, -1)
+            grid = np.rot90(self.grid)
         elif direction_num == 1:  # Down
-            self.grid = np.rot90(self.grid, -1)
-            compressed_grid, compressed = self.compress(self.grid)
-            merged_grid, merged = self.merge(compressed_grid)
-            self.grid = self.compress(merged_grid)[0]
-            self.grid = np.rot90(self.grid)
+            grid = np.rot90(self.grid, -1)
         elif direction_num == 2:  # Left
-            compressed_grid, compressed = self.compress(self.grid)
-            merged_grid, merged = self.merge(compressed_grid)
-            self.grid = self.compress(merged_grid)[0]
-        elif direction_num == 3:  # Right
-            self.grid = np.fliplr(self.grid)
-            compressed_grid, compressed = self.compress(self.grid)
-            merged_grid, merged = self.merge(compressed_grid)
-            self.grid = self.compress(merged_grid)[0]
-            self.grid = np.fliplr(self.grid)
-
-        change_made = compressed or merged
-        if compressed or merged:
-            self.grid = self.place_random(self.grid, 1)
+            grid = self.grid
+        else:  # Right
+            grid = np.fliplr(self.grid)
+
+        compressed_grid, _ = self.compress(grid)
+        merged_grid, _, score_delta = self.merge(compressed_grid)
+        grid = self.compress(merged_grid)[0]
+
+        if direction_num == 0:
+            grid = np.rot90(grid, -1)
+        elif direction_num == 1:
+            grid = np.rot90(grid)
+        elif direction_num == 3:
+            grid = np.fliplr(grid)
+
+        return grid, not np.array_equal(grid, self.grid), score_delta
+
+    def legal_mask(self):
+        # Check all four directions in one pass: a direction is legal if a tile can
+        # slide into an empty cell or merge with an equal neighbour along it.
+        filled = self.grid != 0
+        pairs_horizontal = (self.grid[:, :-1] == self.grid[:, 1:]) & filled[:, :-1]
+        pairs_vertical = (self.grid[:-1] == self.grid[1:]) & filled[:-1]
+        return np.array([
+            np.any(pairs_vertical | (~filled[:-1] & filled[1:])),  # Up
+            np.any(pairs_vertical | (filled[:-1] & ~filled[1:])),  # Down
+            np.any(pairs_horizontal | (~filled[:, :-1] & filled[:, 1:])),  # Left
+            np.any(pairs_horizontal | (filled[:, :-1] & ~filled[:, 1:])),  # Right
+        ])
+
+    def move(self, direction_num):
+        afterstate, change_made, score_delta = self.preview(direction_num)
+        if change_made:
+            grid = self.place_random(afterstate, 1)
+            cells = np.flatnonzero(grid != self._grid)
+            self.zobrist_key = update_hash(self.zobrist_key, cells, self._grid.flat[cells], grid.flat[cells])
+            self._grid = grid
+            self.score += score_delta
 
         return change_made  # Return whether a change has been made to the grid
 
+    def make_move(self, direction_num):
+        # Play a move like play(), but update the grid in place and journal the changed
+        # cells, the spawned tile and the score delta so that undo_move can revert it.
+        # Search code can then explore on one game instead of cloning it at every step.
+        afterstate, change_made, score_delta = self.preview(direction_num)
+        if not change_made:
+            return False
+        cells = np.flatnonzero(afterstate != self.grid)
+        values = self.grid.flat[cells]
+        self.grid[...] = afterstate
+        key = update_hash(self.zobrist_key, cells, values, self.grid.flat[cells])
+
+        spawn = None
+        empty_cells = np.flatnonzero(self.grid == 0)
+        if len(empty_cells):
+            spawn = empty_cells[rng.randrange(len(empty_cells))]
+            self.grid.flat[spawn] = 2 if rng.random() < 0.9 else 4
+            key = update_hash(key, [spawn], [0], [self.grid.flat[spawn]])
+
+        self.history.append(UndoRecord(cells, values, spawn, score_delta, self.game_over, self.is_win,
+                                       self.zobrist_key))
+        self.zobrist_key = key
+        self.score += score_delta
+        self.is_win = self.check_win()
+        self.check_no_moves()
+        return True
+
+    def undo_move(self):
+        # Revert the last move applied with make_move.
+        record = self.history.pop()
+        if record.spawn is not None:
+            self.grid.flat[record.spawn] = 0
+        self.grid.flat[record.cells] = record.values
+        self.score -= record.score_delta
+        self.game_over = record.game_over
+        self.is_win = record.is_win
+        self.zobrist_key = record.key
+
     def check_win(self):
         # Win condition should not set the game as over; it should only check for win
         return np.any(self.grid == self.win_tile)
 
     def check_no_moves(self):
-        can_move = False  # Assume no moves are possible unless proven otherwise
-        for direction_num in range(4):
-            temp_grid = np.copy(self.grid)
-            if self.move(direction_num):  # Attempt to make a move
-                can_move = True
-            self.grid = temp_grid  # Reset grid to original after checking
-            if can_move:  # If a move is possible, break early
-                break
-        self.game_over = not can_move
+        self.game_over = not self.legal_mask().any()
 
     def play(self, direction_num):
         if not self.game_over:
             change_made = self.move(direction_num)
             if not change_made:
-                return self.grid, self.score, self.game_over
+                return self.grid, self.score, self.game_over, self.is_win
             self.is_win = self.check_win()
             self.check_no_moves()
         return self.grid, self.score, self.game_over, self.is_win
@@ -112,30 +179,25 @@ class Game:
         return np.max(self.grid)
 
     def get_legal_moves(self):
-        legal_moves = []
-        for direction_num in self.direction_map:
-            grid_copy = self.grid.copy()
-            self.move(direction_num)
-            if not np.array_equal(grid_copy, self.grid):
-                legal_moves.append(direction_num)
-            self.grid = grid_copy  # Reset grid to original
-        return legal_moves
+        mask = self.legal_mask()
+        return [direction_num for direction_num in self.direction_map if mask[direction_num]]
 
     def make_random_move(self):
         legal_moves = self.get_legal_moves()
         if legal_moves:
-            move_num = random.choice(legal_moves)
+            move_num = rng.choice(legal_moves)
             self.play(move_num)
             return move_num
         return None
 
 # Example of usage:
-game = Game()
-print(game.grid)
-_, _, game_over, _ = game.play(1)  # Make a move (down)
-print(game.grid)
-_, _, game_over, _ = game.play(1)  # Make a move (down)
-print(game.grid)
-_, _, game_over, _ = game.play(1)  # Make a move (down)
-print(game.grid)
-print(game_over)
\ No newline at end of file
+if __name__ == "__main__":
+    game = Game()
+    print(game.grid)
+    _, _, game_over, _ = game.play(1)  # Make a move (down)
+    print(game.grid)
+    _, _, game_over, _ = game.play(1)  # Make a move (down)
+    print(game.grid)
+    _, _, game_over, _ = game.play(1)  # Make a move (down)
+    print(game.grid)
+    print(game_over)
\ No newline at end of file
@@ -0,0 +1,85 @@
+# game_state.py
+import numpy as np
+
+from game_logic import Game
+from zobrist import hash_exponents
+
+
+class GameState:
+    """Compact, immutable snapshot of a Game.
+
+    The grid is kept as a bytes buffer with one tile exponent per cell
+    (0 = empty, 1 = 2, 2 = 4, ...), 16 bytes for the standard board, next to the
+    score and the game flags. States hash to the Zobrist key of their grid and
+    copying one returns the same object, so search trees can hold millions of
+    them. The attribute names mirror Game (size, win_tile, grid, score,
+    game_over, is_win), so code that only reads a game, such as clone_game,
+    accepts a state as well.
+    """
+
+    __slots__ = ('cells', 'size', 'win_tile', 'score', 'game_over', 'is_win', 'key')
+
+    def __init__(self, cells, size=4, win_tile=2048, score=0, game_over=False, is_win=False, key=None):
+        object.__setattr__(self, 'cells', bytes(cells))
+        object.__setattr__(self, 'size', size)
+        object.__setattr__(self, 'win_tile', win_tile)
+        object.__setattr__(self, 'score', int(score))
+        object.__setattr__(self, 'game_over', bool(game_over))
+        object.__setattr__(self, 'is_win', bool(is_win))
+        object.__setattr__(self, 'key', hash_exponents(list(self.cells)) if key is None else key)
+
+    @classmethod
+    def from_game(cls, game):
+        if isinstance(game, GameState):
+            return game
+        grid = np.asarray(game.grid)
+        exponents = np.zeros(grid.shape, dtype=np.uint8)
+        filled = grid > 0
+        exponents[filled] = np.log2(grid[filled]).astype(np.uint8)
+        return cls(exponents.tobytes(), game.size, game.win_tile, game.score, game.game_over, game.is_win,
+                   game.zobrist_key)
+
+    def to_game(self):
+        game = Game(size=self.size, win_tile=self.win_tile, grid=self.grid)
+        game.score = self.score
+        game.game_over = self.game_over
+        game.is_win = self.is_win
+        return game
+
+    @property
+    def grid(self):
+        # A fresh array of tile values, like Game.grid
+        exponents = np.frombuffer(self.cells, dtype=np.uint8).astype(int)
+        return np.where(exponents > 0, 1 << exponents, 0).reshape(self.size, self.size)
+
+    def count_empty(self):
+        return self.cells.count(0)
+
+    def get_max_tile(self):
+        exponent = max(self.cells)
+        return 1 << exponent if exponent else 0
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GameState is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, GameState):
+            return NotImplemented
+        return (self.cells == other.cells and self.score == other.score
+                and self.game_over == other.game_over and self.is_win == other.is_win)
+
+    def __hash__(self):
+        return self.key
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (GameState, (self.cells, self.size, self.win_tile, self.score, self.game_over, self.is_win,
+                            self.key))
+
+    def __repr__(self):
+        return f"GameState(score={self.score}, game_over={self.game_over}, is_win={self.is_win})\n{self.grid}"
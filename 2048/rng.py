@@ -0,0 +1,54 @@
+# rng.py
+# Uniform random numbers for Game and the solvers, drawn in bulk from a numpy Generator.
+#
+# A spawn or a playout move costs a list lookup and an index increment; the Generator is
+# only called once per BUFFER_SIZE draws. Root-parallel workers call seed() with a child
+# of MCTS.seed_sequence, so a seeded search gives the same draws however the work is
+# scheduled.
+#
+# The buffer is replaced as a whole on refill and the index is checked before it is used,
+# so threads drawing at once never fail, although they may then see a draw twice.
+import numpy as np
+
+BUFFER_SIZE = 4096
+
+_generator = None
+_buffer = []
+_index = 0
+
+
+# Restarts the draws; value is an int, a np.random.SeedSequence or None for fresh OS entropy.
+def seed(value=None):
+    global _generator
+    _generator = np.random.default_rng(value)
+    _refill()
+
+
+def _refill():
+    global _buffer, _index
+    _buffer = _generator.random(BUFFER_SIZE).tolist()
+    _index = 0
+
+
+# A float in [0, 1).
+def random():
+    global _index
+    index = _index
+    if index >= BUFFER_SIZE:
+        _refill()
+        index = 0
+    _index = index + 1
+    return _buffer[index]
+
+
+# An int in [0, n).
+def randrange(n):
+    return int(random() * n)
+
+
+# A uniformly random element of a non-empty sequence.
+def choice(sequence):
+    return sequence[int(random() * len(sequence))]
+
+
+seed()
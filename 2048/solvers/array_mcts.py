@@ -0,0 +1,209 @@
+# array_mcts.py
+import math
+
+import numpy as np
+
+from game_state import GameState
+from solvers.batch_simulation import legal_mask, slide, spawn, pack_boards, unpack_boards, simulate_cells
+
+# Sentinel of first_child for nodes that have not been expanded yet.
+UNEXPANDED = -1
+# The lowest reward a rollout can return: a full grid, seen inverted.
+LOWEST_REWARD = 1 - 16
+# The per-node arrays of the arena and their types: parent index, move from the parent,
+# visit count, reward sum, first child index, number of children, packed board and
+# game over flag.
+FIELDS = {
+    'parent': np.int32, 'move': np.int8, 'N': np.int32, 'Q': np.float64,
+    'first_child': np.int32, 'child_count': np.int8, 'board': np.uint64, 'game_over': np.bool_,
+}
+
+
+class ArrayMCTS:
+    # MCTS over a struct-of-arrays node store for 4x4 games.
+    #
+    # Node i is described by entry i of a set of contiguous NumPy arrays (parent index,
+    # move, visit count, reward sum, first child, child count, packed board and game
+    # over flag) instead of an MCTSNode object and dictionary entries. The arrays form
+    # a growable arena: nodes are appended and the capacity doubles when it runs out.
+    # The children of a node are allocated together, so they occupy the index range
+    # first_child[i] .. first_child[i] + child_count[i] and UCT selection over them is
+    # a vectorized argmax over a slice.
+    #
+    # The search follows MCTS: a node's children are the positions reached by each
+    # legal move followed by a random spawn, rewards are the empty cells after a random
+    # rollout and they are inverted at every level on the way up. Rollouts are run in
+    # batches: every selected path gets virtual loss so the next descent of the batch
+    # goes elsewhere, and the leaves are expanded and simulated with one NumPy call each.
+    #
+    # Nodes are referred to by index; add_root returns the index of the root.
+
+    def __init__(self, exploration_weight=1, capacity=1024, batch_size=16, virtual_loss=3, seed=None):
+        self.exploration_weight = exploration_weight
+        self.batch_size = batch_size
+        self.virtual_loss = virtual_loss
+        self.rng = np.random.default_rng(seed)
+        self.size = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        # (Re)allocates the arena, keeping the first self.size nodes.
+        old = getattr(self, 'parent', None)
+        for name, dtype in FIELDS.items():
+            array = np.zeros(capacity, dtype=dtype)
+            if old is not None:
+                array[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def _new_nodes(self, count):
+        # Returns the index of the first of `count` new consecutive nodes.
+        if self.size + count > self.capacity:
+            self._allocate(max(2 * self.capacity, self.size + count))
+        start = self.size
+        self.size += count
+        self.first_child[start:self.size] = UNEXPANDED
+        self.child_count[start:self.size] = 0
+        self.N[start:self.size] = 0
+        self.Q[start:self.size] = 0
+        return start
+
+    def add_root(self, game):
+        # Adds a node for a Game or GameState without a parent and returns its index.
+        state = GameState.from_game(game)
+        if state.size != 4:
+            raise ValueError("ArrayMCTS only supports 4x4 grids")
+        cells = np.frombuffer(state.cells, dtype=np.uint8).reshape(1, 4, 4)
+        index = self._new_nodes(1)
+        self.parent[index] = -1
+        self.move[index] = -1
+        self.board[index] = pack_boards(cells)[0]
+        self.game_over[index] = not legal_mask(cells)[0].any()
+        return index
+
+    def children(self, node):
+        start = self.first_child[node]
+        if start == UNEXPANDED:
+            return range(0)
+        return range(start, start + self.child_count[node])
+
+    # Chooses the child with the best average reward, like MCTS.choose.
+    def choose(self, node):
+        if self.game_over[node]:
+            raise RuntimeError(f"choose called on terminal node {node}")
+        if self.first_child[node] == UNEXPANDED:
+            self._expand(np.array([node]))
+        children = self.children(node)
+        visits = self.N[children.start:children.stop]
+        averages = np.where(visits > 0, self.Q[children.start:children.stop] / np.maximum(visits, 1), -np.inf)
+        return children.start + int(np.argmax(averages))
+
+    def do_rollouts(self, node, n_rollouts, max_depth=7):
+        done = 0
+        while done < n_rollouts:
+            count = min(self.batch_size, n_rollouts - done)
+            paths = []
+            for _ in range(count):
+                path = self._select(node)
+                self._add_virtual_loss(path, 1)
+                paths.append(path)
+            leaves = np.array([path[-1] for path in paths])
+            # The same leaf may be selected twice in a batch; it is expanded once.
+            unexpanded = np.unique(leaves[(self.first_child[leaves] == UNEXPANDED) & ~self.game_over[leaves]])
+            if len(unexpanded):
+                self._expand(unexpanded)
+            rewards = simulate_cells(unpack_boards(self.board[leaves]), max_depth, self.rng)
+            for path, reward in zip(paths, rewards.tolist()):
+                self._add_virtual_loss(path, -1)
+                self._backpropagate(path, reward)
+            done += count
+
+    def _select(self, node):
+        # Descends by UCT until a node without children; unvisited children come first.
+        path = [node]
+        while self.first_child[node] != UNEXPANDED and self.child_count[node]:
+            start = self.first_child[node]
+            stop = start + self.child_count[node]
+            visits = self.N[start:stop]
+            unvisited = np.flatnonzero(visits == 0)
+            if len(unvisited):
+                node = start + int(unvisited[0])
+            else:
+                uct = self.Q[start:stop] / visits + self.exploration_weight * np.sqrt(
+                    math.log(self.N[node]) / visits)
+                node = start + int(np.argmax(uct))
+            path.append(node)
+        return path
+
+    def _expand(self, nodes):
+        # Creates the children of every node in `nodes` with one batched slide and spawn.
+        cells = unpack_boards(self.board[nodes])
+        legal = legal_mask(cells)
+        parents, moves = np.nonzero(legal)
+        counts = legal.sum(axis=1)
+        start = self._new_nodes(len(parents))
+        stop = start + len(parents)
+        children = slide(cells[parents], moves)
+        spawn(children, self.rng)
+        self.parent[start:stop] = nodes[parents]
+        self.move[start:stop] = moves
+        self.board[start:stop] = pack_boards(children)
+        self.game_over[start:stop] = ~legal_mask(children).any(axis=1)
+        self.first_child[nodes] = start + np.cumsum(counts) - counts
+        self.child_count[nodes] = counts
+
+    def _add_virtual_loss(self, path, sign):
+        # Virtual visits with the lowest possible reward push the next descent elsewhere.
+        self.N[path] += sign * self.virtual_loss
+        self.Q[path] += sign * self.virtual_loss * LOWEST_REWARD
+
+    def _backpropagate(self, path, reward):
+        # The leaf receives the reward, its parent 1 - reward, and so on up to the root.
+        path = path[::-1]
+        self.N[path] += 1
+        self.Q[path[0::2]] += reward
+        self.Q[path[1::2]] += 1 - reward
+
+    # Number of rollouts that went through a node.
+    def visits(self, node):
+        return int(self.N[node])
+
+    # Keeps only the subtree of the position the real game reached after a move, like
+    # MCTS.reroot: if a child of `node` has the same move and board it becomes the root
+    # with its statistics, otherwise a fresh root is made. The kept nodes are copied to
+    # the front of the arena, so the memory of dropped branches is reused.
+    def reroot(self, node, move, game):
+        state = GameState.from_game(game)
+        board = pack_boards(np.frombuffer(state.cells, dtype=np.uint8).reshape(1, 4, 4))[0]
+        match = next((child for child in self.children(node)
+                      if self.move[child] == move and self.board[child] == board), None)
+        if match is None:
+            self.size = 0
+            return self.add_root(state)
+        self._compact(match)
+        return 0
+
+    def _compact(self, root):
+        # Breadth-first copy of the subtree of `root`; every block of siblings stays contiguous.
+        order = [root]
+        for node in order:
+            order.extend(self.children(node))
+        order = np.array(order)
+        new_index = np.full(self.size, -1, dtype=np.int64)
+        new_index[order] = np.arange(len(order))
+        for name in FIELDS:
+            array = getattr(self, name)
+            array[:len(order)] = array[order]
+        expanded = self.first_child[:len(order)] != UNEXPANDED
+        self.first_child[:len(order)][expanded] = new_index[self.first_child[:len(order)][expanded]]
+        self.parent[1:len(order)] = new_index[self.parent[1:len(order)]]
+        self.parent[0] = -1
+        self.size = len(order)
+
+    @property
+    def nbytes(self):
+        # Memory held by the arena.
+        return sum(getattr(self, name).nbytes for name in FIELDS)
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,122 @@
+# batch_simulation.py
+import numpy as np
+
+# Rollouts of many 4x4 positions at once, stepped with whole-array NumPy calls so
+# that the work happens in NumPy kernels rather than in the interpreter. Grids are
+# (N, 4, 4) uint8 arrays of tile exponents (0 = empty, 1 = 2, 2 = 4, ...) and a row
+# of 4 exponents is looked up in precomputed slide tables by its 16-bit word.
+
+ROW_SHIFTS = np.array([0, 4, 8, 12], dtype=np.uint32)
+# Largest exponent a 4-bit cell holds (32768); two such tiles do not merge, as in 2048_2's bitboard
+MAX_EXPONENT = 15
+
+
+def _slide_left(row):
+    # Compress, merge equal neighbours below MAX_EXPONENT once, compress again.
+    tiles = [tile for tile in row if tile]
+    merged = []
+    while tiles:
+        if len(tiles) > 1 and tiles[0] == tiles[1] and tiles[0] != MAX_EXPONENT:
+            merged.append(tiles[0] + 1)
+            tiles = tiles[2:]
+        else:
+            merged.append(tiles[0])
+            tiles = tiles[1:]
+    return merged + [0] * (4 - len(merged))
+
+
+def _build_slide_tables():
+    rows = np.arange(65536, dtype=np.uint32)
+    cells = ((rows[:, None] >> ROW_SHIFTS) & 0xF).astype(np.uint8)
+    left = np.array([_slide_left(row) for row in cells.tolist()], dtype=np.uint8)
+    right = np.array([_slide_left(row[::-1])[::-1] for row in cells.tolist()], dtype=np.uint8)
+    return left, right, (left != cells).any(axis=1), (right != cells).any(axis=1)
+
+
+LEFT_ROWS, RIGHT_ROWS, LEFT_CHANGED, RIGHT_CHANGED = _build_slide_tables()
+
+
+def row_words(cells):
+    # Packs the last axis of an exponent array into 16-bit row words.
+    return (cells.astype(np.uint32) << ROW_SHIFTS).sum(axis=-1)
+
+
+def legal_mask(cells):
+    # (N, 4) mask of the legal Game directions: up, down, left, right.
+    rows = row_words(cells)
+    columns = row_words(cells.transpose(0, 2, 1))
+    return np.stack([
+        LEFT_CHANGED[columns].any(axis=1),  # Up: columns slide towards row 0
+        RIGHT_CHANGED[columns].any(axis=1),  # Down
+        LEFT_CHANGED[rows].any(axis=1),  # Left
+        RIGHT_CHANGED[rows].any(axis=1),  # Right
+    ], axis=1)
+
+
+def slide(cells, directions):
+    # Slides every grid in its own Game direction; no tile is spawned.
+    new_cells = cells.copy()
+    for direction, table in ((0, LEFT_ROWS), (1, RIGHT_ROWS), (2, LEFT_ROWS), (3, RIGHT_ROWS)):
+        selected = np.flatnonzero(directions == direction)
+        if not len(selected):
+            continue
+        if direction < 2:
+            columns = cells[selected].transpose(0, 2, 1)
+            new_cells[selected] = table[row_words(columns)].transpose(0, 2, 1)
+        else:
+            new_cells[selected] = table[row_words(cells[selected])]
+    return new_cells
+
+
+def spawn(cells, rng):
+    # Places a 2 (90%) or a 4 (10%) on a random empty cell of every grid with one.
+    flat = cells.reshape(len(cells), 16)
+    empty = flat == 0
+    counts = empty.sum(axis=1)
+    draws = rng.random((len(cells), 2))
+    targets = (draws[:, 0] * counts).astype(np.int64)
+    positions = (np.cumsum(empty, axis=1) > targets[:, None]).argmax(axis=1)
+    rows = np.flatnonzero(counts)
+    flat[rows, positions[rows]] = np.where(draws[rows, 1] < 0.1, 2, 1)
+
+
+def unpack_boards(boards):
+    # (N,) uint64 packed boards, one exponent per 4 bits in cell order, to (N, 4, 4) exponents.
+    shifts = np.arange(0, 64, 4, dtype=np.uint64)
+    return ((np.asarray(boards, dtype=np.uint64)[:, None] >> shifts) & np.uint64(0xF)).astype(np.uint8).reshape(-1, 4, 4)
+
+
+def pack_boards(cells):
+    # (N, 4, 4) exponents to (N,) uint64 packed boards.
+    shifts = np.arange(0, 64, 4, dtype=np.uint64)
+    return np.bitwise_or.reduce(cells.reshape(len(cells), 16).astype(np.uint64) << shifts, axis=1)
+
+
+def simulate_batch(states, max_depth, rng):
+    # Plays one random rollout from each GameState, like MCTS._simulate.
+    cells = np.frombuffer(b''.join(state.cells for state in states), dtype=np.uint8).reshape(-1, 4, 4)
+    return simulate_cells(cells.copy(), max_depth, rng)
+
+
+def simulate_cells(cells, max_depth, rng):
+    # Plays one random rollout from each (4, 4) exponent grid, modifying cells: random
+    # legal moves until the game is over or max_depth moves were played. The reward is
+    # the number of empty cells at the end, seen from the side to move at the start
+    # (1 - reward after an even number of moves).
+    depths = np.zeros(len(cells), dtype=np.int64)
+    active = np.arange(len(cells))
+    for _ in range(max_depth):
+        mask = legal_mask(cells[active])
+        running = mask.any(axis=1)
+        active, mask = active[running], mask[running]
+        if not len(active):
+            break
+        # A uniformly random legal direction per grid
+        targets = (rng.random(len(active)) * mask.sum(axis=1)).astype(np.int64)
+        directions = (np.cumsum(mask, axis=1) > targets[:, None]).argmax(axis=1)
+        moved = slide(cells[active], directions)
+        spawn(moved, rng)
+        cells[active] = moved
+        depths[active] += 1
+    rewards = (cells.reshape(len(cells), 16) == 0).sum(axis=1)
+    return np.where(depths % 2 == 0, 1 - rewards, rewards)
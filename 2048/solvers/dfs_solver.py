@@ -1,6 +1,7 @@
 # dfs_solver.py
 from solvers.solver import Solver
 import numpy as np
+import rng
 from game_logic import Game
 
 class DFSSolver(Solver):
@@ -13,10 +14,11 @@ class DFSSolver(Solver):
         best_move = None
         for _ in range(self.rollouts):
             # Randomly select a move to simulate
-            move = np.random.choice(self.env.get_legal_moves())
-            new_game = self.clone_game(self.env)
-            new_game.play(move)
-            heuristic_value = self.evaluate_rollout(new_game, depth=1)
+            move = rng.choice(self.env.get_legal_moves())
+            # Explore on the game itself and undo the moves afterwards
+            self.env.make_move(move)
+            heuristic_value = self.evaluate_rollout(self.env, depth=1)
+            self.env.undo_move()
             if heuristic_value > best_heuristic_value:
                 best_heuristic_value = heuristic_value
                 best_move = move
@@ -27,15 +29,15 @@ class DFSSolver(Solver):
             return self.evaluate_heuristic(game)
 
         # Randomly select a move for the rollout
-        move = np.random.choice(game.get_legal_moves())
-        new_game = self.clone_game(game)
-        new_game.play(move)
-        return self.evaluate_rollout(new_game, depth + 1)
+        move = rng.choice(game.get_legal_moves())
+        game.make_move(move)
+        value = self.evaluate_rollout(game, depth + 1)
+        game.undo_move()
+        return value
 
     def clone_game(self, game):
         # Deep copy the game state
-        new_game = Game(size=game.size, win_tile=game.win_tile)
-        new_game.grid = np.copy(game.grid)
+        new_game = Game(size=game.size, win_tile=game.win_tile, grid=np.copy(game.grid))
         new_game.score = game.score
         new_game.is_win = game.is_win
         new_game.game_over = game.game_over
@@ -1,21 +1,42 @@
 import math
-import random
+import threading
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
 import numpy as np
 
 # mcts.py
+import rng
 from game_logic import Game
+from game_state import GameState
+from solvers.transposition import TranspositionTable
+from solvers.batch_simulation import simulate_batch
 
 class MCTSNode:
+    # Nodes keep a compact GameState instead of a full Game to keep large trees small.
+    __slots__ = ('state', 'move', 'parent', 'children', 'wins', 'visits', '_untried_actions', 'is_terminal_state')
+
     def __init__(self, game, move=None, parent=None):
-        self.game = game  # The game state at this node
+        self.state = GameState.from_game(game)  # The game state at this node, a Game or a GameState
         self.move = move  # The move that led to this game state
         self.parent = parent  # The parent node of this node
         self.children = []  # Child nodes of this node
         self.wins = 0  # Number of wins when simulating from this node
         self.visits = 0  # Number of visits to this node during the search
-        self.untried_actions = self.untried_moves()  # Legal moves from this node that haven't been tried
-        self.is_terminal_state = game.game_over  # Boolean flag indicating if the game is over at this node
+        self._untried_actions = None  # Legal moves not tried yet, computed on first use
+        self.is_terminal_state = self.state.game_over  # Boolean flag indicating if the game is over at this node
+
+    @property
+    def game(self):
+        # A fresh Game built from this node's state
+        return self.state.to_game()
+
+    @property
+    def untried_actions(self):
+        # Most nodes are never expanded, so their legal moves are only computed when needed
+        if self._untried_actions is None:
+            self._untried_actions = self.untried_moves()
+        return self._untried_actions
 
     def untried_moves(self):
         # Get legal moves from the current game state
@@ -24,7 +45,7 @@ class MCTSNode:
     def expand(self):
         # Expand the tree by one of the untried moves and return the new child node
         move = self.untried_actions.pop()  # Remove a move from untried actions
-        new_game_state = clone_game(self.game)  # Clone the current game state to apply the move
+        new_game_state = clone_game(self.state)  # Clone the current game state to apply the move
         new_game_state.play(move)  # Apply the move
         child_node = MCTSNode(new_game_state, move=move, parent=self)  # Create a new child node with the new game state
         self.children.append(child_node)  # Add the new child node to the children list
@@ -37,22 +58,21 @@ class MCTSNode:
 
     def is_terminal(self):
         # Check if the game is over at this node
-        return self.game.game_over
+        return self.state.game_over
 
     def reward(self):
         # Define the reward for simulations
         # For 2048, a possible reward could be based on the number of empty tiles
         # This reward function could be more complex to better reflect good game states
-        empty_tiles = np.count_nonzero(self.game.grid == 0)
-        return empty_tiles
+        return self.state.count_empty()
 
     def __hash__(self):
-        # Define a hash for the node based on its game state
-        return hash(self.game.grid.tostring())
+        # The Zobrist key of the node's grid
+        return self.state.key
 
     def __eq__(self, other):
-        # Nodes are equal if their game states are equal
-        return np.array_equal(self.game.grid, other.game.grid)
+        # Nodes are equal if their grids are equal
+        return self.state.cells == other.state.cells
 
     def find_children(self):
         # Find all possible children of this node (all possible moves)
@@ -60,7 +80,7 @@ class MCTSNode:
             return set()  # If the game is over, there are no children
         children = set()
         for move in self.untried_actions:
-            new_game_state = clone_game(self.game)
+            new_game_state = clone_game(self.state)
             new_game_state.play(move)
             children.add(MCTSNode(new_game_state, move=move, parent=self))
         return children
@@ -69,22 +89,135 @@ class MCTSNode:
         # Find a random child node
         if self.is_terminal_state:
             return None  # If the game is over, there is no random child
-        move = random.choice(self.untried_actions)  # Choose a random move
-        new_game_state = clone_game(self.game)
+        move = rng.choice(self.untried_actions)  # Choose a random move
+        new_game_state = clone_game(self.state)
         new_game_state.play(move)
         return MCTSNode(new_game_state, move=move, parent=self)
 
+# Grows one independent tree in a worker process for root-parallel MCTS and returns the
+# statistics of its root children as a dict from move to (Q, N).
+def _grow_tree(state, n_rollouts, max_depth, config, seed):
+    # Each worker draws from its own stream, spawned from the parent's SeedSequence.
+    rng.seed(seed)
+    table_spec = config.pop('table_spec', None)
+    if table_spec is not None:
+        config['transposition_table'] = TranspositionTable(*table_spec)
+    mcts = MCTS(**config)
+    root = MCTSNode(state)
+    mcts.do_rollouts(root, n_rollouts, max_depth)
+    return {child.move: (mcts.Q[mcts._key(child)], mcts.N[mcts._key(child)]) for child in mcts.children[root]}
+
 class MCTS:
     # Constructor for the MCTS class.
-    def __init__(self, exploration_weight=1):
+    def __init__(self, exploration_weight=1, transposition_table=None, symmetry=None, seed=None, virtual_loss=3,
+                 open_loop=False):
         # Total accumulated reward for each node, used in calculating UCT values.
         self.Q = defaultdict(int)
         # The number of times each node has been visited, used in calculating UCT values.
         self.N = defaultdict(int)
         # Dictionary mapping a node to its children nodes.
         self.children = defaultdict(list)
+        # The node object the tree holds for each expanded node and child, looked up by an
+        # equal node, so reroot finds the stored node of a position without a scan.
+        self.nodes = {}
         # Parameter to balance exploration & exploitation, higher values favor exploring less visited nodes.
         self.exploration_weight = exploration_weight
+        # Optional TranspositionTable pooling simulation results by Zobrist key: every visit
+        # still plays out, and the position's value is the mean of all its playouts so far,
+        # including those of the same position reached through different paths.
+        self.transposition_table = transposition_table
+        # Optional Symmetry; when set, Q and N are keyed by the canonical form of a node's
+        # grid, so the 8 rotations and reflections of a position share their statistics.
+        self.symmetry = symmetry
+        # Source of the independent random streams of root-parallel workers.
+        self.seed_sequence = np.random.SeedSequence(seed)
+        # Worker processes for root-parallel rollouts, started on first use.
+        self._pool = None
+        self._pool_workers = 0
+        # Tree-parallel rollouts: every thread that descends through a node adds this many
+        # virtual visits with the worst possible reward, so concurrent descents spread out.
+        self.virtual_loss = virtual_loss
+        # Children of each expanded node that have not been expanded themselves yet, so
+        # _select finds an unexplored child without scanning the whole tree.
+        self.unexplored = {}
+        # Open-loop mode: tree nodes are move sequences from the root instead of sampled
+        # positions. Every rollout replays its sequence on the real root state with fresh
+        # spawns, so a node's statistics cover all spawns that can follow its moves and the
+        # tree stays as small as the set of move sequences tried. Statistics are keyed by
+        # (Zobrist key of the root, move sequence).
+        self.open_loop = open_loop
+        # Zobrist key of the root the open-loop sequences start from, for reroot.
+        self._open_loop_root = None
+        # Guards the tree (Q, N, children and the transposition table) in tree-parallel rollouts.
+        self._lock = threading.Lock()
+        self._remaining = 0
+
+    # Key under which the statistics of a node are stored.
+    def _key(self, node):
+        if self.symmetry is None:
+            return node
+        return self.symmetry.canonical_key(node.state)
+
+    # Number of rollouts that went through a node.
+    def visits(self, node):
+        if self.open_loop:
+            return self.N[(node.state.key, ())]
+        return self.N[self._key(node)]
+
+    # Moves the root to the position the real game reached after a move and its spawn.
+    # Nodes are identified by their grid, so if that position was already searched the
+    # node stored for it is returned with its children and statistics; otherwise a fresh
+    # node is made. Everything that can no longer be reached from the new root is dropped,
+    # which keeps the tree from growing over a game.
+    # Open-loop search needs the move played: its sequences carry no spawns, so every
+    # sequence (old root, (move, *rest)) covers the spawn that was observed and becomes
+    # (new root, rest); all other sequences are dropped.
+    def reroot(self, game, move=None):
+        root = MCTSNode(game)
+        if self.open_loop:
+            if move is None:
+                raise ValueError("Open-loop reroot needs the move that was played")
+            old_key, root_key = self._open_loop_root, root.state.key
+            self.Q = defaultdict(int, {(root_key, sequence[1:]): q for (key, sequence), q in self.Q.items()
+                                       if key == old_key and sequence[:1] == (move,)})
+            self.N = defaultdict(int, {(root_key, sequence[1:]): n for (key, sequence), n in self.N.items()
+                                       if key == old_key and sequence[:1] == (move,)})
+            self._open_loop_root = root_key
+            return root
+        root = self._stored_node(root)
+        reachable = {root}
+        frontier = [root]
+        while frontier:
+            node = frontier.pop()
+            for child in self.children.get(node, ()):
+                if child not in reachable:
+                    reachable.add(child)
+                    frontier.append(child)
+        self.children = defaultdict(list, {node: children for node, children in self.children.items()
+                                           if node in reachable})
+        self.unexplored = {node: frontier for node, frontier in self.unexplored.items() if node in reachable}
+        # Keyed by the stored objects, so no dropped node survives as a key of an equal one
+        self.nodes = {stored: stored for stored in self.nodes.values() if stored in reachable}
+        # Statistics are kept under node keys, which are canonical keys with a Symmetry.
+        keys = {self._key(node) for node in reachable}
+        self.Q = defaultdict(int, {key: q for key, q in self.Q.items() if key in keys})
+        self.N = defaultdict(int, {key: n for key, n in self.N.items() if key in keys})
+        # Parent links into the dropped part of the tree would keep it alive. Equal nodes can
+        # be distinct objects, so a link is kept only to a node object still held by the tree.
+        kept = list(self.children) + list(self.nodes.values())
+        for children in self.children.values():
+            kept.extend(children)
+        kept_ids = {id(node) for node in kept}
+        for node in kept:
+            if node.parent is not None and id(node.parent) not in kept_ids:
+                node.parent = None
+        root.parent = None
+        return root
+
+    # The node object the tree holds for the position of `node`, or `node` itself if the
+    # position is not in the tree.
+    def _stored_node(self, node):
+        return self.nodes.get(node, node)
 
     # Chooses the best child node to visit based on UCT scores.
     def choose(self, node):
@@ -92,6 +225,9 @@ class MCTS:
         if node.is_terminal():
             raise RuntimeError(f"choose called on terminal node {node}")
 
+        if self.open_loop:
+            return self._choose_open_loop(node)
+
         # If the node has no children, a random child node is selected.
         if not self.children[node]:
             return node.find_random_child()
@@ -100,16 +236,35 @@ class MCTS:
         # It's a nested function as it's only used within the scope of 'choose'.
         def score(n):
             # If the node has not been visited yet, it gets a score of negative infinity to encourage exploration.
-            if self.N[n] == 0:
+            key = self._key(n)
+            if self.N[key] == 0:
                 return float("-inf")
             # Otherwise, the score is the average reward per visit for the node.
-            return self.Q[n] / self.N[n]
+            return self.Q[key] / self.N[key]
 
         # Selects the child with the highest UCT score.
         return max(self.children[node], key=score)
 
     # Performs multiple rollouts (simulations) to estimate the value of the current node.
-    def do_rollouts(self, node, n_rollouts, max_depth=7):
+    # With workers > 1 the search is root-parallel: every worker grows its own tree of
+    # n_rollouts rollouts from the node, and the visit counts and rewards of the node's
+    # children are merged into this tree by move, so choose works as usual.
+    # With threads > 1 the search is tree-parallel instead: the threads share this tree
+    # and perform n_rollouts rollouts together, see _do_threaded_rollouts.
+    def do_rollouts(self, node, n_rollouts, max_depth=7, workers=1, threads=1, batch_size=8):
+        if self.open_loop:
+            if workers > 1 or threads > 1:
+                raise ValueError("Open-loop MCTS runs serially; use workers=1 and threads=1")
+            self._open_loop_root = node.state.key
+            for _ in range(n_rollouts):
+                self._open_loop_rollout(node, max_depth)
+            return
+        if workers > 1:
+            self._do_parallel_rollouts(node, n_rollouts, max_depth, workers)
+            return
+        if threads > 1:
+            self._do_threaded_rollouts(node, n_rollouts, max_depth, threads, batch_size)
+            return
         # Loop to perform n_rollouts simulations.
         for _ in range(n_rollouts):
             # Select a path through the tree to a leaf node.
@@ -122,21 +277,189 @@ class MCTS:
             # Propagate the results of the simulation back up the tree.
             self._backpropagate(path, reward)
 
+    # One open-loop rollout: descend by UCT over move sequences while replaying the moves
+    # on a scratch game, add the first untried move as a new tree node, finish with a
+    # random playout and backpropagate along the visited sequences.
+    def _open_loop_rollout(self, node, max_depth):
+        game = node.game
+        sequence = ()
+        path = [(node.state.key, sequence)]
+        while not game.game_over:
+            # Only moves legal under this rollout's spawns are candidates.
+            moves = game.get_legal_moves()
+            keys = [(node.state.key, sequence + (move,)) for move in moves]
+            untried = [index for index, key in enumerate(keys) if self.N[key] == 0]
+            if untried:
+                index = untried[0]
+            else:
+                log_n = math.log(self.N[path[-1]])
+                index = max(range(len(keys)), key=lambda i: self.Q[keys[i]] / self.N[keys[i]] + self.exploration_weight
+                            * math.sqrt(log_n / self.N[keys[i]]))
+            game.make_move(moves[index])
+            sequence = sequence + (moves[index],)
+            path.append(keys[index])
+            if untried:
+                break
+        self._backpropagate_keys(path, self._playout(game, max_depth))
+
+    # Like _backpropagate, for paths of statistics keys.
+    def _backpropagate_keys(self, keys, reward):
+        for key in reversed(keys):
+            self.N[key] += 1
+            self.Q[key] += reward
+            reward = 1 - reward
+
+    # Open-loop choose: the move with the best average reward, played on a copy of the node.
+    def _choose_open_loop(self, node):
+        def score(move):
+            key = (node.state.key, (move,))
+            return self.Q[key] / self.N[key] if self.N[key] else float("-inf")
+
+        move = max(node.untried_moves(), key=score)
+        game = node.game
+        game.play(move)
+        return MCTSNode(game, move=move, parent=node)
+
+    # Grows independent trees in worker processes and merges their root-child statistics.
+    def _do_parallel_rollouts(self, node, n_rollouts, max_depth, workers):
+        self._expand(node)
+        seeds = self.seed_sequence.spawn(workers)
+        config = self._worker_config()
+        results = self._get_pool(workers).starmap(
+            _grow_tree, [(node.state, n_rollouts, max_depth, config, seed) for seed in seeds])
+        # The children of the node differ between trees only by their random spawns,
+        # so the statistics of a move are added to the child reached by that move here.
+        # Children are told apart by their grid, and two moves whose spawns reach the same
+        # grid leave a single child; the other move is then not in this tree, as in a
+        # serial search, and its statistics are left out of the child and the node.
+        children = {child.move: child for child in self.children[node]}
+        node_key = self._key(node)
+        for tree in results:
+            for move, (q, n) in tree.items():
+                if move not in children:
+                    continue
+                key = self._key(children[move])
+                self.Q[key] += q
+                self.N[key] += n
+                # As in _backpropagate, the node sees each reward of its children inverted.
+                self.Q[node_key] += n - q
+                self.N[node_key] += n
+
+    # Several threads descend the shared tree. Each thread selects up to batch_size leaves
+    # under the tree lock, marking every path with virtual loss so the next descent
+    # prefers other branches, simulates the leaves with one batched NumPy call outside
+    # the lock, then backpropagates the rewards and removes the virtual loss. All tree
+    # updates happen under the lock, so the search is also safe on free-threaded builds.
+    def _do_threaded_rollouts(self, node, n_rollouts, max_depth, threads, batch_size):
+        if node.state.size != 4:
+            raise ValueError("Tree-parallel rollouts are only supported on 4x4 grids")
+        self._remaining = n_rollouts
+        seeds = self.seed_sequence.spawn(threads)
+        with ThreadPoolExecutor(threads) as executor:
+            futures = [executor.submit(self._rollout_thread, node, max_depth, batch_size, np.random.default_rng(seed))
+                       for seed in seeds]
+            for future in futures:
+                future.result()
+
+    # The loop of one tree-parallel thread, drawing batches from the shared rollout budget.
+    def _rollout_thread(self, node, max_depth, batch_size, rng):
+        while True:
+            with self._lock:
+                count = min(batch_size, self._remaining)
+                if not count:
+                    return
+                self._remaining -= count
+                paths = []
+                for _ in range(count):
+                    path = self._select(node)
+                    self._expand(path[-1])
+                    self._add_virtual_loss(path, 1)
+                    paths.append(path)
+
+            rewards = simulate_batch([path[-1].state for path in paths], max_depth, rng).tolist()
+
+            with self._lock:
+                for path, reward in zip(paths, rewards):
+                    if self.transposition_table is not None:
+                        reward = self._pool_playout(path[-1], reward, max_depth)
+                    self._add_virtual_loss(path, -1)
+                    self._backpropagate(path, reward)
+
+    # Adds (sign 1) or removes (sign -1) the virtual loss of a path being simulated.
+    def _add_virtual_loss(self, path, sign):
+        for node in path:
+            key = self._key(node)
+            # The lowest reward a simulation can return: a full grid, seen inverted.
+            loss = 1 - node.state.size ** 2
+            self.N[key] += sign * self.virtual_loss
+            self.Q[key] += sign * self.virtual_loss * loss
+
+    # Settings for the MCTS of a worker. A transposition table is not sent over; the
+    # worker builds an empty one of the same size and policy from table_spec.
+    def _worker_config(self):
+        config = {'exploration_weight': self.exploration_weight, 'symmetry': self.symmetry}
+        table = self.transposition_table
+        if table is not None:
+            config['table_spec'] = (table.buckets.bit_length() - 1, table.policy)
+        return config
+
+    # The worker pool, restarted when a different number of workers is requested.
+    def _get_pool(self, workers):
+        if self._pool is not None and self._pool_workers != workers:
+            self.close()
+        if self._pool is None:
+            self._pool = Pool(workers)
+            self._pool_workers = workers
+        return self._pool
+
+    # Shuts down the worker processes of root-parallel rollouts.
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            self._pool_workers = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     # Simulates a game from the given node to a specified depth.
     def _simulate(self, node, max_depth):
+        # The simulation plays on one scratch game built from the node's state.
+        result = self._playout(node.game, max_depth)
+        if self.transposition_table is not None:
+            return self._pool_playout(node, result, max_depth)
+        return result
+
+    # Adds a playout result to the (total, count) the transposition table keeps for the
+    # node's position and returns the mean of all playouts of that position so far. A
+    # single random playout is never reused as the position's value on its own.
+    def _pool_playout(self, node, result, max_depth):
+        table_key = node.state.key if self.symmetry is None else self._key(node)
+        entry = self.transposition_table.probe(table_key, max_depth)
+        total, count = entry if entry is not None else (0, 0)
+        total, count = total + result, count + 1
+        self.transposition_table.store(table_key, (total, count), max_depth)
+        return total / count
+
+    # Plays random moves on a game until it is over or max_depth moves were played.
+    def _playout(self, game, max_depth):
         # Flag to track whose "turn" it is; invert on each level to simulate the opponent's turn.
         invert_reward = True
         # Counter to track the depth of the simulation.
         depth = 0
         # Continue simulation until terminal state or max depth reached.
-        while not node.is_terminal() and depth < max_depth:
-            # Select a random child of the node to explore.
-            node = node.find_random_child()
+        while not game.game_over and depth < max_depth:
+            # Play a random legal move.
+            game.make_move(rng.choice(game.get_legal_moves()))
             # Invert the flag as we go one level deeper in the simulation.
             invert_reward = not invert_reward
             depth += 1
-        # Get the reward from the node where the simulation ended.
-        reward = node.reward()
+        # Get the reward from the state where the simulation ended.
+        reward = np.count_nonzero(game.grid == 0)
         # If the simulation ended on the opponent's turn, invert the reward.
         return 1 - reward if invert_reward else reward
 
@@ -150,30 +473,46 @@ class MCTS:
             # If a node has no children or is terminal, we've reached a leaf.
             if not self.children[node] or node.is_terminal():
                 return path
-            # Filter out the children that have not been explored.
-            unexplored = self.children[node] - set(self.children)
-            # If there's any unexplored node, select it and return the path.
-            if unexplored:
-                n = unexplored.pop()
+            # If there's any unexplored child, select it and return the path.
+            n = self._pop_unexplored(node)
+            if n is not None:
                 path.append(n)
                 return path
             # If all children are explored, use the UCT selection method to choose a node.
             node = self._uct_select(node)
 
+    # Removes and returns a child of the node that is not in the tree yet, or None.
+    def _pop_unexplored(self, node):
+        frontier = self.unexplored.get(node)
+        if frontier is None:
+            # Children assigned to the tree directly rather than through _expand
+            frontier = self.unexplored[node] = set(self.children[node])
+        while frontier:
+            child = frontier.pop()
+            # A child may have been expanded meanwhile as the child of another node
+            if child not in self.children:
+                return child
+        return None
+
     # Expands the tree from the given node by adding all possible children to the node.
     def _expand(self, node):
         # If the node is not in children or has no children, find all children and add them.
         if node not in self.children or not self.children[node]:
             self.children[node] = node.find_children()
+            self.unexplored[node] = set(self.children[node])
+            self.nodes[node] = node
+            for child in self.children[node]:
+                self.nodes.setdefault(child, child)
 
     # Updates the statistics for the nodes in the path after a simulation.
     def _backpropagate(self, path, reward):
         # Go through the path in reverse (from leaf to root).
         for node in reversed(path):
+            key = self._key(node)
             # Increment the visit count for the node.
-            self.N[node] += 1
+            self.N[key] += 1
             # Update the total reward for the node.
-            self.Q[node] += reward
+            self.Q[key] += reward
             # Invert the reward as we go back up the tree.
             reward = 1 - reward
 
@@ -183,24 +522,27 @@ class MCTS:
         assert all(n in self.children for n in self.children[node])
 
         # Calculate the logarithm of the visit count for the current node.
-        log_N_vertex = math.log(self.N[node])
+        log_N_vertex = math.log(self.N[self._key(node)])
 
         # UCT calculation for a node, balancing exploration and exploitation.
         def uct(n):
+            key = self._key(n)
             # Calculate the UCT score for the node.
-            return self.Q[n] / self.N[n] + self.exploration_weight * math.sqrt(
-                log_N_vertex / self.N[n]
+            return self.Q[key] / self.N[key] + self.exploration_weight * math.sqrt(
+                log_N_vertex / self.N[key]
             )
 
         # Select the child with the maximum UCT score.
         return max(self.children[node], key=uct)
 
-# Function to clone a game state.
+# Function to clone a game state, either a Game or a compact GameState.
 def clone_game(game):
+    if isinstance(game, GameState):
+        # A state builds its own Game with a fresh grid.
+        return game.to_game()
     # Create a new game instance with the same size and win conditions.
-    new_game = Game(size=game.size, win_tile=game.win_tile)
     # Deep copy the grid to ensure no references to the original game grid remain.
-    new_game.grid = np.copy(game.grid)
+    new_game = Game(size=game.size, win_tile=game.win_tile, grid=np.copy(game.grid))
     # Copy the current score from the original game.
     new_game.score = game.score
     # Copy the win status from the original game.
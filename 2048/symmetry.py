@@ -0,0 +1,81 @@
+# symmetry.py
+from operator import itemgetter
+
+import numpy as np
+
+from zobrist import hash_exponents
+
+# Unit vectors (row step, column step) of the Game directions: up, down, left, right.
+DIRECTION_VECTORS = {0: (-1, 0), 1: (1, 0), 2: (0, -1), 3: (0, 1)}
+
+
+class Symmetry:
+    """The 8 rotations and reflections of a square 2048 grid.
+
+    Every transform is precomputed once as a permutation of the flat cell indices,
+    so mapping a state to its canonical form is 8 C-level gathers on its exponent
+    bytes instead of 8 rotated and flipped array copies. Transform t maps a grid to
+    one whose cell i holds cell permutations[t][i] of the original.
+    """
+
+    def __init__(self, size=4):
+        self.size = size
+        cells = np.arange(size * size).reshape(size, size)
+        self.permutations = []
+        for flip in (False, True):
+            for turns in range(4):
+                transformed = np.rot90(cells, turns)
+                if flip:
+                    transformed = np.fliplr(transformed)
+                self.permutations.append(tuple(int(i) for i in transformed.ravel()))
+        self.gathers = [itemgetter(*permutation) for permutation in self.permutations]
+
+        # Where every original cell ends up, used to map directions between frames
+        self.positions = []
+        for permutation in self.permutations:
+            inverse = [0] * (size * size)
+            for new_index, old_index in enumerate(permutation):
+                inverse[old_index] = new_index
+            self.positions.append(inverse)
+
+        self.to_canonical_directions = [
+            {direction: self._transform_direction(t, vector) for direction, vector in DIRECTION_VECTORS.items()}
+            for t in range(8)
+        ]
+        self.from_canonical_directions = [
+            {new: old for old, new in mapping.items()} for mapping in self.to_canonical_directions
+        ]
+
+    def _transform_direction(self, t, vector):
+        # Follow one step from a corner cell through the transform
+        start = 0 if vector[0] >= 0 and vector[1] >= 0 else self.size * self.size - 1
+        row, col = divmod(start, self.size)
+        end = (row + vector[0]) * self.size + col + vector[1]
+        new_row, new_col = divmod(self.positions[t][start], self.size)
+        end_row, end_col = divmod(self.positions[t][end], self.size)
+        step = (end_row - new_row, end_col - new_col)
+        return next(direction for direction, v in DIRECTION_VECTORS.items() if v == step)
+
+    def transform(self, cells, t):
+        """Applies transform t to a flat sequence of cells (e.g. GameState.cells)."""
+        return bytes(self.gathers[t](cells))
+
+    def canonical(self, cells):
+        """Returns the canonical exponent bytes of a grid and the transform that produces them."""
+        best, best_t = None, 0
+        for t, gather in enumerate(self.gathers):
+            candidate = bytes(gather(cells))
+            if best is None or candidate < best:
+                best, best_t = candidate, t
+        return best, best_t
+
+    def canonical_key(self, state):
+        """Zobrist key of the canonical form of a GameState, usable as a transposition table key."""
+        return hash_exponents(list(self.canonical(state.cells)[0]))
+
+    def to_canonical_move(self, direction, t):
+        return self.to_canonical_directions[t][direction]
+
+    def from_canonical_move(self, direction, t):
+        """Maps a direction chosen on the canonical grid back to the original grid."""
+        return self.from_canonical_directions[t][direction]
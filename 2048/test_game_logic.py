@@ -0,0 +1,143 @@
+# test_game_logic.py
+import copy
+import pickle
+
+import numpy as np
+import pytest
+
+import rng
+from game_logic import Game
+from game_state import GameState
+from zobrist import hash_grid
+
+
+def random_grid(generator, size):
+    # Tiles from 2 to 4096 with about a third of the cells empty, so most rows both
+    # slide and merge
+    exponents = generator.integers(1, 13, size=(size, size))
+    exponents[generator.random((size, size)) < 0.35] = 0
+    return np.where(exponents > 0, 2 ** exponents, 0)
+
+
+def snapshot(game):
+    return game.grid.copy(), game.score, game.game_over, game.is_win, game.zobrist_key
+
+
+def test_zobrist_key_follows_play():
+    for seed in range(5):
+        rng.seed(seed)
+        game = Game()
+        assert game.zobrist_key == hash_grid(game.grid)
+        while not game.game_over:
+            game.make_random_move()
+            assert game.zobrist_key == hash_grid(game.grid)
+
+
+def test_zobrist_key_follows_make_and_undo():
+    rng.seed(1)
+    game = Game(win_tile=64)
+    snapshots = []
+    while not game.game_over and len(snapshots) < 300:
+        snapshots.append(snapshot(game))
+        assert game.make_move(rng.choice(game.get_legal_moves()))
+        assert game.zobrist_key == hash_grid(game.grid)
+    # The game was played to a win and to its end, so undo has flags to restore
+    assert game.is_win and game.game_over
+    while snapshots:
+        game.undo_move()
+        grid, score, game_over, is_win, key = snapshots.pop()
+        assert np.array_equal(game.grid, grid)
+        assert (game.score, game.game_over, game.is_win, game.zobrist_key) == (score, game_over, is_win, key)
+        assert game.zobrist_key == hash_grid(game.grid)
+    assert not game.history
+
+
+def test_make_move_without_change_records_nothing():
+    game = Game(grid=np.array([[2, 4], [8, 16]]), size=2)
+    before = snapshot(game)
+    for direction in range(4):
+        assert not game.make_move(direction)
+    assert not game.history
+    assert np.array_equal(game.grid, before[0]) and snapshot(game)[1:] == before[1:]
+
+
+def test_grid_setter_rehashes():
+    generator = np.random.default_rng(2)
+    rng.seed(2)
+    game = Game()
+    for _ in range(20):
+        game.grid = random_grid(generator, 4)
+        assert game.zobrist_key == hash_grid(game.grid)
+    # Moves keep updating the key incrementally from the assigned grid
+    game.make_random_move()
+    assert game.zobrist_key == hash_grid(game.grid)
+
+
+def test_legal_mask_matches_preview():
+    generator = np.random.default_rng(3)
+    for size in (2, 3, 4, 5):
+        for _ in range(200):
+            game = Game(size=size, grid=random_grid(generator, size))
+            mask = game.legal_mask()
+            assert list(mask) == [game.preview(direction)[1] for direction in range(4)]
+            assert game.get_legal_moves() == [direction for direction in range(4) if mask[direction]]
+
+
+def test_preview_leaves_the_game_unchanged():
+    generator = np.random.default_rng(4)
+    game = Game(grid=random_grid(generator, 4))
+    before = snapshot(game)
+    for direction in range(4):
+        game.preview(direction)
+    assert np.array_equal(game.grid, before[0]) and snapshot(game)[1:] == before[1:]
+    with pytest.raises(ValueError):
+        game.preview(4)
+
+
+def test_game_state_round_trip():
+    for seed in range(5):
+        rng.seed(seed)
+        game = Game(win_tile=128)
+        for _ in range(60):
+            if game.game_over:
+                break
+            game.make_random_move()
+        state = GameState.from_game(game)
+        assert np.array_equal(state.grid, game.grid)
+        assert (state.score, state.game_over, state.is_win) == (game.score, game.game_over, game.is_win)
+        assert state.key == game.zobrist_key == hash_grid(game.grid)
+        # A state rebuilt from its cells hashes them afresh and finds the same entry
+        rebuilt = GameState(state.cells, score=state.score, game_over=state.game_over, is_win=state.is_win)
+        assert rebuilt.key == state.key and {state: seed}[rebuilt] == seed
+        assert state.count_empty() == np.count_nonzero(game.grid == 0)
+        assert state.get_max_tile() == game.get_max_tile()
+
+        restored = state.to_game()
+        assert snapshot(restored)[1:] == snapshot(game)[1:]
+        assert np.array_equal(restored.grid, game.grid)
+        # The restored game's grid is its own, so playing it leaves the state alone
+        restored.make_random_move()
+        assert np.array_equal(state.grid, game.grid)
+        assert GameState.from_game(state) is state
+
+
+def test_game_state_is_immutable_and_shared():
+    rng.seed(5)
+    state = GameState.from_game(Game())
+    with pytest.raises(AttributeError):
+        state.score = 4
+    assert copy.copy(state) is state and copy.deepcopy(state) is state
+    unpickled = pickle.loads(pickle.dumps(state))
+    assert unpickled == state and unpickled.key == state.key
+
+
+def test_game_state_equality():
+    grid = np.array([[2, 0, 0, 0], [0, 4, 0, 0], [0, 0, 8, 0], [0, 0, 0, 2048]])
+    state = GameState.from_game(Game(grid=grid))
+    assert state == GameState.from_game(Game(grid=grid.copy()))
+    # The flags and score are part of a state, the grid alone decides its key
+    game = Game(grid=grid.copy())
+    game.score = 12
+    other = GameState.from_game(game)
+    assert other != state and other.key == state.key
+    assert state.get_max_tile() == 2048 and state.count_empty() == 12
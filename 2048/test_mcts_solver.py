@@ -0,0 +1,220 @@
+# test_mcts_solver.py
+import gc
+from collections import defaultdict
+
+import numpy as np
+
+import rng
+from game_logic import Game
+from solvers.mcts_solver import MCTS, MCTSNode, _grow_tree
+from solvers.array_mcts import ArrayMCTS
+from solvers.transposition import TranspositionTable
+from symmetry import Symmetry
+
+
+def mid_game(seed):
+    # A position a few random moves into a game
+    rng.seed(seed)
+    game = Game()
+    for _ in range(10):
+        game.make_random_move()
+    return game
+
+
+class RecordingMCTS(MCTS):
+    # Records every backpropagated path and reward, so the tree statistics can be
+    # recomputed independently of the search.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.backpropagated = []
+
+    def _backpropagate(self, path, reward):
+        self.backpropagated.append((list(path), reward))
+        super()._backpropagate(path, reward)
+
+
+def check_visit_counts(mcts, root, n_rollouts):
+    # Every rollout passes through the root
+    assert len(mcts.backpropagated) == n_rollouts
+    assert mcts.N[mcts._key(root)] == n_rollouts
+    # Replaying the recorded rollouts gives exactly the stored statistics, so no update
+    # was lost and no virtual loss was left behind.
+    expected_n, expected_q = defaultdict(int), defaultdict(int)
+    for path, reward in mcts.backpropagated:
+        for node in reversed(path):
+            expected_n[mcts._key(node)] += 1
+            expected_q[mcts._key(node)] += reward
+            reward = 1 - reward
+    assert {key: n for key, n in mcts.N.items() if n} == dict(expected_n)
+    assert {key: q for key, q in mcts.Q.items() if q or key in expected_q} == dict(expected_q)
+
+
+def test_tree_parallel_visit_counts():
+    for seed in range(5):
+        mcts = RecordingMCTS(exploration_weight=1.4, seed=seed)
+        root = MCTSNode(mid_game(seed))
+        mcts.do_rollouts(root, 400, max_depth=7, threads=8, batch_size=4)
+        check_visit_counts(mcts, root, 400)
+
+
+def test_tree_parallel_repeated_calls():
+    # Budgets of later calls add up on the same tree
+    mcts = RecordingMCTS(exploration_weight=1.4, seed=1, transposition_table=TranspositionTable(12))
+    root = MCTSNode(mid_game(1))
+    for _ in range(4):
+        mcts.do_rollouts(root, 100, max_depth=5, threads=4)
+    check_visit_counts(mcts, root, 400)
+    assert mcts.choose(root).move in root.untried_actions
+
+
+def test_serial_visit_counts():
+    mcts = RecordingMCTS(exploration_weight=1.4)
+    root = MCTSNode(mid_game(2))
+    mcts.do_rollouts(root, 200, max_depth=7)
+    check_visit_counts(mcts, root, 200)
+
+
+def test_root_parallel_merges_worker_trees():
+    # Every move's statistics are the sum of what the workers' trees report for it,
+    # the same trees _grow_tree grows serially from the same seeds
+    for workers in (2, 3):
+        game = mid_game(workers)
+        with MCTS(exploration_weight=1.4, seed=workers) as mcts:
+            root = MCTSNode(game)
+            mcts.do_rollouts(root, 60, max_depth=5, workers=workers)
+            seeds = np.random.SeedSequence(workers).spawn(workers)
+            trees = [_grow_tree(root.state, 60, 5, mcts._worker_config(), seed) for seed in seeds]
+            for child in mcts.children[root]:
+                assert mcts.visits(child) == sum(tree[child.move][1] for tree in trees if child.move in tree)
+            assert mcts.visits(root) == sum(mcts.visits(child) for child in mcts.children[root]) > 0
+
+
+def test_root_parallel_with_collapsed_children():
+    # A lone 2 leaves room for two moves to spawn onto the same grid, so the root keeps
+    # a single child for both; the merge must not look up the move that was left out
+    grid = np.zeros((4, 4), dtype=int)
+    grid[1, 1] = 2
+    for seed in range(100):
+        rng.seed(seed)
+        root = MCTSNode(Game(grid=grid.copy()))
+        with MCTS(seed=15) as mcts:
+            mcts.do_rollouts(root, 20, max_depth=5, workers=2)
+        children = mcts.children[root]
+        assert mcts.visits(root) == sum(mcts.visits(child) for child in children)
+        if len(children) < len(root.untried_actions):
+            break
+    else:
+        raise AssertionError("no seed collapsed two children")
+
+
+def test_reroot_releases_old_ancestors():
+    mcts = MCTS(exploration_weight=1.4)
+    game = mid_game(5)
+    root = MCTSNode(game)
+    mcts.do_rollouts(root, 300, max_depth=7)
+    # The most visited expanded child, as if the real game had reached its position
+    child = max((node for node in mcts.children[root] if mcts.children.get(node)), key=mcts.visits)
+    visits = mcts.visits(child)
+    old_cells = root.state.cells
+
+    new_root = mcts.reroot(child.state.to_game())
+    # The stored node is reused with its statistics and children, detached from its parent
+    assert new_root is child and new_root.parent is None
+    assert mcts.visits(new_root) == visits and mcts.children[new_root]
+    held = {id(node) for node in mcts.children} | {id(c) for cs in mcts.children.values() for c in cs}
+    assert all(node.parent is None or id(node.parent) in held for node in mcts.children)
+
+    # Nothing holds the old root any more, so it is collected
+    del root, child, game
+    gc.collect()
+    assert not any(type(obj) is MCTSNode and obj.state.cells == old_cells for obj in gc.get_objects())
+
+
+def test_transposition_table_pools_playouts():
+    # Every visit of a position plays out again and the table keeps the running total,
+    # rather than the first playout standing in for the position from then on
+    table = TranspositionTable(12)
+    mcts = MCTS(exploration_weight=1.4, transposition_table=table)
+    node = MCTSNode(mid_game(3))
+    rng.seed(3)
+    results = [mcts._playout(node.game, 7) for _ in range(20)]
+    rng.seed(3)
+    rewards = [mcts._simulate(node, 7) for _ in range(20)]
+    assert table.probe(node.state.key, 7) == (sum(results), 20)
+    assert rewards[-1] == sum(results) / 20
+
+
+def test_symmetry_shares_statistics_between_transformed_positions():
+    game = mid_game(4)
+    transformed = [MCTSNode(Game(grid=grid)) for grid in (np.rot90(game.grid), np.fliplr(game.grid), game.grid.T)]
+    mcts = RecordingMCTS(exploration_weight=1.4, symmetry=Symmetry())
+    root = MCTSNode(game)
+    mcts.do_rollouts(root, 200, max_depth=5)
+    check_visit_counts(mcts, root, 200)
+    # The transformed positions were never searched, yet have the root's statistics
+    for node in transformed:
+        assert mcts.visits(node) == 200 and mcts.Q[mcts._key(node)] == mcts.Q[mcts._key(root)]
+    # and so do the transforms of its children
+    for child in mcts.children[root]:
+        rotated = MCTSNode(Game(grid=np.rot90(child.state.grid)))
+        assert mcts.visits(rotated) == mcts.visits(child) > 0
+    # Searching a transformed root adds to the same statistics
+    mcts.do_rollouts(transformed[0], 100, max_depth=5)
+    assert mcts.visits(root) == 300
+
+    plain = MCTS(exploration_weight=1.4)
+    plain.do_rollouts(root, 200, max_depth=5)
+    assert plain.visits(root) == 200 and all(plain.visits(node) == 0 for node in transformed)
+
+
+def test_open_loop_visit_counts():
+    mcts = MCTS(exploration_weight=1.4, open_loop=True)
+    game = mid_game(4)
+    root = MCTSNode(game)
+    mcts.do_rollouts(root, 300, max_depth=7)
+    assert mcts.visits(root) == 300
+    # Every rollout goes through exactly one first move
+    first_moves = {key[1][0]: n for key, n in mcts.N.items() if len(key[1]) == 1}
+    assert sum(first_moves.values()) == 300
+    assert set(first_moves) == set(root.untried_actions)
+    move = mcts.choose(root).move
+    assert first_moves[move] > 0
+
+    # Sequences that start with the played move carry over to the new root without it,
+    # the others are dropped
+    carried = {key[1][1:]: n for key, n in mcts.N.items() if key[1][:1] == (move,) and n}
+    game.play(move)
+    root = mcts.reroot(game, move)
+    assert mcts.visits(root) == first_moves[move] > 0
+    assert {key[1]: n for key, n in mcts.N.items() if n} == carried
+    assert all(key[0] == root.state.key for key in mcts.N)
+    # The search continues on the carried-over statistics
+    mcts.do_rollouts(root, 50, max_depth=7)
+    assert mcts.visits(root) == first_moves[move] + 50
+
+
+def check_array_tree(tree, root):
+    # Children point back to their parent and hold at most the visits of their parent.
+    for node in range(len(tree)):
+        children = tree.children(node)
+        assert all(tree.parent[child] == node for child in children)
+        assert tree.N[node] >= sum(tree.N[child] for child in children)
+
+
+def test_array_mcts_visit_counts_and_reroot():
+    tree = ArrayMCTS(exploration_weight=1.4, capacity=16, seed=0)
+    game = mid_game(3)
+    root = tree.add_root(game)
+    tree.do_rollouts(root, 500, max_depth=7)
+    assert tree.visits(root) == 500
+    check_array_tree(tree, root)
+
+    # Re-rooting at the board of a searched child keeps its statistics
+    child = tree.choose(root)
+    board = tree.board[child]
+    visits = tree.visits(child)
+    cells = [(int(board) >> (4 * i)) & 0xF for i in range(16)]
+    reached = Game(grid=np.where(np.array(cells) > 0, 1 << np.array(cells), 0).reshape(4, 4))
+    root = tree.reroot(root, tree.move[child], reached)
+    assert root == 0 and tree.visits(root) == visits
+    check_array_tree(tree, root)
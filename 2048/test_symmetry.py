@@ -0,0 +1,64 @@
+# test_symmetry.py
+import numpy as np
+
+from game_logic import Game
+from game_state import GameState
+from symmetry import Symmetry
+
+SYMMETRY = Symmetry()
+
+
+def random_grid(generator, size=4):
+    # Tiles from 2 to 4096 with about a third of the cells empty
+    exponents = generator.integers(1, 13, size=(size, size))
+    exponents[generator.random((size, size)) < 0.35] = 0
+    return np.where(exponents > 0, 2 ** exponents, 0)
+
+
+def transforms(grid):
+    # The 8 rotations and reflections in the order of Symmetry.permutations, by NumPy
+    return [np.fliplr(np.rot90(grid, turns)) if flip else np.rot90(grid, turns)
+            for flip in (False, True) for turns in range(4)]
+
+
+def cells(grid):
+    return GameState.from_game(Game(grid=grid)).cells
+
+
+def test_transforms_match_numpy():
+    generator = np.random.default_rng(0)
+    for size in (3, 4, 5):
+        symmetry = Symmetry(size)
+        grid = random_grid(generator, size)
+        for t, transformed in enumerate(transforms(grid)):
+            assert symmetry.transform(cells(grid), t) == cells(transformed)
+
+
+def test_canonical_form_is_shared_by_all_transforms():
+    generator = np.random.default_rng(1)
+    for _ in range(50):
+        grid = random_grid(generator)
+        canonical, t = SYMMETRY.canonical(cells(grid))
+        assert SYMMETRY.transform(cells(grid), t) == canonical
+        assert canonical == min(cells(transformed) for transformed in transforms(grid))
+        key = SYMMETRY.canonical_key(GameState.from_game(Game(grid=grid)))
+        for transformed in transforms(grid):
+            assert SYMMETRY.canonical(cells(transformed))[0] == canonical
+            assert SYMMETRY.canonical_key(GameState.from_game(Game(grid=transformed))) == key
+
+
+def test_moves_map_between_frames():
+    generator = np.random.default_rng(2)
+    for _ in range(20):
+        grid = random_grid(generator)
+        for t, transformed in enumerate(transforms(grid)):
+            for direction in range(4):
+                mapped = SYMMETRY.to_canonical_move(direction, t)
+                assert SYMMETRY.from_canonical_move(mapped, t) == direction
+                # A move on the grid and the mapped move on the transformed grid reach
+                # afterstates that are the same transform of each other
+                afterstate, changed, score = Game(grid=grid).preview(direction)
+                expected = Game(grid=transformed).preview(mapped)
+                assert np.array_equal(transforms(afterstate)[t], expected[0])
+                assert (changed, score) == expected[1:]
+            assert sorted(SYMMETRY.to_canonical_move(direction, t) for direction in range(4)) == [0, 1, 2, 3]
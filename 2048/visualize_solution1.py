@@ -17,12 +17,16 @@ def main():
 
     # Adjust the game loop
     while not game.game_over:
-        mcts.do_rollouts(root_node, n_rollouts=32, max_depth=7)  # Perform 100 rollouts to depth 5-10
-        root_node = mcts.choose(root_node)  # Choose the best move based on the rollouts
-        game.play(root_node.move)
+        # Rollouts carried over from earlier moves count towards the 32 per move
+        mcts.do_rollouts(root_node, n_rollouts=max(1, 32 - mcts.visits(root_node)), max_depth=7)
+        move = mcts.choose(root_node).move  # Choose the best move based on the rollouts
+        game.play(move)
         game_ui.update_grid_cells()
         time.sleep(0)  # Sleep time for visualization
 
+        # Continue from the board the game actually reached, keeping its part of the tree
+        root_node = mcts.reroot(game, move)
+
         if not root_node.untried_actions:
             print("No moves left, game over")
             break
@@ -0,0 +1,40 @@
+# zobrist.py
+import numpy as np
+
+# Zobrist hashing: every (cell, tile exponent) pair gets a fixed random 64-bit key
+# and a grid hashes to the XOR of the keys of its cells. A move only changes a few
+# cells, so the hash is updated by XOR-ing out their old keys and XOR-ing in the new
+# ones instead of rehashing the whole grid. Boards up to 8x8 with tiles up to 2**31
+# are covered; the seed is fixed so keys are identical in every process.
+MAX_CELLS = 64
+MAX_EXPONENT = 32
+ZOBRIST_KEYS = np.random.default_rng(2048).integers(
+    0, np.iinfo(np.uint64).max, size=(MAX_CELLS, MAX_EXPONENT), dtype=np.uint64, endpoint=True)
+
+
+def exponents(values):
+    """Converts tile values (0, 2, 4, ...) to exponents (0, 1, 2, ...)."""
+    values = np.asarray(values)
+    result = np.zeros(values.shape, dtype=np.intp)
+    filled = values > 0
+    result[filled] = np.log2(values[filled]).astype(np.intp)
+    return result
+
+
+def hash_exponents(cell_exponents):
+    """Full Zobrist hash of a flat sequence of cell exponents."""
+    cell_exponents = np.asarray(cell_exponents, dtype=np.intp).ravel()
+    return int(np.bitwise_xor.reduce(ZOBRIST_KEYS[np.arange(cell_exponents.size), cell_exponents]))
+
+
+def hash_grid(grid):
+    """Full Zobrist hash of a grid of tile values."""
+    return hash_exponents(exponents(grid))
+
+
+def update_hash(key, cells, old_values, new_values):
+    """Incrementally updates a hash for the flat `cells` that changed from `old_values` to `new_values`."""
+    if not len(cells):
+        return key
+    changes = ZOBRIST_KEYS[cells, exponents(old_values)] ^ ZOBRIST_KEYS[cells, exponents(new_values)]
+    return key ^ int(np.bitwise_xor.reduce(changes))
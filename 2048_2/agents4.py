@@ -1,15 +1,10 @@
 # agents.py
-import numpy as np
-import random
 import time
-from itertools import groupby
-from operator import itemgetter
-from collections import namedtuple
-# deepcopy is used to create a copy of the board
-from copy import deepcopy
 
 # import custom modules
+import rng
 from game_logic import Board, Action
+from rollout_search import RolloutSearch
 
 
 class Agent:
@@ -39,19 +34,9 @@ class RandomAgent(Agent):
         Returns:
             An action representing the move (up, down, left, right).
         """
-        return random.choice(game_state.get_available_moves())
-
-MoveEvaluation = namedtuple('MoveEvaluation', 'move empty_tiles high_value_tiles')
-
-class MCTSAgent:
-    def __init__(self, time_limit: float, max_depth: int = np.inf):
-        self.base_time_limit = time_limit / 1000  # Convert milliseconds to seconds
-        self.temporary_time_limit = self.base_time_limit  # Initialize temporary time limit
-        self.previous_max_empty_tiles = np.inf
-        self.max_depth = max_depth
-        self.temporary_depth_limit = max_depth
-        self.last_move_stats = {}
+        return rng.choice(game_state.get_available_moves())
 
+class MCTSAgent(RolloutSearch):
     def adjust_temporary_time_limit(self):
         """Adjust the temporary time limit based on the number of previous max empty tiles."""
         if self.previous_max_empty_tiles >= 4:
@@ -65,82 +50,32 @@ class MCTSAgent:
             self.temporary_depth_limit = int(self.max_depth + (empty_tiles_factor) * 1.8)
             print(f"Adjusted time limit: {self.temporary_time_limit:.2f} s | Adjusted depth limit: {self.temporary_depth_limit}")
 
-    def select_move(self, game_state: Board):
-        start_time = time.time()
-        self.adjust_temporary_time_limit()  # Adjust the time limit before starting
-        moves = game_state.get_available_moves()
-        rollouts_data = []
-
-        while time.time() - start_time < self.temporary_time_limit:
-            move = random.choice(moves)
-            empty_tiles, high_value_tiles = self.random_playout(game_state, move)
-            if empty_tiles != -np.inf:
-                rollouts_data.append(MoveEvaluation(move, empty_tiles, high_value_tiles))
-
-        best_move = self.evaluate(rollouts_data) if rollouts_data else None
-        self.calculate_last_move_stats(rollouts_data, start_time)
-
-        # Update previous_max_empty_tiles for the next move
-        # based on number of empty tiles in the current move
-        # count np zeros in baord
-        self.previous_max_empty_tiles = np.count_nonzero(game_state.board == 0)
-
-        return best_move
-
-    def random_playout(self, game_state: Board, move):
-        board_copy = deepcopy(game_state)
-        board_copy.move(move)
-        if np.array_equal(board_copy.board, game_state.board):
-            return -np.inf, np.inf
-
-        for _ in range(self.temporary_depth_limit):
-            if board_copy.is_game_over():
-                break
-            random_move = random.choice(board_copy.get_available_moves())
-            board_copy.move(random_move)
-
-        empty_tiles = np.count_nonzero(board_copy.board == 0)
-        high_value_tiles = np.count_nonzero(~np.isin(board_copy.board, [0, 2, 4]))
-        return empty_tiles, high_value_tiles
-
-
-    def evaluate(self, rollouts_data):
+    def evaluate(self, stats):
         """
         Evaluate moves based on the average number of empty tiles each move produces.
         Choose the move with the highest average of empty tiles.
         """
-        # Calculate the average number of empty tiles per move
-        move_averages = {}
-        for move in set(data.move for data in rollouts_data):
-            move_data = [data.empty_tiles for data in rollouts_data if data.move == move]
-
-            if self.previous_max_empty_tiles >= 3:
-                percentile = 0.25
-            else:
-                percentile = 0.75
-
-            if move_data:
-                move_data.sort(reverse=True)
-                top_20_percent_index = max(1, int(len(move_data) * percentile))  # Ensure at least one element is considered
-                top_20_percent_data = move_data[:top_20_percent_index]
-                move_averages[move] = np.mean(top_20_percent_data)
-            else:
-                move_averages[move] = 0
+        if self.previous_max_empty_tiles >= 3:
+            percentile = 0.25
+        else:
+            percentile = 0.75
+
+        # Average of the top rollouts of each move (at least one is considered)
+        move_averages = {move: stats.top_fraction_mean(move, percentile) for move in stats.moves()}
 
         # Select the move with the highest average of empty tiles
         best_move = max(move_averages, key=move_averages.get)
         return best_move
 
-    def calculate_last_move_stats(self, rollouts_data, start_time):
-        num_rollouts = len(rollouts_data)
-        total_empty_tiles = sum(data.empty_tiles for data in rollouts_data)
-        average_empty_tiles = total_empty_tiles / num_rollouts if num_rollouts else 0
+    def calculate_last_move_stats(self, stats, start_time):
+        num_rollouts = stats.num_rollouts()
+        average_empty_tiles = stats.mean()
         # This value is no longer needed for the decision-making process
-        # max_empty_tiles = max(rollouts_data, key=lambda x: x.empty_tiles).empty_tiles if rollouts_data else 0
+        # max_empty_tiles = stats.max()
 
         self.last_move_stats = {
             'time_taken': time.time() - start_time,
             'num_rollouts': num_rollouts,
             'average_empty_tiles': average_empty_tiles,
             # 'max_empty_tiles': max_empty_tiles,  # This line can be commented out or removed
-        }
\ No newline at end of file
+        }
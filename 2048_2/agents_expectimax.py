@@ -0,0 +1,145 @@
+# agents_expectimax.py
+import time
+
+from game_logic import Board, Action
+from agents import Agent
+from bitboard import BitBoard, move_bits, legal_mask_bits, canonical_bits, count_empty
+from heuristics import Heuristic
+from transposition import TranspositionTable
+from search_controller import SearchController
+from time_manager import TimeManager
+
+# Offset that keeps every live board above a lost one, which is worth 0
+LOST_PENALTY = 400000.0
+
+
+class ExpectimaxAgent(Agent):
+    """Expectimax search over the packed bitboard.
+
+    Move nodes take the best of the legal moves; chance nodes average over every
+    empty cell receiving a 2 (probability 0.9) or a 4 (probability 0.1). Branches
+    whose cumulative probability falls below `probability_cutoff` are scored by the
+    heuristic instead of being searched further, and chance node values are cached
+    in a transposition table keyed by the canonical (symmetry-reduced) board.
+
+    With a time limit the depth is not fixed: a SearchController deepens the search
+    until the deadline and the move of the deepest completed iteration is played.
+    """
+
+    def __init__(self, max_depth: int = 3, probability_cutoff: float = 1e-4, table_size_log2: int = 18,
+                 time_limit: float = None, heuristic: Heuristic = None, time_manager: TimeManager = None,
+                 table_policy: str = 'depth'):
+        """
+        Args:
+            max_depth (int): Upper bound on the number of moves searched ahead. The
+                depth actually used shrinks on boards with few distinct tiles.
+            probability_cutoff (float): Cumulative spawn probability below which a
+                branch is no longer expanded.
+            table_size_log2 (int): Log2 of the number of transposition table buckets.
+            time_limit (float): Optional per-move deadline in milliseconds. When set,
+                the search deepens iteratively up to max_depth until the deadline.
+            heuristic (Heuristic): Leaf evaluation. Defaults to the DEFAULT_WEIGHTS
+                features offset by LOST_PENALTY.
+            time_manager (TimeManager): Optional per-position time allocation; it
+                replaces time_limit and the search deepens iteratively.
+            table_policy (str): Replacement policy of the transposition table, one of
+                TranspositionTable.POLICIES.
+        """
+        self.max_depth = max_depth
+        self.probability_cutoff = probability_cutoff
+        self.table = TranspositionTable(table_size_log2, table_policy)
+        self.time_limit = time_limit / 1000 if time_limit is not None else None  # Convert milliseconds to seconds
+        self.heuristic = heuristic if heuristic is not None else Heuristic(bias=LOST_PENALTY)
+        self.time_manager = time_manager
+        self.controller = None
+        self.last_move_stats = {}
+        self.nodes = 0
+
+    def select_move(self, game_state: Board):
+        """Selects the move with the highest expected heuristic value.
+
+        Args:
+            game_state (Board): The current state of the game, a Board or a BitBoard.
+
+        Returns:
+            The best action, or None if no move is legal.
+        """
+        start_time = time.perf_counter()
+        bits = game_state.bits if isinstance(game_state, BitBoard) else BitBoard.from_board(game_state).bits
+        self.nodes = 0
+        # Cached chance nodes stay valid across moves (the table is bounded and depth-tagged),
+        # so only the counters behind cache_hit_rate start over
+        self.table.reset_stats()
+        time_limit = self.time_manager.allocate(game_state) if self.time_manager is not None else self.time_limit
+
+        if time_limit is None:
+            depth = self.search_depth(bits)
+            values = self.search_root(bits, depth)
+        else:
+            # Shallower iterations stay in the table, so each one starts from cached chance nodes
+            self.controller = SearchController(time_limit)
+            _, values = self.controller.iterative_deepening(
+                lambda depth, move_order: self.search_root(bits, depth, move_order), self.max_depth)
+            depth = self.controller.report['completed_depth']
+            self.controller = None
+
+        best_move = max(values, key=values.get) if values else None
+        table_stats = self.table.stats()
+        self.last_move_stats = {
+            'time_taken': time.perf_counter() - start_time,
+            'depth': depth,
+            'nodes': self.nodes,
+            'expected_value': round(values[best_move], 1) if values else 0,
+            'cache_hit_rate': round(table_stats['hit_rate'], 3),
+        }
+        if self.time_manager is not None:
+            # One empty cell's worth of heuristic separates a clear decision from a close one
+            self.time_manager.record(values, scale=abs(self.heuristic.weights['empty']) or 1.0)
+            self.last_move_stats['time_allocated'] = time_limit
+        return best_move
+
+    def search_root(self, bits, depth, move_order=None):
+        """Returns the expected value of every legal move searched to `depth` moves."""
+        legal = legal_mask_bits(bits)
+        move_order = move_order or (Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT)
+        return {action: self._chance_node(move_bits(bits, action), depth - 1, 1.0)
+                for action in move_order if legal[action]}
+
+    def search_depth(self, bits):
+        # Boards with many distinct tiles are the ones that need a deep look ahead
+        distinct_tiles = len({(bits >> (4 * i)) & 0xF for i in range(16)} - {0})
+        return max(2, min(self.max_depth, distinct_tiles - 2))
+
+    def _chance_node(self, bits, depth, probability):
+        if depth <= 0 or probability < self.probability_cutoff:
+            return self.heuristic.score(bits)
+
+        key, _ = canonical_bits(bits)
+        cached = self.table.probe(key, depth)
+        if cached is not None:
+            return cached
+
+        self.nodes += 1
+        empty = count_empty(bits)
+        probability /= empty
+        total = 0.0
+        for index in range(16):
+            if (bits >> (4 * index)) & 0xF:
+                continue
+            total += 0.9 * self._max_node(bits | (1 << (4 * index)), depth, probability * 0.9)
+            total += 0.1 * self._max_node(bits | (2 << (4 * index)), depth, probability * 0.1)
+        value = total / empty
+
+        self.table.store(key, value, depth)
+        return value
+
+    def _max_node(self, bits, depth, probability):
+        self.nodes += 1
+        if self.controller is not None:
+            self.controller.check()
+        best_value = 0.0  # A lost board is worth nothing
+        legal = legal_mask_bits(bits)
+        for action in range(4):
+            if legal[action]:
+                best_value = max(best_value, self._chance_node(move_bits(bits, action), depth - 1, probability))
+        return best_value
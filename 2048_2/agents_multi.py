@@ -1,15 +1,17 @@
-# agents.py
-# agents.py
+# agents_multi.py
 import numpy as np
-import random
+import os
 import time
-from multiprocessing import Pool
-from collections import namedtuple, defaultdict
-from copy import deepcopy
-from functools import partial
+import weakref
+from multiprocessing import Pool, shared_memory
 
 # Assuming game_logic.py and other necessary modules are in the same directory
+import rng
 from game_logic import Board, Action
+from bitboard import BitBoard, pack, unpack
+from time_manager import TimeManager
+from rollout_stats import RolloutStats, TILE_BINS
+from rollout_search import RolloutSearch
 
 
 class Agent:
@@ -39,19 +41,116 @@ class RandomAgent(Agent):
         Returns:
             An action representing the move (up, down, left, right).
         """
-        return random.choice(game_state.get_available_moves())
-
-MoveEvaluation = namedtuple('MoveEvaluation', 'move empty_tiles high_value_tiles')
-
-class MCTSAgent:
-    def __init__(self, time_limit: int, max_depth: int = np.inf, num_processes: int = None):
-        self.base_time_limit = time_limit / 1000  # Convert milliseconds to seconds
-        self.temporary_time_limit = self.base_time_limit  # Initialize temporary time limit
-        self.previous_max_empty_tiles = np.inf
-        self.max_depth = max_depth
-        self.temporary_depth_limit = max_depth
-        self.last_move_stats = {}
-        self.num_processes = num_processes
+        return rng.choice(game_state.get_available_moves())
+
+# Per-process state of a pool worker, set up once by _init_worker
+_worker_agent = None
+_worker_memory = None
+
+
+def _shared_arrays(buffer, num_tasks):
+    """Views of the shared block: the root board, the (deadline, depth) limits and the histograms.
+
+    histograms[task] holds the RolloutStats counts of `task`: [move, empty_tiles,
+    high_value_tiles] counts its rollouts that started with `move` and ended that way.
+    """
+    board = np.ndarray((1,), dtype=np.uint64, buffer=buffer, offset=0)
+    limits = np.ndarray((2,), dtype=np.float64, buffer=buffer, offset=8)
+    histograms = np.ndarray((num_tasks, 4, TILE_BINS, TILE_BINS), dtype=np.int64, buffer=buffer, offset=24)
+    return board, limits, histograms
+
+
+def _shared_size(num_tasks):
+    return 24 + num_tasks * 4 * TILE_BINS * TILE_BINS * 8
+
+
+def _release(pool, memory):
+    """Stops a worker pool and unlinks its shared block.
+
+    Runs once per pool, from close or, through weakref.finalize, when the agent is
+    collected or the interpreter exits without close, so no block is left in /dev/shm.
+    """
+    pool.terminate()
+    pool.join()
+    try:
+        memory.close()
+    except BufferError:
+        # Views of the block are still alive; unlinking below frees it once they go
+        pass
+    memory.unlink()
+
+
+def _init_worker(config, memory_name, num_tasks):
+    """Pool initializer: builds the worker's agent and attaches the shared block once."""
+    global _worker_agent, _worker_memory
+    _worker_agent = MCTSAgent(**config)
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+    _worker_agent.board, _worker_agent.limits, _worker_agent.histograms = _shared_arrays(
+        _worker_memory.buf, num_tasks)
+
+
+def _playout_task(task):
+    """Runs rollouts from the shared root board into histogram row `task`.
+
+    Every task comes with its own child SeedSequence of the parent's stream, so the
+    rollouts of a task do not depend on which worker process runs it.
+    """
+    task, seed = task
+    rng.seed(seed)
+    agent = _worker_agent
+    bits = int(agent.board[0])
+    deadline, depth_limit = agent.limits
+    agent.temporary_depth_limit = int(depth_limit) if np.isfinite(depth_limit) else depth_limit
+    # Built straight from the shared board, so no tile is spawned from the task's stream
+    game_state = BitBoard(bits) if agent.use_bitboard else Board(grid=unpack(bits))
+    agent.random_playout_worker(game_state, game_state.get_available_moves(), deadline,
+                                RolloutStats(agent.histograms[task]))
+
+
+class MCTSAgent(RolloutSearch):
+    def __init__(self, time_limit: int, max_depth: int = np.inf, num_processes: int = None,
+                 use_bitboard: bool = False, time_manager: TimeManager = None):
+        super().__init__(time_limit, max_depth, use_bitboard=use_bitboard, time_manager=time_manager)
+        self.num_processes = num_processes or os.cpu_count()
+        self.config = {'time_limit': time_limit, 'max_depth': max_depth, 'use_bitboard': use_bitboard}
+        self._pool = None
+        self._memory = None
+        self._finalizer = None
+
+    @property
+    def pool(self):
+        """The worker pool, started on first use and kept for the agent's lifetime.
+
+        The pool shares one block of memory with the agent: the root board and limits
+        are written there before every move and the workers count their rollouts in
+        per-task histograms, so the traffic per move does not depend on the rollouts.
+        """
+        if self._pool is None:
+            self._memory = shared_memory.SharedMemory(create=True, size=_shared_size(self.num_processes))
+            self.board, self.limits, self.histograms = _shared_arrays(self._memory.buf, self.num_processes)
+            self._pool = Pool(self.num_processes, initializer=_init_worker,
+                              initargs=(self.config, self._memory.name, self.num_processes))
+            # Frees the pool and the block even if close is never called; holds no reference to self
+            self._finalizer = weakref.finalize(self, _release, self._pool, self._memory)
+        return self._pool
+
+    def close(self):
+        """Shuts the worker pool down and frees the shared block; a later select_move starts a new one."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            # The views must go before the block can be released
+            self.board = self.limits = self.histograms = None
+            self._finalizer()
+            self._memory = self._finalizer = None
+
+    def __enter__(self):
+        self.pool  # Start the workers before the first move rather than during it
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def adjust_temporary_time_limit(self):
         """Adjust the temporary time limit based on the number of previous max empty tiles."""
@@ -68,92 +167,56 @@ class MCTSAgent:
 
     def select_move(self, game_state: Board):
         start_time = time.time()
-        self.adjust_temporary_time_limit()
+        if self.use_bitboard:
+            game_state = BitBoard.from_board(game_state)
+        self.start_move(game_state)
         moves = game_state.get_available_moves()
 
-        # Using multiprocessing Pool
-        with Pool(self.num_processes) as pool:
-            # We pass the entire game state and all available moves to each worker
-            # Each worker will then perform random playouts for different moves until the time limit is reached
-            rollouts_data = pool.starmap_async(self.random_playout_worker,
-                                               [(deepcopy(game_state), moves, self.temporary_time_limit) for _ in
-                                                moves]).get()
-
-        # Flattening the list of lists into a single list
-        rollouts_data = [item for sublist in rollouts_data for item in sublist]
-
-        # Filter out invalid moves
-        rollouts_data = [data for data in rollouts_data if data.empty_tiles != -np.inf]
-
-        best_move = self.evaluate(rollouts_data) if rollouts_data else None
-        self.calculate_last_move_stats(rollouts_data, start_time)
-
-        # Update previous_max_empty_tiles for the next move
-        self.previous_max_empty_tiles = np.count_nonzero(game_state.board == 0)
-
+        # The root board goes out through shared memory; tasks only carry their histogram row
+        pool = self.pool
+        self.board[0] = game_state.bits if isinstance(game_state, BitBoard) else pack(game_state.board)
+        # The deadline counts from the start of the move, so a pool started by this move
+        # spends part of the move's time instead of adding to it
+        self.limits[:] = start_time + self.temporary_time_limit, self.temporary_depth_limit
+        self.histograms[:] = 0
+        seeds = rng.default_stream().seed_sequence.spawn(self.num_processes)
+        pool.map(_playout_task, zip(range(self.num_processes), seeds))
+
+        # Summed over the tasks, read straight from the shared block
+        stats = RolloutStats(self.histograms.sum(axis=0))
+        best_move = self.evaluate(stats) if stats.num_rollouts() else None
+        self.finish_move(game_state, stats, start_time)
         return best_move
 
-    def random_playout_worker(self, game_state, moves, time_limit):
-        end_time = time.time() + time_limit
-        rollouts_data = []
+    def random_playout_worker(self, game_state, moves, deadline, stats):
+        """Plays random rollouts until the time.time() deadline, counting them in a RolloutStats.
 
-        while time.time() < end_time:
-            move = random.choice(moves)
-            _, empty_tiles, high_value_tiles = self.random_playout(game_state, move)
+        The first rollout is played even past the deadline, so a move whose time went
+        to starting the pool still has a statistic to choose from.
+        """
+        while True:
+            move = rng.choice(moves)
+            empty_tiles, high_value_tiles = self.random_playout(game_state, move)
             if empty_tiles != -np.inf:
-                rollouts_data.append(MoveEvaluation(move, empty_tiles, high_value_tiles))
-
-        return rollouts_data
-
-    def random_playout(self, game_state: Board, move):
-        board_copy = deepcopy(game_state)
-        board_copy.move(move)
-        if np.array_equal(board_copy.board, game_state.board):
-            return move, -np.inf, np.inf
-
-        # Correctly checking the copied board's state for the game-over condition
-        for _ in range(self.temporary_depth_limit):
-            if board_copy.is_game_over():
+                stats.add(move, empty_tiles, high_value_tiles)
+            if time.time() >= deadline:
                 break
-            random_move = random.choice(board_copy.get_available_moves())
-            board_copy.move(random_move)
 
-        empty_tiles = np.count_nonzero(board_copy.board == 0)
-        high_value_tiles = np.count_nonzero(~np.isin(board_copy.board, [0, 2, 4]))
-        return move, empty_tiles, high_value_tiles
-
-    def evaluate(self, rollouts_data):
-        aggregated_rollouts = defaultdict(list)
-        for move, empty_tiles, high_value_tiles in rollouts_data:
-            if empty_tiles != -np.inf:
-                aggregated_rollouts[move].append(empty_tiles)
-
-        print(aggregated_rollouts)
+    def evaluate(self, stats):
+        """Picks the move with the highest 75th percentile of empty tiles after its rollouts."""
         best_move = None
         best_score = -np.inf
-        for move, scores in aggregated_rollouts.items():
-            if scores:
-                percentile_value = np.percentile(scores, 75)
-                if percentile_value > best_score:
-                    best_score = percentile_value
-                    best_move = move
+        for move in stats.moves():
+            percentile_value = stats.percentile(move, 75)
+            if percentile_value > best_score:
+                best_score = percentile_value
+                best_move = move
 
         return best_move
 
-    def calculate_last_move_stats(self, rollouts_data, start_time):
-        move_count = defaultdict(int)
-        total_empty_tiles = defaultdict(int)
-
-        for move, empty_tiles, _ in rollouts_data:
-            if empty_tiles != -np.inf:
-                move_count[move] += 1
-                total_empty_tiles[move] += empty_tiles
-
+    def calculate_last_move_stats(self, stats, start_time):
         self.last_move_stats = {
             'time_taken': time.time() - start_time,
-            'num_rollouts': sum(move_count.values()),
-            'average_empty_tiles': {
-                move: (total_empty_tiles[move] / count if count else 0)
-                for move, count in move_count.items()
-            },
-        }
\ No newline at end of file
+            'num_rollouts': stats.num_rollouts(),
+            'average_empty_tiles': {move: stats.mean(move) for move in stats.moves()},
+        }
@@ -0,0 +1,151 @@
+# batch_board.py
+import numpy as np
+
+from game_logic import Action
+from rng import default_stream
+from bitboard import ROW_LEFT, ROW_RIGHT, ROW_SCORE
+
+
+def _unpack_rows(table):
+    rows = np.array(table, dtype=np.uint32)
+    return np.stack([(rows >> (4 * i)) & 0xF for i in range(4)], axis=1).astype(np.uint8)
+
+
+# The bitboard row tables, unpacked to one exponent per cell so they can be
+# indexed with whole arrays of row words at once.
+LEFT_ROWS = _unpack_rows(ROW_LEFT)
+RIGHT_ROWS = _unpack_rows(ROW_RIGHT)
+ROW_SCORES = np.array(ROW_SCORE, dtype=np.int64)
+LEFT_CHANGED = np.array(ROW_LEFT) != np.arange(65536)
+RIGHT_CHANGED = np.array(ROW_RIGHT) != np.arange(65536)
+ROW_SHIFTS = np.array([0, 4, 8, 12], dtype=np.uint32)
+
+
+def row_words(cells):
+    """Packs the last axis of an exponent array into 16-bit row words."""
+    return (cells.astype(np.uint32) << ROW_SHIFTS).sum(axis=-1)
+
+
+class BatchBoard:
+    """N independent 2048 boards that are stepped together with vectorized NumPy calls.
+
+    The grids are stored as an (N, 4, 4) uint8 array of tile exponents (0 = empty,
+    1 = 2, ..., 15 = 32768) and every call processes the whole batch, so the Python
+    overhead is paid once per batch instead of once per board. Actions use the
+    Board numbering: 0 slides left, 1 towards the top row, 2 right, 3 towards the
+    bottom row. merge_score accumulates the values of the merged tiles; it is not
+    the tile sum that Board.score and BitBoard.score return.
+    """
+
+    def __init__(self, n, rng=None, cells=None):
+        self.n = n
+        self.rng = rng if rng is not None else default_stream().generator
+        if cells is None:
+            self.reset()
+        else:
+            self.cells = np.asarray(cells, dtype=np.uint8).reshape(n, 4, 4)
+            self.merge_score = np.zeros(n, dtype=np.int64)
+
+    @classmethod
+    def from_boards(cls, boards, rng=None):
+        """Builds a batch from a sequence of Board (or BitBoard) objects."""
+        values = np.stack([np.asarray(board.board) for board in boards])
+        cells = np.zeros(values.shape, dtype=np.uint8)
+        nonzero = values > 0
+        cells[nonzero] = np.log2(values[nonzero]).astype(np.uint8)
+        return cls(len(boards), rng=rng, cells=cells)
+
+    def reset(self):
+        self.cells = np.zeros((self.n, 4, 4), dtype=np.uint8)
+        self.merge_score = np.zeros(self.n, dtype=np.int64)
+        self.spawn()
+
+    @property
+    def values(self):
+        """Tile values of every board as an (N, 4, 4) int64 array."""
+        return np.where(self.cells > 0, np.left_shift(1, self.cells, dtype=np.int64), 0)
+
+    def slide(self, actions, cells=None):
+        """Slides every board in its own direction without spawning tiles.
+
+        Args:
+            actions: Array of N actions, one per board.
+            cells: Optional (N, 4, 4) exponent array to slide instead of the batch.
+
+        Returns:
+            Tuple of the slid (N, 4, 4) exponents, a boolean array telling which
+            boards changed and the merge score gained by each board.
+        """
+        cells = self.cells if cells is None else cells
+        actions = np.asarray(actions)
+        new_cells = cells.copy()
+        score_delta = np.zeros(len(cells), dtype=np.int64)
+        for action, table in ((Action.LEFT, LEFT_ROWS), (Action.RIGHT, RIGHT_ROWS),
+                              (Action.DOWN, LEFT_ROWS), (Action.UP, RIGHT_ROWS)):
+            selected = np.flatnonzero(actions == action)
+            if not len(selected):
+                continue
+            vertical = action in (Action.DOWN, Action.UP)
+            grids = cells[selected]
+            if vertical:
+                grids = grids.transpose(0, 2, 1)
+            words = row_words(grids)
+            slid = table[words]
+            new_cells[selected] = slid.transpose(0, 2, 1) if vertical else slid
+            score_delta[selected] = ROW_SCORES[words].sum(axis=1)
+        changed = (new_cells != cells).any(axis=(1, 2))
+        return new_cells, changed, score_delta
+
+    def legal_mask(self, cells=None):
+        """Returns an (N, 4) boolean array of the legal actions of every board."""
+        cells = self.cells if cells is None else cells
+        rows = row_words(cells)
+        columns = row_words(cells.transpose(0, 2, 1))
+        mask = np.empty((len(cells), 4), dtype=bool)
+        mask[:, Action.LEFT] = LEFT_CHANGED[rows].any(axis=1)
+        mask[:, Action.RIGHT] = RIGHT_CHANGED[rows].any(axis=1)
+        mask[:, Action.DOWN] = LEFT_CHANGED[columns].any(axis=1)
+        mask[:, Action.UP] = RIGHT_CHANGED[columns].any(axis=1)
+        return mask
+
+    def spawn(self, mask=None):
+        """Places a 2 (90%) or a 4 (10%) on a random empty cell of the selected boards.
+
+        All random numbers for the batch come from a single RNG draw.
+
+        Args:
+            mask: Optional boolean array selecting the boards that get a tile.
+        """
+        flat = self.cells.reshape(self.n, 16)
+        empty = flat == 0
+        counts = empty.sum(axis=1)
+        draws = self.rng.random((self.n, 2))
+        targets = (draws[:, 0] * counts).astype(np.int64)
+        positions = (np.cumsum(empty, axis=1) > targets[:, None]).argmax(axis=1)
+        exponents = np.where(draws[:, 1] < 0.1, 2, 1).astype(np.uint8)
+        selected = counts > 0
+        if mask is not None:
+            selected &= mask
+        rows = np.flatnonzero(selected)
+        flat[rows, positions[rows]] = exponents[rows]
+
+    def step(self, actions):
+        """Applies one action per board, spawning a tile on every board that changed.
+
+        Args:
+            actions: Array of N actions, one per board.
+
+        Returns:
+            Tuple of the per-board changed flags, merge score deltas and the
+            (N, 4) legal-move mask of the resulting boards.
+        """
+        self.cells, changed, score_delta = self.slide(actions)
+        self.spawn(changed)
+        self.merge_score += score_delta
+        return changed, score_delta, self.legal_mask()
+
+    def is_game_over(self):
+        return ~self.legal_mask().any(axis=1)
+
+    def __len__(self):
+        return self.n
@@ -0,0 +1,251 @@
+# benchmarks.py
+"""Throughput benchmarks of the 2048_2 boards and agents.
+
+Measures moves per second of Board and BitBoard on several board sizes, legal
+move generation, rollouts per second of every MCTSAgent on the time-limited
+(Python) and the fixed-count (NumPy engine) paths, expectimax nodes per
+second, the time racing saves agents3 at what cost in move quality, and the
+mean score of whole games with and without racing. Every result is one record
+with a metric, a unit and whether higher is better; run_benchmarks.py at the
+repository root runs the suite and compares the records with a stored baseline.
+
+Example:
+    python run_benchmarks.py --suite 2048_2 --table
+"""
+import contextlib
+import io
+from copy import copy
+
+import rng
+from game_logic import Board
+from bitboard import BitBoard
+from run_benchmarks import MIN_TIME, REPEAT, rate, record
+
+SEED = 0
+# Board sizes for the move benchmarks; the agents and BitBoard only play 4x4
+BOARD_SIZES = (3, 4, 5, 6)
+# Random moves played from the start to reach each benchmark position
+STAGES = {'early': 10, 'mid': 60}
+AGENT_MODULES = ('agents', 'agents2', 'agents3', 'agents4', 'agents_multi')
+# Rollouts per move of the reference search that the racing benchmark measures regret against
+REFERENCE_ROLLOUTS = 2048
+
+
+def position(moves, size=4):
+    """A Board after up to `moves` random legal moves from a seeded start."""
+    rng.seed(SEED)
+    board = Board(size)
+    for _ in range(moves):
+        available = board.get_available_moves()
+        if not available:
+            break
+        board.move(rng.choice(available))
+    return board
+
+
+def bench_moves(quick):
+    """Moves per second of random play, restarting whenever a game ends."""
+    min_time = MIN_TIME[quick]
+    results = []
+    boards = [('Board', size, lambda size=size: Board(size)) for size in BOARD_SIZES]
+    boards.append(('BitBoard', 4, lambda: BitBoard.from_board(Board())))
+    for name, size, new_board in boards:
+        rng.seed(SEED)
+        state = {'board': new_board()}
+
+        def step():
+            board = state['board']
+            board.move(rng.randrange(4))
+            if board.is_board_full() and board.is_game_over():
+                state['board'] = new_board()
+
+        results.append(record(f'{name}.move', {'size': size}, 'moves_per_sec', rate(step, min_time), 'moves/s'))
+    return results
+
+
+def bench_legal_moves(quick):
+    min_time = MIN_TIME[quick]
+    results = []
+    for stage, moves in STAGES.items():
+        for size in BOARD_SIZES:
+            board = position(moves, size)
+            results.append(record('Board.get_available_moves', {'size': size, 'stage': stage}, 'calls_per_sec',
+                                  rate(board.get_available_moves, min_time), 'calls/s'))
+        bitboard = BitBoard.from_board(position(moves))
+        results.append(record('BitBoard.get_available_moves', {'size': 4, 'stage': stage}, 'calls_per_sec',
+                              rate(bitboard.get_available_moves, min_time), 'calls/s'))
+    return results
+
+
+def _rollouts_per_sec(agent, board):
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent.select_move(copy(board))
+    stats = agent.last_move_stats
+    return stats['num_rollouts'] / stats['time_taken']
+
+
+def bench_agents(quick):
+    """Rollouts per second of every MCTSAgent, on the Python and the engine path.
+
+    The time limits are chosen so that each search takes about MIN_TIME whatever
+    share of its base limit the agent spends on an opening position. The
+    multiprocessing agent has no engine path; its worker pool is started before
+    the timed move and shut down after it.
+    """
+    import importlib
+    min_time = MIN_TIME[quick]
+    rollouts_per_move = 64 if quick else 256
+    results = []
+    for module_name in AGENT_MODULES:
+        agent_class = importlib.import_module(module_name).MCTSAgent
+        # agents.py spends its whole limit, the others 2.5% or 5% of it on open boards
+        time_limit = min_time * 1000 * (1 if module_name == 'agents' else 20)
+        paths = [('python', {'time_limit': time_limit}),
+                 ('bitboard', {'time_limit': time_limit, 'use_bitboard': True})]
+        if module_name != 'agents_multi':
+            paths.append(('engine', {'time_limit': time_limit, 'rollouts_per_move': rollouts_per_move}))
+        for stage, moves in STAGES.items():
+            board = position(moves)
+            for path, params in paths:
+                best = 0.0
+                for _ in range(REPEAT):
+                    rng.seed(SEED)
+                    if module_name == 'agents_multi':
+                        with agent_class(max_depth=10, **params) as agent:
+                            agent.pool  # Start the workers outside the timed move
+                            best = max(best, _rollouts_per_sec(agent, board))
+                    else:
+                        best = max(best, _rollouts_per_sec(agent_class(max_depth=10, **params), board))
+                results.append(record(f'{module_name}.MCTSAgent', {'path': path, 'stage': stage, 'max_depth': 10},
+                                      'rollouts_per_sec', best, 'rollouts/s'))
+    return results
+
+
+def bench_racing(quick):
+    """Time per move, rollouts and regret of agents3 with and without racing.
+
+    Regret is how many mean empty tiles the chosen move falls short of the best
+    move of a REFERENCE_ROLLOUTS per move search, averaged over the positions.
+    Runs both the fixed-count engine path and the time-limited bitboard path.
+    Racing only saves time on the engine path, and from MIN_ENGINE_ROLLOUTS per
+    move on, so the quick run keeps the budget and only uses fewer positions.
+    """
+    import statistics
+    from agents3 import MCTSAgent
+    from rollouts import RolloutEngine
+    from rollout_stats import RolloutStats
+
+    positions = 8 if quick else 30
+    rollouts_per_move, time_limit = 1024, 2000
+    # Positions sampled from random games, restarting whenever one ends, that leave
+    # more than one move to choose from
+    rng.seed(SEED)
+    boards, board = [], Board()
+    while len(boards) < positions:
+        available = board.get_available_moves()
+        if not available:
+            board = Board()
+            continue
+        board.move(rng.choice(available))
+        if rng.random() < 0.1 and len(board.get_available_moves()) > 1:
+            boards.append(copy(board))
+    engine = RolloutEngine(10)
+    reference = []
+    for board in boards:
+        stats = RolloutStats()
+        result = engine.rollouts_per_move(board, board.get_available_moves(), REFERENCE_ROLLOUTS, 10)
+        stats.add_batch(result.moves, result.empty_tiles, result.high_value_tiles)
+        reference.append({move: stats.mean(move) for move in stats.moves()})
+
+    results = []
+    for path, params in (('engine', {'time_limit': time_limit, 'rollouts_per_move': rollouts_per_move}),
+                         ('bitboard', {'time_limit': time_limit, 'use_bitboard': True})):
+        for racing in (False, True):
+            rng.seed(SEED)
+            times, rollouts, regret = [], [], []
+            for board, means in zip(boards, reference):
+                # The best of REPEAT searches, as a single timing on a busy machine is noisy;
+                # the move and rollouts are those of the first
+                best = []
+                for _ in range(REPEAT):
+                    agent = MCTSAgent(max_depth=10, racing=racing, **params)
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        move = agent.select_move(copy(board))
+                    best.append((agent.last_move_stats['time_taken'] * 1000, agent.last_move_stats['num_rollouts'],
+                                 move))
+                times.append(min(time_taken for time_taken, _, _ in best))
+                rollouts.append(best[0][1])
+                regret.append(max(means.values()) - means[best[0][2]])
+            record_params = {'path': path, 'racing': racing, 'positions': len(boards), 'max_depth': 10}
+            # The mean also counts the searches that race ends early while most run their full time
+            results.append(record('agents3.MCTSAgent', record_params, 'median_time', statistics.median(times), 'ms',
+                                  higher_is_better=False))
+            results.append(record('agents3.MCTSAgent', record_params, 'mean_time', statistics.mean(times), 'ms',
+                                  higher_is_better=False))
+            results.append(record('agents3.MCTSAgent', record_params, 'mean_rollouts', statistics.mean(rollouts),
+                                  'rollouts', higher_is_better=False))
+            results.append(record('agents3.MCTSAgent', record_params, 'mean_regret', statistics.mean(regret),
+                                  'empty tiles', higher_is_better=False))
+    return results
+
+
+def bench_games(quick):
+    """Mean score and time per move over whole games of MCTSAgents with and without racing.
+
+    Game i is seeded with child i of the SEED SeedSequence, like self_play.py, so
+    both settings play the same spawns until their moves differ. Scores of single
+    games vary by thousands (whether they reach 4096 or stop at 2048), so only
+    the mean over many games tells racing's strength apart from plain search.
+    Racing is an option of every MCTSAgent, so the full run plays all four, at
+    the budget bench_racing uses as racing plays fewer rollouts in one call.
+    """
+    import importlib
+    import numpy as np
+    module_names = ('agents3',) if quick else AGENT_MODULES[:4]
+    games = 2 if quick else 8
+    rollouts_per_move = 1024
+    results = []
+    for module_name in module_names:
+        agent_class = importlib.import_module(module_name).MCTSAgent
+        for racing in (False, True):
+            scores, times = [], []
+            for game in range(games):
+                rng.seed(np.random.SeedSequence(SEED, spawn_key=(game,)))
+                agent = agent_class(time_limit=1000, max_depth=10, rollouts_per_move=rollouts_per_move,
+                                    racing=racing)
+                board = Board()
+                while not board.is_game_over():
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        move = agent.select_move(copy(board))
+                    times.append(agent.last_move_stats['time_taken'] * 1000)
+                    if move is None:
+                        break
+                    board.move(move)
+                scores.append(int(board.score))
+            record_params = {'path': 'engine', 'racing': racing, 'games': games,
+                             'rollouts_per_move': rollouts_per_move, 'max_depth': 10}
+            results.append(record(f'{module_name}.MCTSAgent', record_params, 'mean_score', float(np.mean(scores)),
+                                  'points'))
+            results.append(record(f'{module_name}.MCTSAgent', record_params, 'mean_move_time', float(np.mean(times)),
+                                  'ms', higher_is_better=False))
+    return results
+
+
+def bench_expectimax(quick):
+    from agents_expectimax import ExpectimaxAgent
+    depths = (2,) if quick else (2, 3)
+    results = []
+    for depth in depths:
+        for stage, moves in STAGES.items():
+            board = position(moves)
+            agent = ExpectimaxAgent(max_depth=depth)
+            best = 0.0
+            for _ in range(REPEAT):
+                agent.select_move(board)
+                stats = agent.last_move_stats
+                best = max(best, stats['nodes'] / stats['time_taken'])
+            params = {'max_depth': depth, 'stage': stage}
+            results.append(record('ExpectimaxAgent', params, 'nodes_per_sec', best, 'nodes/s'))
+            results.append(record('ExpectimaxAgent', params, 'nodes', stats['nodes'], 'nodes', higher_is_better=False))
+    return results
+
@@ -0,0 +1,329 @@
+# bitboard.py
+import numpy as np
+
+import rng
+from game_logic import Board, Action
+
+# The 4x4 grid is packed into a single 64-bit integer. Every cell holds the
+# exponent of its tile in 4 bits (0 = empty, 1 = 2, 2 = 4, ..., 15 = 32768).
+# Cell (row, col) lives at nibble 4 * row + col, so each row is a 16-bit word
+# with its left-most cell in the lowest nibble.
+ROW_MASK = 0xFFFF
+MAX_EXPONENT = 15
+
+
+def _reverse_row(row):
+    return ((row >> 12) & 0xF) | ((row >> 4) & 0xF0) | ((row << 4) & 0xF00) | ((row << 12) & 0xF000)
+
+
+def _build_row_tables():
+    """Precomputes the result of sliding every possible row to the left and right.
+
+    Returns:
+        Tuple of lists indexed by the 16-bit row word: rows moved left, rows moved
+        right, the merge score of the move, the sum of the tile values and the
+        number of empty cells of the row.
+    """
+    row_left = [0] * 65536
+    row_right = [0] * 65536
+    row_score = [0] * 65536
+    row_sum = [0] * 65536
+    row_empty = [0] * 65536
+    for row in range(65536):
+        cells = [(row >> (4 * i)) & 0xF for i in range(4)]
+        row_sum[row] = sum(1 << cell for cell in cells if cell)
+        row_empty[row] = cells.count(0)
+
+        # stack, merge and stack again, exactly like Board.stack / Board.merge
+        tiles = [cell for cell in cells if cell]
+        merged = []
+        score = 0
+        i = 0
+        while i < len(tiles):
+            if i + 1 < len(tiles) and tiles[i] == tiles[i + 1] and tiles[i] != MAX_EXPONENT:
+                merged.append(tiles[i] + 1)
+                score += 1 << (tiles[i] + 1)
+                i += 2
+            else:
+                merged.append(tiles[i])
+                i += 1
+        merged += [0] * (4 - len(merged))
+
+        result = merged[0] | (merged[1] << 4) | (merged[2] << 8) | (merged[3] << 12)
+        row_left[row] = result
+        row_score[row] = score
+
+    for row in range(65536):
+        row_right[row] = _reverse_row(row_left[_reverse_row(row)])
+    return row_left, row_right, row_score, row_sum, row_empty
+
+
+ROW_LEFT, ROW_RIGHT, ROW_SCORE, ROW_SUM, ROW_EMPTY = _build_row_tables()
+ROW_REVERSE = [_reverse_row(row) for row in range(65536)]
+
+
+def transpose(bits):
+    """Transposes a packed board, turning columns into rows."""
+    a1 = bits & 0xF0F00F0FF0F00F0F
+    a2 = bits & 0x0000F0F00000F0F0
+    a3 = bits & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+
+def _apply_rows(bits, table):
+    return (table[bits & ROW_MASK]
+            | (table[(bits >> 16) & ROW_MASK] << 16)
+            | (table[(bits >> 32) & ROW_MASK] << 32)
+            | (table[(bits >> 48) & ROW_MASK] << 48))
+
+
+def mirror_bits(bits):
+    """Mirrors a packed board left to right."""
+    return _apply_rows(bits, ROW_REVERSE)
+
+
+def flip_bits(bits):
+    """Flips a packed board upside down by reversing the order of its row words."""
+    return (((bits & ROW_MASK) << 48) | (((bits >> 16) & ROW_MASK) << 32)
+            | (((bits >> 32) & ROW_MASK) << 16) | (bits >> 48))
+
+
+def transform_bits(bits, t):
+    """Applies symmetry t (0-7) of the square: bit 0 mirrors, bit 1 flips, bit 2 transposes."""
+    if t & 1:
+        bits = mirror_bits(bits)
+    if t & 2:
+        bits = flip_bits(bits)
+    if t & 4:
+        bits = transpose(bits)
+    return bits
+
+
+def canonical_bits(bits):
+    """Returns the smallest of the 8 symmetric forms of a packed board and the transform giving it.
+
+    The form is computed with two row-table passes, two word swaps and four
+    transposes. Equivalent positions share the canonical form, so it can be used
+    as a transposition table key.
+    """
+    mirrored = mirror_bits(bits)
+    candidates = (bits, mirrored, flip_bits(bits), flip_bits(mirrored))
+    best, best_t = bits, 0
+    for t, candidate in enumerate(candidates):
+        transposed = transpose(candidate)
+        if candidate < best:
+            best, best_t = candidate, t
+        if transposed < best:
+            best, best_t = transposed, t | 4
+    return best, best_t
+
+
+def _build_symmetry_actions():
+    mirror = {Action.LEFT: Action.RIGHT, Action.RIGHT: Action.LEFT, Action.DOWN: Action.DOWN, Action.UP: Action.UP}
+    flip = {Action.LEFT: Action.LEFT, Action.RIGHT: Action.RIGHT, Action.DOWN: Action.UP, Action.UP: Action.DOWN}
+    swap = {Action.LEFT: Action.DOWN, Action.DOWN: Action.LEFT, Action.RIGHT: Action.UP, Action.UP: Action.RIGHT}
+    table = []
+    for t in range(8):
+        actions = []
+        for action in range(4):
+            if t & 1:
+                action = mirror[action]
+            if t & 2:
+                action = flip[action]
+            if t & 4:
+                action = swap[action]
+            actions.append(action)
+        table.append(actions)
+    return table
+
+
+# SYMMETRY_ACTIONS[t][action] is the action that does the same thing on the board transformed by t
+SYMMETRY_ACTIONS = _build_symmetry_actions()
+INVERSE_SYMMETRY_ACTIONS = [[actions.index(action) for action in range(4)] for actions in SYMMETRY_ACTIONS]
+
+
+def to_canonical_action(action, t):
+    return SYMMETRY_ACTIONS[t][action]
+
+
+def from_canonical_action(action, t):
+    """Maps an action chosen on the canonical board back to the original board."""
+    return INVERSE_SYMMETRY_ACTIONS[t][action]
+
+
+def move_bits(bits, action):
+    """Returns the packed board after sliding the tiles, without spawning a tile.
+
+    The numeric actions follow Board.move, which rotates the board by `action`
+    quarter turns before sliding left: 0 slides left, 1 slides towards the top
+    row, 2 slides right and 3 slides towards the bottom row.
+    """
+    if action == Action.LEFT:
+        return _apply_rows(bits, ROW_LEFT)
+    if action == Action.RIGHT:
+        return _apply_rows(bits, ROW_RIGHT)
+    if action == Action.DOWN:
+        return transpose(_apply_rows(transpose(bits), ROW_LEFT))
+    if action == Action.UP:
+        return transpose(_apply_rows(transpose(bits), ROW_RIGHT))
+    raise ValueError("Invalid action. Must be 0, 1, 2 or 3.")
+
+
+def score_bits(bits, action):
+    """Returns the merge score of sliding a packed board in the direction of `action`."""
+    if action in (Action.DOWN, Action.UP):
+        bits = transpose(bits)
+    return (ROW_SCORE[bits & ROW_MASK] + ROW_SCORE[(bits >> 16) & ROW_MASK]
+            + ROW_SCORE[(bits >> 32) & ROW_MASK] + ROW_SCORE[(bits >> 48) & ROW_MASK])
+
+
+def legal_mask_bits(bits):
+    """Returns a list of four booleans, indexed by action, telling which moves change the board."""
+    transposed = transpose(bits)
+    return [_apply_rows(bits, ROW_LEFT) != bits,
+            _apply_rows(transposed, ROW_LEFT) != transposed,
+            _apply_rows(bits, ROW_RIGHT) != bits,
+            _apply_rows(transposed, ROW_RIGHT) != transposed]
+
+
+def count_empty(bits):
+    return (ROW_EMPTY[bits & ROW_MASK] + ROW_EMPTY[(bits >> 16) & ROW_MASK]
+            + ROW_EMPTY[(bits >> 32) & ROW_MASK] + ROW_EMPTY[(bits >> 48) & ROW_MASK])
+
+
+def tile_sum(bits):
+    return (ROW_SUM[bits & ROW_MASK] + ROW_SUM[(bits >> 16) & ROW_MASK]
+            + ROW_SUM[(bits >> 32) & ROW_MASK] + ROW_SUM[(bits >> 48) & ROW_MASK])
+
+
+def max_exponent(bits):
+    highest = 0
+    while bits:
+        highest = max(highest, bits & 0xF)
+        bits >>= 4
+    return highest
+
+
+def pack(board):
+    """Packs a 4x4 array of tile values into a 64-bit integer of exponents."""
+    bits = 0
+    for index, value in enumerate(np.asarray(board).flatten()):
+        if value:
+            bits |= (int(value).bit_length() - 1) << (4 * index)
+    return bits
+
+
+def unpack(bits):
+    """Unpacks a 64-bit integer of exponents into a 4x4 array of tile values."""
+    exponents = np.array([(bits >> (4 * i)) & 0xF for i in range(16)])
+    return np.where(exponents > 0, 1 << exponents, 0).reshape(4, 4)
+
+
+class BitBoard:
+    """Drop-in replacement for Board that stores the grid as one 64-bit integer.
+
+    Moves are computed with precomputed 65536-entry row tables and a bit-level
+    transpose instead of rotating a NumPy array, so a move costs a handful of
+    integer operations. Only the standard 4x4 board is supported.
+    """
+
+    size = 4
+
+    def __init__(self, bits=None):
+        self.history = []
+        if bits is None:
+            self.reset()
+        else:
+            self.bits = bits
+
+    @classmethod
+    def from_board(cls, board: Board):
+        return cls(pack(board.board))
+
+    def reset(self):
+        self.bits = 0
+        self.add_tile()
+
+    @property
+    def board(self):
+        return unpack(self.bits)
+
+    @board.setter
+    def board(self, board):
+        self.bits = pack(board)
+
+    @property
+    def score(self):
+        return tile_sum(self.bits)
+
+    @property
+    def highest_value(self):
+        exponent = max_exponent(self.bits)
+        return 1 << exponent if exponent else 0
+
+    def has_reached_2048(self):
+        return max_exponent(self.bits) >= 11
+
+    def preview(self, action):
+        """Same as Board.preview, with the afterstate returned as a packed integer."""
+        new_bits = move_bits(self.bits, action)
+        return new_bits, new_bits != self.bits, score_bits(self.bits, action)
+
+    def legal_mask(self):
+        return legal_mask_bits(self.bits)
+
+    def move(self, action):
+        new_bits = move_bits(self.bits, action)
+        if new_bits != self.bits:
+            self.bits = new_bits
+            self.add_tile()
+
+    def make_move(self, action):
+        """Same as Board.make_move; the journal only needs the previous packed board."""
+        new_bits = move_bits(self.bits, action)
+        if new_bits == self.bits:
+            return False
+        self.history.append(self.bits)
+        self.bits = new_bits
+        self.add_tile()
+        return True
+
+    def undo_move(self):
+        self.bits = self.history.pop()
+
+    def add_tile(self):
+        empty = count_empty(self.bits)
+        if not empty:
+            return
+        target = rng.randrange(empty)
+        exponent = 2 if rng.random() < 0.1 else 1
+        bits = self.bits
+        for index in range(16):
+            if not (bits >> (4 * index)) & 0xF:
+                if not target:
+                    self.bits = bits | (exponent << (4 * index))
+                    return
+                target -= 1
+
+    def is_board_full(self):
+        return not count_empty(self.bits)
+
+    def get_available_moves(self):
+        mask = legal_mask_bits(self.bits)
+        return [action for action in (Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT) if mask[action]]
+
+    def is_game_over(self):
+        return self.is_board_full() and not self.get_available_moves()
+
+    def __copy__(self):
+        return BitBoard(self.bits)
+
+    def __deepcopy__(self, memo):
+        return BitBoard(self.bits)
+
+    def __str__(self):
+        return np.array_str(self.board)
@@ -0,0 +1,17 @@
+# conftest.py
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def random_grids():
+    """Returns a function making `count` seeded 4x4 grids of tiles from 2 to 4096.
+
+    About a third of the cells are empty, so most rows both slide and merge.
+    """
+    def make(seed, count=200):
+        generator = np.random.default_rng(seed)
+        exponents = generator.integers(1, 13, size=(count, 4, 4))
+        exponents[generator.random((count, 4, 4)) < 0.35] = 0
+        return np.where(exponents > 0, 2 ** exponents, 0)
+    return make
@@ -1,6 +1,8 @@
 # game_logic.py
 import numpy as np
-from numpy.random import choice
+
+import rng
+from collections import namedtuple
 
 # Enumeration for actions that can be performed in the game.
 class Action:
@@ -9,19 +11,36 @@ class Action:
     DOWN = 1
     LEFT = 0
 
+# Journal entry written by Board.make_move: the cells changed by the slide with their
+# previous values, the cell that received the spawned tile and the previous score.
+UndoRecord = namedtuple('UndoRecord', 'cells values spawn score highest_value')
+
 # The Board class encapsulates the game state.
 class Board:
-    def __init__(self, size=4):
+    def __init__(self, size=4, grid=None):
+        """
+        Args:
+            size (int): Number of rows and columns.
+            grid: Optional tile values to start from, such as an unpacked bitboard; the
+                board then gets no spawned tile and draws nothing from rng.
+        """
         self.size = size
-        self.board = np.zeros((size, size), dtype=int)
-        self.score = 0
-        self.highest_value = 0
-        self.add_tile()
+        self.history = []
+        if grid is None:
+            self.board = np.zeros((size, size), dtype=int)
+            self.score = 0
+            self.highest_value = 0
+            self.add_tile()
+        else:
+            self.board = np.array(grid, dtype=int)
+            self.score = np.sum(self.board)
+            self.highest_value = self.board.max()
 
     def reset(self):
         self.board = np.zeros((self.size, self.size), dtype=int)
         self.score = 0
         self.highest_value = 0
+        self.history = []
         self.add_tile()
 
     def has_reached_2048(self):
@@ -41,22 +60,55 @@ class Board:
         return new_board
 
     def merge(self, board):
+        score = 0
         for i in range(self.size):
             for j in range(self.size-1):
                 if board[i][j] == board[i][j+1] and board[i][j] != 0:
                     merged_value = board[i][j] * 2
                     board[i][j] = merged_value
                     board[i][j+1] = 0
-        return board
+                    score += merged_value
+        return board, score
+
+    def preview(self, action):
+        """Computes the result of an action without changing the board or spawning a tile.
+
+        Args:
+            action (int): The action to preview.
+
+        Returns:
+            Tuple of the board after the tiles slid, whether the action changed the
+            board and the sum of the tiles created by merges.
+        """
+        afterstate = self.stack(self.rotate_board(action))
+        afterstate, score_delta = self.merge(afterstate)
+        afterstate = np.rot90(self.stack(afterstate), -action)
+        return afterstate, not np.array_equal(afterstate, self.board), score_delta
+
+    def legal_mask(self):
+        """Checks all four actions in one pass over the board.
+
+        An action is legal if some tile can slide into an empty cell or merge with
+        an equal neighbour in its direction.
+
+        Returns:
+            Boolean array indexed by action.
+        """
+        filled = self.board != 0
+        pairs_horizontal = (self.board[:, :-1] == self.board[:, 1:]) & filled[:, :-1]
+        pairs_vertical = (self.board[:-1] == self.board[1:]) & filled[:-1]
+        mask = np.zeros(4, dtype=bool)
+        mask[Action.LEFT] = np.any(pairs_horizontal | (~filled[:, :-1] & filled[:, 1:]))
+        mask[Action.RIGHT] = np.any(pairs_horizontal | (filled[:, :-1] & ~filled[:, 1:]))
+        # rot90 by one quarter turn slides towards the top row, three towards the bottom
+        mask[Action.DOWN] = np.any(pairs_vertical | (~filled[:-1] & filled[1:]))
+        mask[Action.UP] = np.any(pairs_vertical | (filled[:-1] & ~filled[1:]))
+        return mask
 
     def move(self, action):
-        original_board = self.board.copy()
-        self.board = self.rotate_board(action)
-        self.board = self.stack(self.board)
-        self.board = self.merge(self.board)
-        self.board = self.stack(self.board)
-        self.board = self.rotate_board(-action)
-        if not all((self.board == original_board).flatten()):
+        afterstate, changed, _ = self.preview(action)
+        if changed:
+            self.board = afterstate
             self.add_tile()
 
     def add_tile(self):
@@ -65,28 +117,54 @@ class Board:
         empty_cells = [(x, y) for x, y in zip(*np.where(self.board == 0))]
         if not empty_cells:  # Just in case there are no empty cells.
             return
-        index = choice(len(empty_cells))
+        index = rng.randrange(len(empty_cells))
         cell = empty_cells[index]
-        new_value = 4 if np.random.rand() < 0.1 else 2
+        new_value = 4 if rng.random() < 0.1 else 2
         self.board[cell] = new_value
 
 
         # update score and highest value
         self.score = np.sum(self.board)
         self.highest_value = np.max(self.board)
+        return cell
+
+    def make_move(self, action):
+        """Applies an action in place and records how to undo it.
+
+        Unlike move, the board array is updated in place and only the cells that
+        changed are journaled, so a rollout can play and unwind moves on a single
+        board instead of copying it.
+
+        Args:
+            action (int): The action to apply.
+
+        Returns:
+            bool: Whether the action changed the board. Nothing is recorded otherwise.
+        """
+        afterstate, changed, _ = self.preview(action)
+        if not changed:
+            return False
+        cells = np.flatnonzero(afterstate != self.board)
+        record = UndoRecord(cells, self.board.flat[cells], None, self.score, self.highest_value)
+        self.board[...] = afterstate
+        self.history.append(record._replace(spawn=self.add_tile()))
+        return True
+
+    def undo_move(self):
+        """Reverts the last move applied with make_move."""
+        record = self.history.pop()
+        if record.spawn is not None:
+            self.board[record.spawn] = 0
+        self.board.flat[record.cells] = record.values
+        self.score = record.score
+        self.highest_value = record.highest_value
 
     def is_board_full(self):
         return not np.any(self.board == 0)
 
     def get_available_moves(self):
-        available_moves = []
-        for action in [Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT]:
-            board_copy = self.board.copy()
-            self.move(action)
-            if not all((self.board == board_copy).flatten()):
-                available_moves.append(action)
-            self.board = board_copy  # revert the move
-        return available_moves
+        mask = self.legal_mask()
+        return [action for action in [Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT] if mask[action]]
 
     def is_game_over(self):
         return self.is_board_full() and not self.get_available_moves()
@@ -0,0 +1,137 @@
+# heuristics.py
+import numpy as np
+
+from bitboard import ROW_MASK, transpose, pack
+from batch_board import row_words
+
+MONOTONICITY_POWER = 4.0
+SUM_POWER = 3.5
+
+FEATURES = ('empty', 'merges', 'monotonicity', 'smoothness', 'corner', 'sum')
+
+# Signed weights per feature; positive features are rewarded, negative ones penalized
+DEFAULT_WEIGHTS = {
+    'empty': 270.0,
+    'merges': 700.0,
+    'monotonicity': -47.0,
+    'smoothness': 0.0,
+    'corner': 0.0,
+    'sum': -11.0,
+}
+
+
+def _build_feature_tables():
+    """Measures every feature on every possible 16-bit row at once.
+
+    Returns:
+        dict: Feature name -> float array of length 65536, indexed by row word.
+    """
+    rows = np.arange(65536, dtype=np.uint32)
+    cells = ((rows[:, None] >> np.array([0, 4, 8, 12], dtype=np.uint32)) & 0xF).astype(np.int64)
+    nonzero = cells > 0
+
+    # Equal tiles that would merge, also across empty cells: a run of k equal tiles counts k
+    merges = np.zeros(65536)
+    counter = np.zeros(65536)
+    previous = np.zeros(65536, dtype=np.int64)
+    for i in range(4):
+        cell = cells[:, i]
+        same = nonzero[:, i] & (cell == previous)
+        closing = nonzero[:, i] & ~same & (counter > 0)
+        merges += np.where(closing, 1 + counter, 0)
+        counter = np.where(same, counter + 1, np.where(nonzero[:, i], 0, counter))
+        previous = np.where(nonzero[:, i], cell, previous)
+    merges += np.where(counter > 0, 1 + counter, 0)
+
+    # The smaller of the increases towards either end; 0 for a monotonic row
+    powered = cells.astype(np.float64) ** MONOTONICITY_POWER
+    steps = powered[:, 1:] - powered[:, :-1]
+    monotonicity = np.minimum(np.where(steps > 0, steps, 0).sum(axis=1),
+                              np.where(steps < 0, -steps, 0).sum(axis=1))
+
+    # Exponent differences between neighbouring tiles, skipping empty cells
+    smoothness = np.zeros(65536)
+    for left in range(3):
+        for right in range(left + 1, 4):
+            between_empty = ~nonzero[:, left + 1:right].any(axis=1)
+            adjacent = nonzero[:, left] & nonzero[:, right] & between_empty
+            smoothness -= np.where(adjacent, np.abs(cells[:, left] - cells[:, right]), 0)
+
+    # The row's largest exponent if it sits at one of the ends of the row
+    highest = cells.max(axis=1)
+    corner = np.where((cells[:, 0] == highest) | (cells[:, 3] == highest), highest, 0).astype(np.float64)
+
+    return {
+        'empty': (~nonzero).sum(axis=1).astype(np.float64),
+        'merges': merges,
+        'monotonicity': monotonicity,
+        'smoothness': smoothness,
+        'corner': corner,
+        'sum': (cells.astype(np.float64) ** SUM_POWER).sum(axis=1),
+    }
+
+
+FEATURE_TABLES = _build_feature_tables()
+
+# Tiles above 4, counted per row; used by the rollout statistics of the MCTS agents
+ROW_HIGH_TILES = (((np.arange(65536)[:, None] >> np.array([0, 4, 8, 12])) & 0xF) > 2).sum(axis=1).tolist()
+
+
+def count_high_tiles(bits):
+    """Number of tiles above 4 on a packed board."""
+    return (ROW_HIGH_TILES[bits & ROW_MASK] + ROW_HIGH_TILES[(bits >> 16) & ROW_MASK]
+            + ROW_HIGH_TILES[(bits >> 32) & ROW_MASK] + ROW_HIGH_TILES[(bits >> 48) & ROW_MASK])
+
+
+class Heuristic:
+    """Board evaluation from precomputed per-row tables.
+
+    The weighted features of every possible row are folded into one table of 65536
+    scores, so a board is scored with 8 lookups: its 4 rows and its 4 columns (the
+    rows of the transposed board). Single packed boards go through Python list
+    lookups, batches of exponent grids through one NumPy gather.
+    """
+
+    def __init__(self, weights: dict = None, bias: float = 0.0):
+        """
+        Args:
+            weights (dict): Weight per feature name, see FEATURES. Missing features
+                keep their DEFAULT_WEIGHTS value.
+            bias (float): Constant added to every board score.
+        """
+        unknown = set(weights or {}) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown heuristic features {sorted(unknown)}, expected some of {FEATURES}")
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.bias = bias
+        self.array = sum(self.weights[name] * FEATURE_TABLES[name] for name in FEATURES)
+        self.table = self.array.tolist()
+
+    def score(self, bits):
+        """Score of a packed board."""
+        columns = transpose(bits)
+        table = self.table
+        return (self.bias + table[bits & ROW_MASK] + table[(bits >> 16) & ROW_MASK]
+                + table[(bits >> 32) & ROW_MASK] + table[(bits >> 48) & ROW_MASK]
+                + table[columns & ROW_MASK] + table[(columns >> 16) & ROW_MASK]
+                + table[(columns >> 32) & ROW_MASK] + table[(columns >> 48) & ROW_MASK])
+
+    def score_board(self, board):
+        """Score of a 4x4 array of tile values."""
+        return self.score(pack(board))
+
+    def score_batch(self, cells):
+        """Scores of an (N, 4, 4) array of tile exponents, as used by BatchBoard.
+
+        Returns:
+            np.ndarray: One float64 score per board.
+        """
+        rows = row_words(cells)
+        columns = row_words(cells.transpose(0, 2, 1))
+        return self.bias + self.array[rows].sum(axis=1) + self.array[columns].sum(axis=1)
+
+    def features(self, bits):
+        """Unweighted feature values of a packed board, summed over its rows and columns."""
+        columns = transpose(bits)
+        lines = [(word >> shift) & ROW_MASK for word in (bits, columns) for shift in (0, 16, 32, 48)]
+        return {name: float(FEATURE_TABLES[name][lines].sum()) for name in FEATURES}
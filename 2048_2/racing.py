@@ -0,0 +1,158 @@
+# racing.py
+import math
+from statistics import NormalDist
+
+# The bounds are checked each time the fewest rollouts of a contender have grown by
+# CHECK_GROWTH. Checking costs a few histogram sums per move, so it can be frequent;
+# the error probability is split over MAX_CHECKS checks of every move, which covers a
+# race from min_rollouts up to min_rollouts * CHECK_GROWTH ** (MAX_CHECKS - 1) rollouts
+CHECK_GROWTH = 1.25
+MAX_CHECKS = 30
+# With fewer rollouts per move the second engine call of run_rounds costs more than
+# the rollouts of the eliminated moves it saves, so they are played in a single call
+MIN_ENGINE_ROLLOUTS = 512
+# Smallest variance used in a bound, so a move whose few rollouts all ended alike
+# does not get an interval of width zero
+MIN_VARIANCE = 0.25
+
+
+class Race:
+    """Racing of the root moves on the mean empty tiles of their rollouts.
+
+    Every move keeps a normal-approximation confidence interval around its mean,
+    computed from the RolloutStats histogram. Empty tiles are bounded counts, so
+    from min_rollouts on the mean is close to normal and the intervals are a few
+    times narrower than distribution-free (Hoeffding or Bernstein) ones, which
+    rarely separate anything at the budgets the agents can afford. A move whose
+    upper bound falls below the best lower bound is eliminated and receives no
+    more rollouts; rollouts always go to the surviving move with the fewest.
+
+    The race is decided when a single move survives ('separated'), or when no
+    remaining contender can beat the move with the best mean by more than a
+    fraction epsilon of that mean ('indifferent'): more rollouts would then only
+    choose between moves that are as good as each other to the agent. The
+    tolerance is relative because moves on open boards differ by whole tiles,
+    while on nearly full ones a tenth of a tile decides the game. It defaults to
+    0, so only separation ends a race early and moves are never given up for
+    time; in self-play epsilon=0.05 cost about a sixth of the score.
+
+    The bounds are checked each time the fewest rollouts of a contender have grown
+    by CHECK_GROWTH, and delta is split over the moves and the number of checks.
+    """
+
+    def __init__(self, moves, delta: float = 0.05, epsilon: float = 0.0, min_rollouts: int = 32,
+                 checks: int = MAX_CHECKS):
+        """
+        Args:
+            moves: The legal root moves.
+            delta (float): Probability of eliminating the truly best move, or of
+                stopping with a move more than epsilon worse than it.
+            epsilon (float): Difference in mean empty tiles, as a fraction of the
+                best mean, below which moves count as equally good.
+            min_rollouts (int): Rollouts every move gets before the first check.
+            checks (int): Checks delta is split over; run_rounds makes a single one.
+        """
+        self.moves = list(moves)
+        self.contenders = list(moves)
+        self.delta = delta
+        self.epsilon = epsilon
+        self.min_rollouts = min_rollouts
+        self.z = NormalDist().inv_cdf(1 - delta / (max(1, len(self.moves)) * checks))
+        self.eliminated = {}  # Move -> number of rollouts of all moves when it dropped out
+        self.stop_reason = 'separated' if len(self.moves) <= 1 else None
+        self._next_check = min_rollouts
+
+    @property
+    def decided(self):
+        return self.stop_reason is not None
+
+    def bounds(self, stats, move):
+        """Lower and upper confidence bound of the mean empty tiles of a move."""
+        n = stats.num_rollouts(move)
+        if n < 2:
+            return -math.inf, math.inf
+        variance = max(stats.variance(move) * n / (n - 1), MIN_VARIANCE)
+        radius = self.z * math.sqrt(variance / n)
+        mean = stats.mean(move)
+        return mean - radius, mean + radius
+
+    def leader(self, stats):
+        """The contender with the best mean empty tiles, or None without contenders."""
+        return max(self.contenders, key=stats.mean) if self.contenders else None
+
+    def schedule(self, stats, count):
+        """The moves of the next `count` rollouts, filling up the contenders with the fewest."""
+        planned = {move: stats.num_rollouts(move) for move in self.contenders}
+        moves = []
+        for _ in range(count):
+            move = min(planned, key=planned.get)
+            planned[move] += 1
+            moves.append(move)
+        return moves
+
+    def update(self, stats):
+        """Eliminates the separated moves once the fewest rollouts of a contender have grown by CHECK_GROWTH.
+
+        Returns:
+            bool: Whether the race is decided.
+        """
+        if self.decided or not self.contenders:
+            return self.decided
+        fewest = min(stats.num_rollouts(move) for move in self.contenders)
+        if fewest < self._next_check:
+            return False
+        self._next_check = math.ceil(CHECK_GROWTH * fewest)
+
+        bounds = {move: self.bounds(stats, move) for move in self.contenders}
+        best_lower = max(lower for lower, _ in bounds.values())
+        total = stats.num_rollouts()
+        for move, (_, upper) in bounds.items():
+            if upper < best_lower:
+                self.contenders.remove(move)
+                self.eliminated[move] = total
+
+        leader = self.leader(stats)
+        if len(self.contenders) == 1:
+            self.stop_reason = 'separated'
+        elif all(bounds[move][1] - bounds[leader][0] <= self.epsilon * stats.mean(leader)
+                 for move in self.contenders if move != leader):
+            self.stop_reason = 'indifferent'
+        return self.decided
+
+    def run_rounds(self, engine, game_state, stats, rollouts: int, max_depth: int = None):
+        """Races with a RolloutEngine in at most two calls of `rollouts` per move in total.
+
+        The first call gives every move half of them and is followed by a single
+        check; the second gives the rest to the moves still racing. Moves rarely
+        separate from all others, but clearly worse ones are often eliminated
+        after the first half, and their second half is what racing saves. Fewer
+        than MIN_ENGINE_ROLLOUTS per move are played in one call without a check.
+        Create the race with checks=1 for its single check.
+
+        Args:
+            engine (RolloutEngine): Plays the rollouts of a call as one batch.
+            game_state: The root board.
+            stats (RolloutStats): Receives the rollouts.
+            rollouts (int): Rollouts per move of a move that is never eliminated.
+            max_depth (int): Overrides the engine's max_depth.
+        """
+        if self.decided:
+            return
+        first_round = rollouts // 2 if rollouts >= MIN_ENGINE_ROLLOUTS else rollouts
+        result = engine.rollouts_per_move(game_state, self.contenders, first_round, max_depth)
+        stats.add_batch(result.moves, result.empty_tiles, result.high_value_tiles)
+        if first_round < rollouts and not self.update(stats):
+            result = engine.rollouts_per_move(game_state, self.contenders, rollouts - first_round, max_depth)
+            stats.add_batch(result.moves, result.empty_tiles, result.high_value_tiles)
+
+    def report(self):
+        """Why the search stopped and which moves were still racing, for last_move_stats.
+
+        eliminated_after maps every eliminated move to the total number of rollouts
+        at the time it dropped out.
+        """
+        return {
+            'stop_reason': self.stop_reason or 'budget spent',
+            'contenders': list(self.contenders),
+            'eliminated_after': dict(self.eliminated),
+        }
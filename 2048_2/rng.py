@@ -0,0 +1,86 @@
+# rng.py
+import numpy as np
+
+DEFAULT_BUFFER_SIZE = 4096
+
+
+class RandomStream:
+    """Uniform random numbers from a numpy Generator, drawn in bulk into a buffer.
+
+    Single draws in the hot loops (a spawn, a rollout move) cost a list lookup and
+    an index increment; the Generator is only called once per buffer_size draws.
+    Streams for workers come from spawn, which derives independent child seeds
+    with SeedSequence.spawn, so a seeded run gives the same draws in every worker
+    however the work is scheduled.
+
+    The buffer is replaced as a whole on refill and an index is checked before it
+    is used, so threads sharing a stream never fail, although they may then see a
+    draw twice; reproducible runs give every worker its own stream.
+    """
+
+    def __init__(self, seed=None, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        """
+        Args:
+            seed: An int, a np.random.SeedSequence, or None for fresh OS entropy.
+            buffer_size (int): Number of uniforms drawn per refill.
+        """
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.generator = np.random.default_rng(self.seed_sequence)
+        self.buffer_size = buffer_size
+        self._refill()
+
+    def _refill(self):
+        self._buffer = self.generator.random(self.buffer_size).tolist()
+        self._index = 0
+
+    def random(self):
+        """A float in [0, 1)."""
+        index = self._index
+        if index >= self.buffer_size:
+            self._refill()
+            index = 0
+        self._index = index + 1
+        return self._buffer[index]
+
+    def randrange(self, n):
+        """An int in [0, n)."""
+        return int(self.random() * n)
+
+    def choice(self, sequence):
+        """A uniformly random element of a non-empty sequence."""
+        return sequence[int(self.random() * len(sequence))]
+
+    def spawn(self, n):
+        """n independent child streams, the same ones for the same seed."""
+        return [RandomStream(child, self.buffer_size) for child in self.seed_sequence.spawn(n)]
+
+
+# The process-wide stream used by the boards and agents; replaced by seed()
+_stream = RandomStream()
+
+
+def seed(value=None):
+    """Restarts the default stream, e.g. with a worker's child SeedSequence.
+
+    Returns:
+        RandomStream: The new default stream.
+    """
+    global _stream
+    _stream = RandomStream(value)
+    return _stream
+
+
+def default_stream():
+    return _stream
+
+
+def random():
+    return _stream.random()
+
+
+def randrange(n):
+    return _stream.randrange(n)
+
+
+def choice(sequence):
+    return _stream.choice(sequence)
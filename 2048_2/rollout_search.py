@@ -0,0 +1,174 @@
+# rollout_search.py
+import numpy as np
+import time
+
+import rng
+from game_logic import Board
+from bitboard import BitBoard, pack, count_empty
+from heuristics import count_high_tiles
+from time_manager import TimeManager
+from search_controller import SearchController
+from rollouts import RolloutEngine
+from rollout_stats import RolloutStats
+from racing import Race
+
+
+class RolloutSearch:
+    """Flat Monte Carlo search over the root moves, shared by the MCTSAgent variants.
+
+    Every rollout plays one root move and then random moves up to the depth limit
+    on the board itself, unwinding them afterwards, and its outcome is counted in
+    a RolloutStats histogram. Rollouts run in batches until the time limit, or,
+    with rollouts_per_move set, as fixed-count batches of the NumPy RolloutEngine.
+
+    The agents differ only in how they set their limits from the previous move
+    (adjust_temporary_time_limit), how they choose from the statistics (evaluate)
+    and what they report (calculate_last_move_stats).
+    """
+
+    def __init__(self, time_limit: float, max_depth: int = np.inf, use_bitboard: bool = False,
+                 rollouts_per_move: int = None, racing: bool = False, time_manager: TimeManager = None):
+        """
+        Args:
+            time_limit (float): Base time per move in milliseconds.
+            max_depth (int): Random moves played after the root move of a rollout.
+            use_bitboard (bool): Play the rollouts on the packed 64-bit board.
+            rollouts_per_move (int): When set, this many rollouts per root move
+                replace the time limit and all of them advance together as NumPy arrays.
+                With a time manager it is the count for a move given the whole
+                base time limit, see rollout_count.
+            racing (bool): Race the root moves on their mean empty tiles, see Race.
+                Off by default.
+            time_manager (TimeManager): Optional per-position time allocation that
+                replaces adjust_temporary_time_limit.
+        """
+        self.base_time_limit = time_limit / 1000  # Convert milliseconds to seconds
+        self.temporary_time_limit = self.base_time_limit  # Initialize temporary time limit
+        self.previous_max_empty_tiles = np.inf
+        self.max_depth = max_depth
+        self.temporary_depth_limit = max_depth
+        self.last_move_stats = {}
+        self.use_bitboard = use_bitboard
+        self.rollouts_per_move = rollouts_per_move
+        self.rollout_engine = RolloutEngine(max_depth)
+        # In racing mode the rollouts go to the moves whose confidence intervals on the mean
+        # empty tiles still overlap the best one, and the search ends once a single move is
+        # left; evaluate then only chooses among the moves that were not eliminated
+        self.racing = racing
+        self.time_manager = time_manager
+
+    def adjust_temporary_time_limit(self):
+        """Sets the limits of the next move from previous_max_empty_tiles; the base limits by default."""
+
+    def start_move(self, game_state):
+        """Sets temporary_time_limit and temporary_depth_limit for a search from game_state."""
+        if self.time_manager is not None:
+            # The time manager decides from the position itself; the depth stays at max_depth
+            self.temporary_time_limit = self.time_manager.allocate(game_state)
+            self.temporary_depth_limit = self.max_depth
+        else:
+            self.adjust_temporary_time_limit()
+
+    def rollout_count(self):
+        """Rollouts per root move on the engine path.
+
+        Without a time manager this is rollouts_per_move. The manager's allocation
+        scales it by the share of the base time limit the move was given, so calm
+        positions get fewer rollouts and critical ones more, as on the time path.
+        """
+        if self.time_manager is None:
+            return self.rollouts_per_move
+        return max(1, round(self.rollouts_per_move * self.temporary_time_limit / self.base_time_limit))
+
+    def select_move(self, game_state: Board):
+        start_time = time.time()
+        if self.use_bitboard:
+            game_state = BitBoard.from_board(game_state)
+        self.start_move(game_state)  # Adjust the time limit before starting
+        moves = game_state.get_available_moves()
+        stats, race = self.run_rollouts(game_state, moves)
+        if race and len(race.contenders) == 1:
+            # Separated, or the only legal move, which is decided without rollouts
+            best_move = race.contenders[0]
+        else:
+            # Eliminated moves are out; the agent's own statistic chooses among the rest
+            candidates = stats.subset(race.contenders) if race else stats
+            best_move = self.evaluate(candidates) if candidates.num_rollouts() else None
+        self.finish_move(game_state, stats, start_time, race)
+        return best_move
+
+    def run_rollouts(self, game_state, moves):
+        """Plays the rollouts of one move's search from game_state.
+
+        Returns:
+            Tuple of the RolloutStats of the root moves and the Race, or None without racing.
+        """
+        # Rollout outcomes are counted per move in a fixed-size histogram
+        stats = RolloutStats()
+        race = None
+        if self.racing:
+            # The engine path checks once between its two calls, the time path as it goes
+            race = Race(moves, checks=1) if self.rollouts_per_move else Race(moves)
+
+        def rollout_batch(batch_size):
+            batch = race.schedule(stats, batch_size) if race else [rng.choice(moves) for _ in range(batch_size)]
+            for move in batch:
+                empty_tiles, high_value_tiles = self.random_playout(game_state, move)
+                if empty_tiles != -np.inf:
+                    stats.add(move, empty_tiles, high_value_tiles)
+
+        if self.rollouts_per_move and race:
+            race.run_rounds(self.rollout_engine, game_state, stats, self.rollout_count(), self.temporary_depth_limit)
+        elif self.rollouts_per_move:
+            result = self.rollout_engine.rollouts_per_move(game_state, moves, self.rollout_count(),
+                                                           self.temporary_depth_limit)
+            stats.add_batch(result.moves, result.empty_tiles, result.high_value_tiles)
+        else:
+            # Rollouts run in batches sized to finish before a hard perf_counter deadline
+            SearchController(self.temporary_time_limit).run_batches(
+                rollout_batch, until=(lambda: race.update(stats)) if race else None)
+        return stats, race
+
+    def finish_move(self, game_state, stats, start_time, race=None):
+        """Fills last_move_stats, charges the time manager and remembers the empty tiles of game_state."""
+        self.calculate_last_move_stats(stats, start_time)
+        if self.time_manager is not None:
+            self.time_manager.record({move: stats.mean(move) for move in stats.moves()})
+            self.last_move_stats['time_allocated'] = self.temporary_time_limit
+        if race:
+            self.last_move_stats.update(race.report())
+        # The next move's limits depend on the empty tiles of this one
+        self.previous_max_empty_tiles = np.count_nonzero(game_state.board == 0)
+
+    def random_playout(self, game_state: Board, move):
+        """Plays `move` and random moves after it, then unwinds them.
+
+        Returns:
+            Tuple of the empty tiles and the high-value tiles at the end of the
+            rollout, or (-inf, inf) if `move` is illegal.
+        """
+        if not game_state.legal_mask()[move]:
+            return -np.inf, np.inf
+        # Play the rollout on the board itself and unwind it afterwards
+        history_length = len(game_state.history)
+        game_state.make_move(move)
+
+        for _ in range(self.temporary_depth_limit):
+            if game_state.is_game_over():
+                break
+            random_move = rng.choice(game_state.get_available_moves())
+            game_state.make_move(random_move)
+
+        # Row table lookups on the packed board instead of NumPy masks
+        bits = game_state.bits if isinstance(game_state, BitBoard) else pack(game_state.board)
+        empty_tiles = count_empty(bits)
+        high_value_tiles = count_high_tiles(bits)
+        while len(game_state.history) > history_length:
+            game_state.undo_move()
+        return empty_tiles, high_value_tiles
+
+    def evaluate(self, stats):
+        raise NotImplementedError()
+
+    def calculate_last_move_stats(self, stats, start_time):
+        raise NotImplementedError()
@@ -0,0 +1,115 @@
+# rollout_stats.py
+import numpy as np
+
+# Number of possible empty-tile and high-value-tile counts after a rollout (0 to 16)
+TILE_BINS = 17
+
+
+def histogram_percentile(counts, q):
+    """np.percentile (linear interpolation) of the data summarized by a histogram of bins 0, 1, 2, ..."""
+    cumulative = np.cumsum(counts)
+    position = q / 100 * (cumulative[-1] - 1)
+    lower = int(position)
+    lower_value = np.searchsorted(cumulative, lower, side='right')
+    upper_value = np.searchsorted(cumulative, min(lower + 1, cumulative[-1] - 1), side='right')
+    return lower_value + (position - lower) * (upper_value - lower_value)
+
+
+def histogram_top_mean(counts, fraction):
+    """Mean of the largest max(1, int(n * fraction)) of the n values summarized by a histogram."""
+    remaining = max(1, int(counts.sum() * fraction))
+    total = 0
+    size = remaining
+    for value in range(len(counts) - 1, -1, -1):
+        taken = min(int(counts[value]), remaining)
+        total += taken * value
+        remaining -= taken
+        if not remaining:
+            break
+    return total / size
+
+
+class RolloutStats:
+    """Constant-memory statistics of the rollouts of every root move.
+
+    Rollouts are counted in a fixed histogram, counts[move, empty_tiles,
+    high_value_tiles], instead of being kept one record each. Adding a rollout is a
+    single increment and every statistic is computed from the 17 x 17 bins of a
+    move, so neither memory nor query time depends on the number of rollouts.
+    """
+
+    def __init__(self, counts: np.ndarray = None):
+        """
+        Args:
+            counts (np.ndarray): Existing (4, 17, 17) int64 histogram to count into, such
+                as a view on shared memory; a zeroed one is allocated by default.
+        """
+        self.counts = counts if counts is not None else np.zeros((4, TILE_BINS, TILE_BINS), dtype=np.int64)
+
+    def add(self, move, empty_tiles, high_value_tiles):
+        """Counts one rollout that started with `move`."""
+        self.counts[move, empty_tiles, high_value_tiles] += 1
+
+    def add_batch(self, moves, empty_tiles, high_value_tiles):
+        """Counts a batch of rollouts given as equally long arrays, like a RolloutResult."""
+        np.add.at(self.counts, (moves, empty_tiles, high_value_tiles), 1)
+
+    def clear(self):
+        self.counts[:] = 0
+
+    def subset(self, moves):
+        """A RolloutStats holding only the rollouts of `moves`."""
+        counts = np.zeros_like(self.counts)
+        counts[moves] = self.counts[moves]
+        return RolloutStats(counts)
+
+    def empty_tile_counts(self, move=None):
+        """Histogram of the empty tiles of one move's rollouts, or of all rollouts."""
+        if move is None:
+            return self.counts.sum(axis=(0, 2))
+        return self.counts[move].sum(axis=1)
+
+    def num_rollouts(self, move=None):
+        return int(self.empty_tile_counts(move).sum())
+
+    def moves(self):
+        """The moves that have at least one rollout."""
+        return [move for move in range(len(self.counts)) if self.counts[move].any()]
+
+    def mean(self, move=None):
+        """Average empty tiles; 0 without rollouts."""
+        counts = self.empty_tile_counts(move)
+        total = counts.sum()
+        return float(counts @ np.arange(TILE_BINS) / total) if total else 0
+
+    def variance(self, move=None):
+        """Population variance of the empty tiles; 0 without rollouts."""
+        counts = self.empty_tile_counts(move)
+        total = counts.sum()
+        if not total:
+            return 0
+        values = np.arange(TILE_BINS)
+        mean = counts @ values / total
+        return float(counts @ (values - mean) ** 2 / total)
+
+    def max(self, move=None):
+        """Most empty tiles any rollout ended with; 0 without rollouts."""
+        nonzero = np.flatnonzero(self.empty_tile_counts(move))
+        return int(nonzero[-1]) if len(nonzero) else 0
+
+    def percentile(self, move, q):
+        """Exact np.percentile of the empty tiles of the move's rollouts."""
+        return histogram_percentile(self.empty_tile_counts(move), q)
+
+    def top_fraction_mean(self, move, fraction):
+        """Mean empty tiles of the best `fraction` of the move's rollouts (at least one)."""
+        return histogram_top_mean(self.empty_tile_counts(move), fraction)
+
+    def min_high_value_tiles(self, move, empty_tiles):
+        """Fewest high-value tiles among the move's rollouts ending with `empty_tiles` empty tiles.
+
+        Returns:
+            int: The count, or None if no rollout of the move ended that way.
+        """
+        nonzero = np.flatnonzero(self.counts[move, empty_tiles])
+        return int(nonzero[0]) if len(nonzero) else None
@@ -0,0 +1,94 @@
+# rollouts.py
+from collections import namedtuple
+
+import numpy as np
+
+from batch_board import BatchBoard
+from bitboard import BitBoard, pack
+from rng import default_stream
+
+# Terminal statistics of a set of rollouts, one array entry per rollout
+RolloutResult = namedtuple('RolloutResult', 'moves empty_tiles high_value_tiles merge_score length')
+
+
+def sample_legal_actions(mask, rng):
+    """Draws one uniformly random legal action per row of an (N, 4) legal-move mask.
+
+    Rows without a legal action get action 0, which leaves such a board unchanged.
+    """
+    counts = mask.sum(axis=1)
+    targets = (rng.random(len(mask)) * counts).astype(np.int64)
+    return (np.cumsum(mask, axis=1) > targets[:, None]).argmax(axis=1)
+
+
+class RolloutEngine:
+    """Plays many random rollouts from one root board as parallel NumPy arrays.
+
+    Every rollout starts with a given first move and continues with uniformly
+    random legal moves, sampled from the per-row legal masks of BatchBoard, until
+    its game is over or `max_depth` random moves have been played. Finished
+    rollouts are masked out, so each step only slides the boards still running.
+    """
+
+    def __init__(self, max_depth: int = 20, rng: np.random.Generator = None):
+        """
+        Args:
+            max_depth (int): Random moves played after the first move; np.inf plays
+                every rollout to the end of its game.
+            rng (np.random.Generator): Source of the spawns and the random moves; by
+                default the Generator of the default stream when each run starts.
+        """
+        self.max_depth = max_depth
+        self.rng = rng
+
+    def run(self, game_state, first_moves, max_depth: int = None):
+        """Plays one rollout per entry of first_moves.
+
+        Args:
+            game_state: The root, a Board or a BitBoard. It is not modified.
+            first_moves: Sequence of first moves; illegal ones must be filtered out
+                beforehand.
+            max_depth (int): Overrides the engine's max_depth for this call.
+
+        Returns:
+            RolloutResult: Arrays of the first move, empty tiles, tiles above 4,
+            merge score gained and number of moves played of every rollout.
+        """
+        max_depth = self.max_depth if max_depth is None else max_depth
+        first_moves = np.asarray(first_moves, dtype=np.int64)
+        n = len(first_moves)
+        bits = game_state.bits if isinstance(game_state, BitBoard) else pack(game_state.board)
+        root = np.array([(bits >> (4 * i)) & 0xF for i in range(16)], dtype=np.uint8).reshape(4, 4)
+        generator = self.rng if self.rng is not None else default_stream().generator
+        boards = BatchBoard(n, rng=generator, cells=np.repeat(root[None], n, axis=0))
+        length = np.zeros(n, dtype=np.int64)
+
+        boards.cells, changed, boards.merge_score = boards.slide(first_moves)
+        boards.spawn(changed)
+        length += changed
+
+        active = np.flatnonzero(changed)
+        depth = 0
+        while len(active) and depth < max_depth:
+            cells = boards.cells[active]
+            mask = boards.legal_mask(cells)
+            running = mask.any(axis=1)
+            active, cells, mask = active[running], cells[running], mask[running]
+            if not len(active):
+                break
+            actions = sample_legal_actions(mask, generator)
+            boards.cells[active], _, score_delta = boards.slide(actions, cells)
+            spawn_mask = np.zeros(n, dtype=bool)
+            spawn_mask[active] = True
+            boards.spawn(spawn_mask)
+            boards.merge_score[active] += score_delta
+            length[active] += 1
+            depth += 1
+
+        flat = boards.cells.reshape(n, 16)
+        return RolloutResult(first_moves, (flat == 0).sum(axis=1), (flat > 2).sum(axis=1), boards.merge_score,
+                             length)
+
+    def rollouts_per_move(self, game_state, moves, rollouts: int, max_depth: int = None):
+        """Plays `rollouts` rollouts for each of the given root moves in a single batch."""
+        return self.run(game_state, np.repeat(moves, rollouts), max_depth)
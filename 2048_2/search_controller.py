@@ -0,0 +1,138 @@
+# search_controller.py
+import time
+
+
+class SearchTimeout(Exception):
+    """Raised from SearchController.check once the deadline has passed."""
+
+
+class SearchController:
+    """Anytime search driver that works against a hard wall-clock deadline.
+
+    Depth-limited searches (expectimax, minimax) run through iterative_deepening:
+    every completed iteration orders the root moves for the next one, and the
+    answer is always the best move of the deepest iteration that finished.
+    Rollout-based searches run through run_batches, which sizes its batches from
+    the measured cost per rollout so the last one still ends before the deadline.
+    Time is measured with time.perf_counter and the outcome is left in `report`.
+    """
+
+    def __init__(self, time_limit: float, check_interval: int = 64):
+        """
+        Args:
+            time_limit (float): Time budget in seconds.
+            check_interval (int): How many check() calls share one clock read.
+        """
+        self.time_limit = time_limit
+        self.check_interval = check_interval
+        self.start_time = None
+        self.deadline = None
+        self.report = {}
+        self._countdown = check_interval
+        self._guarded = False
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self.deadline = self.start_time + self.time_limit
+        self._countdown = self.check_interval
+
+    def elapsed(self):
+        return time.perf_counter() - self.start_time
+
+    def remaining(self):
+        return self.deadline - time.perf_counter()
+
+    def expired(self):
+        return time.perf_counter() >= self.deadline
+
+    def check(self):
+        """Deadline check for the inner loop of a search; raises SearchTimeout when time is up."""
+        self._countdown -= 1
+        if self._countdown <= 0:
+            self._countdown = self.check_interval
+            if not self._guarded and time.perf_counter() >= self.deadline:
+                raise SearchTimeout()
+
+    def iterative_deepening(self, search, max_depth: int, min_depth: int = 1):
+        """Runs search at increasing depths until the deadline or max_depth is reached.
+
+        Args:
+            search: Callable search(depth, move_order) returning a dict that maps every
+                root move to its value, higher being better for the side to move.
+                move_order is None on the first iteration, then the moves sorted by
+                the values of the previous iteration.
+            max_depth (int): Deepest iteration to run.
+            min_depth (int): First iteration. It always runs to completion, so there
+                is a move to return even if the budget is tiny.
+
+        Returns:
+            Tuple of the best move and the move values of the deepest completed iteration.
+        """
+        self.start()
+        best_move, values, move_order = None, {}, None
+        completed_depth = 0
+        timed_out = False
+        for depth in range(min_depth, max_depth + 1):
+            self._guarded = depth == min_depth
+            try:
+                iteration = search(depth, move_order)
+            except SearchTimeout:
+                timed_out = True
+                break
+            finally:
+                self._guarded = False
+            values = iteration
+            completed_depth = depth
+            move_order = sorted(values, key=values.get, reverse=True)
+            best_move = move_order[0] if move_order else None
+            if self.expired():
+                timed_out = depth < max_depth
+                break
+
+        self.report = {
+            'completed_depth': completed_depth,
+            'timed_out': timed_out,
+            'elapsed': self.elapsed(),
+        }
+        return best_move, values
+
+    def run_batches(self, step, batch_size: int = 16, until=None):
+        """Calls step(n) with batches of rollouts until the deadline.
+
+        Args:
+            step: Callable performing n rollouts.
+            batch_size (int): Largest batch; later batches shrink to the time left.
+            until: Optional callable checked after every batch; returning True ends
+                the search before the deadline, e.g. once a race is decided.
+
+        Returns:
+            int: The number of rollouts performed.
+        """
+        self.start()
+        done = 0
+        batches = 0
+        size = 1  # The first rollout measures the cost of one
+        stopped_early = False
+        while True:
+            remaining = self.remaining()
+            if remaining <= 0:
+                break
+            if done:
+                per_rollout = self.elapsed() / done
+                if per_rollout > remaining:
+                    break
+                size = max(1, min(batch_size, int(remaining / per_rollout)))
+            step(size)
+            done += size
+            batches += 1
+            if until is not None and until():
+                stopped_early = True
+                break
+
+        self.report = {
+            'rollouts': done,
+            'batches': batches,
+            'stopped_early': stopped_early,
+            'elapsed': self.elapsed(),
+        }
+        return done
@@ -0,0 +1,186 @@
+# self_play.py
+"""Headless self-play: plays many games of one agent over a process pool.
+
+Every finished game becomes one row of a CSV file, written and flushed as soon
+as the game ends, so an interrupted sweep loses at most the games in progress;
+run again with --resume to play only the games that are missing. Game i is
+seeded with the child i of the --seed SeedSequence, so a game gives the same
+result whichever worker plays it and whether or not the sweep was resumed
+(time-limited agents aside, whose rollout counts depend on the machine).
+
+Example:
+    python self_play.py --agent expectimax --param max_depth=3 --games 200 --output expectimax.csv
+"""
+import argparse
+import ast
+import contextlib
+import csv
+import importlib
+import os
+import time
+from copy import copy
+from multiprocessing import Pool
+
+import numpy as np
+
+import rng
+from game_logic import Board
+
+# Agent name -> (module, class); imported in the workers only when used
+AGENTS = {
+    'random': ('agents', 'RandomAgent'),
+    'mcts': ('agents', 'MCTSAgent'),
+    'mcts2': ('agents2', 'MCTSAgent'),
+    'mcts3': ('agents3', 'MCTSAgent'),
+    'mcts4': ('agents4', 'MCTSAgent'),
+    'expectimax': ('agents_expectimax', 'ExpectimaxAgent'),
+}
+
+FIELDS = ('game', 'agent', 'score', 'max_tile', 'moves', 'reached_2048', 'time_to_2048', 'elapsed',
+          'latency_p50_ms', 'latency_p90_ms', 'latency_p99_ms', 'latency_max_ms')
+
+
+def make_agent(name, params):
+    module, cls = AGENTS[name]
+    return getattr(importlib.import_module(module), cls)(**params)
+
+
+def play_game(task):
+    """Plays one game to the end and returns its results row.
+
+    Args:
+        task: Tuple of the game number, the base seed, the agent name, its keyword
+            arguments and the move limit (None for no limit).
+    """
+    game, seed, agent_name, params, max_moves = task
+    rng.seed(np.random.SeedSequence(seed, spawn_key=(game,)))
+    # The agents print progress notes that would interleave across workers
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        agent = make_agent(agent_name, params)
+        board = Board()
+        latencies = []
+        time_to_2048 = None
+        start = time.perf_counter()
+        while not board.is_game_over() and (max_moves is None or len(latencies) < max_moves):
+            move_start = time.perf_counter()
+            move = agent.select_move(copy(board))
+            latencies.append(time.perf_counter() - move_start)
+            if move is None:
+                break
+            board.move(move)
+            if time_to_2048 is None and board.has_reached_2048():
+                time_to_2048 = time.perf_counter() - start
+        if hasattr(agent, 'close'):
+            agent.close()
+
+    latencies_ms = np.array(latencies or [0.0]) * 1000
+    p50, p90, p99 = np.percentile(latencies_ms, [50, 90, 99])
+    return {
+        'game': game,
+        'agent': agent_name,
+        'score': int(board.score),
+        'max_tile': int(board.board.max()),
+        'moves': len(latencies),
+        'reached_2048': time_to_2048 is not None,
+        'time_to_2048': round(time_to_2048, 3) if time_to_2048 is not None else '',
+        'elapsed': round(time.perf_counter() - start, 3),
+        'latency_p50_ms': round(p50, 3),
+        'latency_p90_ms': round(p90, 3),
+        'latency_p99_ms': round(p99, 3),
+        'latency_max_ms': round(latencies_ms.max(), 3),
+    }
+
+
+def completed_games(path):
+    """Numbers of the games already in a results file.
+
+    A row cut short by a hard kill is removed first, so the game is played again.
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'rb+') as file:
+        content = file.read()
+        if content and not content.endswith(b'\n'):
+            file.truncate(content.rfind(b'\n') + 1)
+    with open(path, newline='') as file:
+        return {int(row['game']) for row in csv.DictReader(file)}
+
+
+def run(agent_name, params, games, output, workers=None, seed=0, max_moves=None, resume=False):
+    """Plays games 0 .. games - 1 that are not in `output` yet and appends their rows.
+
+    Returns:
+        int: The number of games played.
+    """
+    if os.path.exists(output) and not resume:
+        raise FileExistsError(f"{output} exists; pass --resume to complete it")
+    done = completed_games(output)
+    tasks = [(game, seed, agent_name, params, max_moves) for game in range(games) if game not in done]
+    new_file = not os.path.exists(output) or os.path.getsize(output) == 0
+
+    with open(output, 'a', newline='') as file, Pool(workers) as pool:
+        writer = csv.DictWriter(file, fieldnames=FIELDS)
+        if new_file:
+            writer.writeheader()
+        # Games finish in any order; each row is on disk as soon as its game ends
+        for played, row in enumerate(pool.imap_unordered(play_game, tasks), 1):
+            writer.writerow(row)
+            file.flush()
+            print(f"[{played + len(done)}/{games}] game {row['game']}: score {row['score']}, "
+                  f"max tile {row['max_tile']}, {row['moves']} moves, p50 {row['latency_p50_ms']} ms")
+    return len(tasks)
+
+
+def write_parquet(csv_path, parquet_path):
+    """Converts the results CSV to Parquet; needs pyarrow."""
+    try:
+        from pyarrow import csv as pa_csv, parquet
+    except ImportError:
+        raise SystemExit("Writing Parquet needs pyarrow (pip install pyarrow)")
+    parquet.write_table(pa_csv.read_csv(csv_path), parquet_path)
+
+
+def parse_params(items):
+    """Turns ['max_depth=3', 'use_bitboard=True'] into keyword arguments."""
+    params = {}
+    for item in items:
+        key, _, value = item.partition('=')
+        try:
+            params[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            params[key] = value
+    return params
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--agent', choices=sorted(AGENTS), default='expectimax')
+    parser.add_argument('--param', action='append', default=[], metavar='KEY=VALUE',
+                        help="Agent keyword argument, e.g. time_limit=100; repeatable")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-moves', type=int, default=None)
+    parser.add_argument('--output', default='self_play.csv')
+    parser.add_argument('--resume', action='store_true', help="Play only the games missing from --output")
+    parser.add_argument('--parquet', metavar='PATH', help="Also write the results as Parquet when done")
+    args = parser.parse_args(argv)
+
+    params = parse_params(args.param)
+    if args.agent == 'random' and params:
+        parser.error("the random agent takes no parameters")
+    if os.path.exists(args.output) and not args.resume:
+        parser.error(f"{args.output} exists; pass --resume to complete it")
+    try:
+        played = run(args.agent, params, args.games, args.output, args.workers, args.seed, args.max_moves,
+                     args.resume)
+    except KeyboardInterrupt:
+        print(f"Interrupted; finished games are in {args.output}, run again with --resume to continue")
+        return
+    print(f"Played {played} games; results in {args.output}")
+    if args.parquet:
+        write_parquet(args.output, args.parquet)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# test_agents_expectimax.py
+import numpy as np
+
+from bitboard import BitBoard, pack, legal_mask_bits
+from agents_expectimax import ExpectimaxAgent
+
+# A mid-game board with every move legal
+MID_GAME = np.array([[2, 4, 8, 16],
+                     [0, 2, 4, 8],
+                     [0, 0, 2, 4],
+                     [0, 0, 0, 2]])
+
+
+def test_fixed_depth_search_is_deterministic():
+    bits = pack(MID_GAME)
+    first, second = ExpectimaxAgent(max_depth=3), ExpectimaxAgent(max_depth=3)
+    values = first.search_root(bits, 3)
+    assert values == second.search_root(bits, 3)
+    assert sorted(values) == [action for action in range(4) if legal_mask_bits(bits)[action]]
+    assert first.select_move(BitBoard(bits)) == second.select_move(BitBoard(bits)) == max(values, key=values.get)
+    assert first.last_move_stats == {**second.last_move_stats, 'time_taken': first.last_move_stats['time_taken']}
+
+
+def test_table_is_reused_across_moves():
+    agent = ExpectimaxAgent(max_depth=3)
+    board = BitBoard(pack(MID_GAME))
+    values = agent.search_root(board.bits, 3)
+    nodes = agent.nodes
+    entries = len(agent.table)
+    assert entries > 0
+
+    # Searching the same position again is answered from the table, with the same values
+    agent.table.reset_stats()
+    agent.nodes = 0
+    assert agent.search_root(board.bits, 3) == values
+    assert agent.nodes < nodes and agent.table.stats()['hit_rate'] == 1.0
+
+    # select_move starts a new move with fresh counters but keeps the cached chance nodes,
+    # so it searches fewer nodes than an agent with an empty table
+    fresh = ExpectimaxAgent(max_depth=3)
+    fresh.select_move(board)
+    agent.select_move(board)
+    assert len(agent.table) >= entries
+    assert agent.last_move_stats['nodes'] < fresh.last_move_stats['nodes']
+    assert agent.last_move_stats['cache_hit_rate'] > fresh.last_move_stats['cache_hit_rate']
@@ -0,0 +1,61 @@
+# test_batch_board.py
+import numpy as np
+
+from game_logic import Board
+from bitboard import BitBoard, pack
+from batch_board import BatchBoard
+
+
+def random_batch(grids, seed):
+    # A batch of the given grids with one random action per board
+    boards = [Board(grid=grid) for grid in grids]
+    generator = np.random.default_rng(seed)
+    return BatchBoard.from_boards(boards, rng=generator), boards, generator.integers(0, 4, len(boards))
+
+
+def test_from_boards_keeps_the_tiles(random_grids):
+    grids = random_grids(0)
+    batch, _, _ = random_batch(grids, 0)
+    assert np.array_equal(batch.values, grids)
+
+
+def test_slide_matches_board(random_grids):
+    batch, boards, actions = random_batch(random_grids(1), 1)
+    cells, changed, score_delta = batch.slide(actions)
+    values = np.where(cells > 0, 2 ** cells.astype(np.int64), 0)
+    for i, board in enumerate(boards):
+        afterstate, board_changed, score = board.preview(actions[i])
+        assert np.array_equal(values[i], afterstate)
+        assert changed[i] == board_changed
+        assert score_delta[i] == score
+
+
+def test_legal_mask_matches_board(random_grids):
+    batch, boards, _ = random_batch(random_grids(2), 2)
+    mask = batch.legal_mask()
+    for i, board in enumerate(boards):
+        assert np.array_equal(mask[i], board.legal_mask())
+    assert np.array_equal(batch.is_game_over(), [board.is_game_over() for board in boards])
+
+
+def test_step_spawns_on_changed_boards(random_grids):
+    batch, boards, actions = random_batch(random_grids(3), 3)
+    slid, _, _ = batch.slide(actions)
+    changed, score_delta, mask = batch.step(actions)
+    added = batch.cells.astype(np.int64) - slid
+    for i, board in enumerate(boards):
+        if changed[i]:
+            # One new 2 or 4 on a cell the slide left empty
+            spawned = np.flatnonzero(added[i])
+            assert len(spawned) == 1
+            assert slid[i].flat[spawned[0]] == 0
+            assert batch.cells[i].flat[spawned[0]] in (1, 2)
+        else:
+            assert not added[i].any()
+            assert np.array_equal(batch.values[i], board.board)
+        assert np.array_equal(mask[i], BitBoard(pack(batch.values[i])).legal_mask())
+    assert np.array_equal(batch.merge_score, score_delta)
+
+    # The merge score accumulates over steps
+    _, second_delta, _ = batch.step(actions)
+    assert np.array_equal(batch.merge_score, score_delta + second_delta)
@@ -0,0 +1,87 @@
+# test_bitboard.py
+import numpy as np
+
+import rng
+from game_logic import Board
+from bitboard import (BitBoard, SYMMETRY_ACTIONS, canonical_bits, transform_bits, to_canonical_action,
+                      from_canonical_action, move_bits, pack, unpack)
+
+
+def test_pack_round_trip(random_grids):
+    for grid in random_grids(0):
+        assert np.array_equal(unpack(pack(grid)), grid)
+
+
+def test_preview_matches_board(random_grids):
+    for grid in random_grids(1):
+        board, bitboard = Board(grid=grid), BitBoard(pack(grid))
+        for action in range(4):
+            afterstate, changed, score = board.preview(action)
+            bits, bit_changed, bit_score = bitboard.preview(action)
+            assert np.array_equal(unpack(bits), afterstate)
+            assert bit_changed == changed
+            assert bit_score == score
+
+
+def test_legal_mask_and_score_match_board(random_grids):
+    for grid in random_grids(2):
+        board, bitboard = Board(grid=grid), BitBoard(pack(grid))
+        assert bitboard.legal_mask() == list(board.legal_mask())
+        assert bitboard.get_available_moves() == board.get_available_moves()
+        assert bitboard.score == board.score
+        assert bitboard.highest_value == board.highest_value
+
+
+def test_games_match_board():
+    # Both boards spawn from the same draws of the same cells, so a seeded game played
+    # with the same moves stays identical to the end
+    for seed in range(5):
+        moves = np.random.default_rng(seed)
+        rng.seed(seed)
+        board = Board()
+        boards = [board.board.copy()]
+        actions = []
+        while not board.is_game_over():
+            actions.append(moves.choice(board.get_available_moves()))
+            board.move(actions[-1])
+            boards.append(board.board.copy())
+
+        rng.seed(seed)
+        bitboard = BitBoard()
+        assert np.array_equal(bitboard.board, boards[0])
+        for action, expected in zip(actions, boards[1:]):
+            bitboard.move(action)
+            assert np.array_equal(bitboard.board, expected)
+        assert bitboard.is_game_over()
+
+def test_make_and_undo_restore_the_board(random_grids):
+    for grid in random_grids(3, count=50):
+        bitboard = BitBoard(pack(grid))
+        played = [action for action in range(4) if bitboard.make_move(action)]
+        assert len(bitboard.history) == len(played)
+        while bitboard.history:
+            bitboard.undo_move()
+        assert bitboard.bits == pack(grid)
+
+
+def test_symmetry_actions(random_grids):
+    # Moving the transformed board with the mapped action gives the transformed result
+    for grid in random_grids(4, count=50):
+        bits = pack(grid)
+        for t in range(8):
+            for action in range(4):
+                mapped = SYMMETRY_ACTIONS[t][action]
+                assert move_bits(transform_bits(bits, t), mapped) == transform_bits(move_bits(bits, action), t)
+                assert to_canonical_action(action, t) == mapped
+                assert from_canonical_action(mapped, t) == action
+
+
+def test_canonical_bits(random_grids):
+    for grid in random_grids(5, count=50):
+        bits = pack(grid)
+        canonical, t = canonical_bits(bits)
+        assert transform_bits(bits, t) == canonical
+        assert canonical == min(transform_bits(bits, u) for u in range(8))
+        # Every symmetric form of the board has the same canonical form
+        for u in range(8):
+            assert canonical_bits(transform_bits(bits, u))[0] == canonical
@@ -1,8 +1,9 @@
 from game_logic import Board
 import numpy as np
+import rng
 
-# set seed and np.random.seed
-np.random.seed(42)
+# Tile spawns are drawn from the rng module's stream
+rng.seed(42)
 
 # Instantiate the board with the given state
 initial_state = [
@@ -0,0 +1,75 @@
+# test_heuristics.py
+from itertools import groupby
+
+import numpy as np
+import pytest
+
+from game_logic import Board
+from bitboard import pack
+from batch_board import BatchBoard
+from heuristics import Heuristic, FEATURES, DEFAULT_WEIGHTS, MONOTONICITY_POWER, SUM_POWER, count_high_tiles
+
+
+def row_features(cells):
+    # The features of one line of exponents, measured directly on the line
+    tiles = [cell for cell in cells if cell]
+    increases = decreases = 0.0
+    for left, right in zip(cells, cells[1:]):
+        step = right ** MONOTONICITY_POWER - left ** MONOTONICITY_POWER
+        increases += max(step, 0)
+        decreases += max(-step, 0)
+    highest = max(cells)
+    return {
+        'empty': cells.count(0),
+        # Equal tiles next to each other once the empty cells are gone; a run of k counts k
+        'merges': sum(len(run) for run in (list(group) for _, group in groupby(tiles)) if len(run) > 1),
+        'monotonicity': min(increases, decreases),
+        'smoothness': -sum(abs(left - right) for left, right in zip(tiles, tiles[1:])),
+        'corner': highest if highest in (cells[0], cells[-1]) else 0,
+        'sum': sum(cell ** SUM_POWER for cell in cells),
+    }
+
+
+def board_features(grid):
+    exponents = np.where(grid > 0, np.log2(np.maximum(grid, 1)), 0).astype(int)
+    totals = dict.fromkeys(FEATURES, 0.0)
+    for line in list(exponents) + list(exponents.T):
+        for name, value in row_features(line.tolist()).items():
+            totals[name] += value
+    return totals
+
+
+def test_features_match_a_direct_computation(random_grids):
+    heuristic = Heuristic()
+    for grid in random_grids(seed=10, count=300):
+        expected = board_features(grid)
+        features = heuristic.features(pack(grid))
+        assert features == pytest.approx(expected)
+
+
+def test_score_is_the_weighted_sum_of_features(random_grids):
+    weights = {'smoothness': 3.0, 'corner': 5.0}
+    heuristic = Heuristic(weights, bias=100.0)
+    combined = {**DEFAULT_WEIGHTS, **weights}
+    for grid in random_grids(seed=11, count=100):
+        expected = 100.0 + sum(combined[name] * value for name, value in board_features(grid).items())
+        assert heuristic.score(pack(grid)) == pytest.approx(expected)
+        assert heuristic.score_board(grid) == heuristic.score(pack(grid))
+
+
+def test_score_batch_matches_score(random_grids):
+    heuristic = Heuristic(bias=-7.0)
+    grids = random_grids(seed=12, count=100)
+    boards = BatchBoard.from_boards([Board(grid=grid) for grid in grids])
+    expected = [heuristic.score(pack(grid)) for grid in grids]
+    assert heuristic.score_batch(boards.cells) == pytest.approx(expected)
+
+
+def test_count_high_tiles(random_grids):
+    for grid in random_grids(seed=13, count=100):
+        assert count_high_tiles(pack(grid)) == np.count_nonzero(grid > 4)
+
+
+def test_unknown_feature_is_rejected():
+    with pytest.raises(ValueError):
+        Heuristic({'edges': 1.0})
@@ -0,0 +1,114 @@
+# test_racing.py
+import numpy as np
+
+import rng
+from game_logic import Board
+from bitboard import BitBoard, pack
+from racing import Race, MIN_ENGINE_ROLLOUTS
+from rollouts import RolloutEngine
+from rollout_stats import RolloutStats
+from agents3 import MCTSAgent
+
+
+def add_rollouts(stats, move, empty_tiles):
+    stats.add_batch(np.full(len(empty_tiles), move), np.asarray(empty_tiles), np.zeros(len(empty_tiles), dtype=int))
+
+
+def test_single_move_is_decided_without_rollouts():
+    race = Race([2])
+    assert race.decided and race.stop_reason == 'separated'
+    assert race.leader(RolloutStats()) == 2
+
+
+def test_separated_moves():
+    generator = np.random.default_rng(0)
+    stats = RolloutStats()
+    race = Race([0, 1, 2], min_rollouts=32)
+    add_rollouts(stats, 0, generator.integers(8, 12, 31))
+    add_rollouts(stats, 1, generator.integers(8, 12, 31))
+    add_rollouts(stats, 2, generator.integers(0, 3, 31))
+    # No check before every move has min_rollouts
+    assert not race.update(stats)
+    assert race.contenders == [0, 1, 2]
+    for move, low, high in ((0, 8, 12), (1, 8, 12), (2, 0, 3)):
+        add_rollouts(stats, move, generator.integers(low, high, 1))
+    assert not race.update(stats)
+    assert race.contenders == [0, 1]
+    assert race.eliminated == {2: 96}
+    # The next check waits until the fewest rollouts have grown by CHECK_GROWTH
+    add_rollouts(stats, 0, np.full(32, 15))
+    assert not race.update(stats)
+    add_rollouts(stats, 1, np.full(32, 8))
+    assert race.update(stats)
+    assert race.stop_reason == 'separated' and race.contenders == [0]
+    assert race.report() == {'stop_reason': 'separated', 'contenders': [0], 'eliminated_after': {2: 96, 1: 160}}
+
+
+def test_equal_moves_only_stop_with_a_tolerance():
+    generator = np.random.default_rng(1)
+    outcomes = {move: generator.integers(5, 9, 256) for move in range(2)}
+    for epsilon, decided in ((0.0, False), (0.1, True)):
+        stats = RolloutStats()
+        race = Race([0, 1], epsilon=epsilon)
+        for move in range(2):
+            add_rollouts(stats, move, outcomes[move])
+        assert race.update(stats) == decided
+        assert race.contenders == [0, 1]
+    assert race.stop_reason == 'indifferent'
+
+
+def test_schedule_fills_the_fewest():
+    stats = RolloutStats()
+    add_rollouts(stats, 0, [5] * 4)
+    add_rollouts(stats, 3, [5] * 1)
+    race = Race([0, 1, 3])
+    planned = race.schedule(stats, 8)
+    assert sorted(planned) == [0, 1, 1, 1, 1, 3, 3, 3]
+
+
+class CountingEngine(RolloutEngine):
+    def rollouts_per_move(self, game_state, moves, count, max_depth=None):
+        self.calls.append((list(moves), count))
+        return super().rollouts_per_move(game_state, moves, count, max_depth)
+
+
+def test_run_rounds_makes_at_most_two_engine_calls():
+    rng.seed(2)
+    board = Board()
+    for _ in range(40):
+        board.move(rng.choice(board.get_available_moves()))
+    moves = board.get_available_moves()
+    for rollouts in (64, MIN_ENGINE_ROLLOUTS, 2048):
+        stats = RolloutStats()
+        race = Race(moves, checks=1)
+        engine = CountingEngine(10, rng=np.random.default_rng(rollouts))
+        engine.calls = []
+        race.run_rounds(engine, board, stats, rollouts)
+        if rollouts < MIN_ENGINE_ROLLOUTS:
+            assert engine.calls == [(moves, rollouts)]
+            continue
+        # Half for every move, then the rest for the moves still racing
+        assert engine.calls[0] == (moves, rollouts // 2)
+        assert len(engine.calls) == 1 if race.decided else engine.calls[1] == (race.contenders, rollouts // 2)
+        for move in moves:
+            expected = rollouts if move in race.contenders and not race.decided else rollouts // 2
+            assert stats.num_rollouts(move) == expected
+        report = race.report()
+        assert set(report['contenders']) | set(report['eliminated_after']) == set(moves)
+        assert all(after == rollouts // 2 * len(moves) for after in report['eliminated_after'].values())
+
+
+def test_racing_agent_picks_among_contenders():
+    rng.seed(3)
+    forced = BitBoard(pack([[0, 2, 4, 2], [0, 4, 2, 4], [0, 2, 4, 2], [0, 4, 2, 4]]))
+    agent = MCTSAgent(time_limit=100, max_depth=10, rollouts_per_move=256, racing=True)
+    assert agent.select_move(forced) == forced.get_available_moves()[0]
+    assert agent.last_move_stats['num_rollouts'] == 0
+
+    board = Board()
+    for _ in range(40):
+        board.move(rng.choice(board.get_available_moves()))
+    move = agent.select_move(board)
+    assert move in agent.last_move_stats['contenders']
+    assert move in board.get_available_moves()
+
@@ -0,0 +1,46 @@
+# test_rng.py
+import numpy as np
+
+import rng
+from rng import RandomStream
+
+
+def draws(stream, count=10000):
+    return [stream.random() for _ in range(count)]
+
+
+def test_seeded_streams_repeat_across_refills():
+    # Small buffers, so the draws span many refills
+    first = draws(RandomStream(7, buffer_size=64))
+    assert first == draws(RandomStream(7, buffer_size=64))
+    # The buffer size only changes how the draws are grouped, not their values
+    assert first == draws(RandomStream(7, buffer_size=1000))
+    assert first == draws(RandomStream(np.random.SeedSequence(7)))
+    assert first != draws(RandomStream(8, buffer_size=64))
+    assert all(0 <= value < 1 for value in first)
+
+
+def test_spawned_streams_are_reproducible_and_independent():
+    children = [draws(child, 1000) for child in RandomStream(11).spawn(3)]
+    assert children == [draws(child, 1000) for child in RandomStream(11).spawn(3)]
+    # Every child differs from its siblings and from the parent
+    parent = draws(RandomStream(11), 1000)
+    assert len({tuple(child) for child in children + [parent]}) == 4
+    # A child is the stream of its SeedSequence, so a worker can rebuild it from the seed alone
+    seeds = np.random.SeedSequence(11).spawn(3)
+    assert children == [draws(RandomStream(seed), 1000) for seed in seeds]
+
+
+def test_module_functions_draw_from_the_default_stream():
+    stream = rng.seed(3)
+    assert rng.default_stream() is stream
+    values = [rng.random(), rng.randrange(10), rng.choice('abc')]
+    rng.seed(3)
+    assert [rng.random(), rng.randrange(10), rng.choice('abc')] == values
+
+
+def test_randrange_and_choice_are_uniform():
+    stream = RandomStream(5)
+    counts = np.bincount([stream.randrange(4) for _ in range(40000)], minlength=4)
+    assert len(counts) == 4 and (abs(counts - 10000) < 400).all()
+    assert {stream.choice([1, 2, 3]) for _ in range(100)} == {1, 2, 3}
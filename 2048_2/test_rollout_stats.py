@@ -0,0 +1,70 @@
+# test_rollout_stats.py
+import numpy as np
+
+from rollout_stats import RolloutStats
+
+
+def random_rollouts(seed, count=500):
+    # Rollout outcomes of the four moves, with the counts of some moves kept small so
+    # percentiles and top fractions also fall between single rollouts
+    generator = np.random.default_rng(seed)
+    moves = generator.choice(4, size=count, p=[0.05, 0.15, 0.3, 0.5])
+    empty_tiles = generator.binomial(16, generator.random(4)[moves])
+    high_value_tiles = generator.integers(0, 17 - empty_tiles)
+    return moves, empty_tiles, high_value_tiles
+
+
+def test_add_batch_matches_add():
+    moves, empty_tiles, high_value_tiles = random_rollouts(0)
+    stats, batched = RolloutStats(), RolloutStats()
+    for move, empty, high in zip(moves, empty_tiles, high_value_tiles):
+        stats.add(move, empty, high)
+    batched.add_batch(moves, empty_tiles, high_value_tiles)
+    assert np.array_equal(stats.counts, batched.counts)
+
+
+def test_statistics_match_numpy():
+    for seed in range(10):
+        moves, empty_tiles, high_value_tiles = random_rollouts(seed)
+        stats = RolloutStats()
+        stats.add_batch(moves, empty_tiles, high_value_tiles)
+        assert stats.num_rollouts() == len(moves)
+        assert np.isclose(stats.mean(), empty_tiles.mean())
+        assert stats.max() == empty_tiles.max()
+        for move in range(4):
+            values = empty_tiles[moves == move]
+            if not len(values):
+                assert move not in stats.moves()
+                continue
+            assert stats.num_rollouts(move) == len(values)
+            assert np.isclose(stats.mean(move), values.mean())
+            assert np.isclose(stats.variance(move), values.var())
+            assert stats.max(move) == values.max()
+            for q in (0, 10, 25, 50, 75, 90, 100):
+                assert np.isclose(stats.percentile(move, q), np.percentile(values, q))
+            for fraction in (0.01, 0.25, 0.5, 0.75, 1.0):
+                top = np.sort(values)[::-1][:max(1, int(len(values) * fraction))]
+                assert np.isclose(stats.top_fraction_mean(move, fraction), top.mean())
+
+
+def test_min_high_value_tiles():
+    moves, empty_tiles, high_value_tiles = random_rollouts(11)
+    stats = RolloutStats()
+    stats.add_batch(moves, empty_tiles, high_value_tiles)
+    for move in range(4):
+        for empty in range(17):
+            selected = high_value_tiles[(moves == move) & (empty_tiles == empty)]
+            expected = int(selected.min()) if len(selected) else None
+            assert stats.min_high_value_tiles(move, empty) == expected
+
+
+def test_subset_keeps_only_the_given_moves():
+    moves, empty_tiles, high_value_tiles = random_rollouts(12)
+    stats = RolloutStats()
+    stats.add_batch(moves, empty_tiles, high_value_tiles)
+    subset = stats.subset([1, 3])
+    assert subset.moves() == [1, 3]
+    assert subset.num_rollouts() == np.isin(moves, [1, 3]).sum()
+    assert np.isclose(subset.mean(3), stats.mean(3))
+    # The original counts are left alone
+    assert stats.num_rollouts() == len(moves)
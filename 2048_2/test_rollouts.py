@@ -0,0 +1,74 @@
+# test_rollouts.py
+import numpy as np
+
+import rng
+from game_logic import Board
+from bitboard import BitBoard
+from rollouts import RolloutEngine, sample_legal_actions
+from agents import MCTSAgent
+
+MAX_DEPTH = 8
+
+
+def mid_game(seed, moves=40):
+    rng.seed(seed)
+    board = Board()
+    for _ in range(moves):
+        board.move(rng.choice(board.get_available_moves()))
+    return board
+
+
+def assert_same_mean(a, b):
+    # Four standard errors of the difference of two independent means
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    error = np.sqrt(a.var() / len(a) + b.var() / len(b))
+    assert abs(a.mean() - b.mean()) <= 4 * error + 1e-9
+
+
+def test_engine_matches_scalar_rollouts():
+    # Early in a game every extra random move still fills the board noticeably, so the
+    # means also tell rollouts one move longer or shorter apart
+    board = BitBoard.from_board(mid_game(1, moves=10))
+    agent = MCTSAgent(time_limit=1000, max_depth=MAX_DEPTH)
+    engine = RolloutEngine(MAX_DEPTH, rng=np.random.default_rng(1))
+    for move in board.get_available_moves():
+        result = engine.rollouts_per_move(board, [move], 2000)
+        scalar = [agent.random_playout(board, move) for _ in range(2000)]
+        assert_same_mean(result.empty_tiles, [empty for empty, _ in scalar])
+        assert_same_mean(result.high_value_tiles, [high for _, high in scalar])
+    # The scalar rollouts unwound every move they played
+    assert not board.history
+
+
+def test_engine_rollouts_follow_their_first_move():
+    board = mid_game(2)
+    moves = board.get_available_moves()
+    result = RolloutEngine(MAX_DEPTH, rng=np.random.default_rng(2)).rollouts_per_move(board, moves, 50)
+    assert list(result.moves) == list(np.repeat(moves, 50))
+    assert ((result.length >= 1) & (result.length <= MAX_DEPTH + 1)).all()
+    assert ((result.empty_tiles >= 0) & (result.empty_tiles <= 15)).all()
+    # The root board is left as it was
+    assert np.array_equal(board.board, mid_game(2).board)
+
+
+def test_engine_is_reproducible():
+    board = mid_game(3)
+    moves = board.get_available_moves()
+    first = RolloutEngine(MAX_DEPTH, rng=np.random.default_rng(3)).rollouts_per_move(board, moves, 100)
+    second = RolloutEngine(MAX_DEPTH, rng=np.random.default_rng(3)).rollouts_per_move(board, moves, 100)
+    for a, b in zip(first, second):
+        assert np.array_equal(a, b)
+    # Without a Generator of its own the engine draws from the default stream
+    rng.seed(4)
+    first = RolloutEngine(MAX_DEPTH).run(board, moves)
+    rng.seed(4)
+    assert np.array_equal(RolloutEngine(MAX_DEPTH).run(board, moves).empty_tiles, first.empty_tiles)
+
+
+def test_sample_legal_actions_is_uniform_over_legal_actions():
+    mask = np.array([[True, False, True, False]] * 20000 + [[False] * 4])
+    actions = sample_legal_actions(mask, np.random.default_rng(5))
+    assert set(actions[:-1]) == {0, 2}
+    assert abs(np.mean(actions[:-1] == 0) - 0.5) < 0.02
+    # A row without legal actions gets action 0
+    assert actions[-1] == 0
@@ -0,0 +1,77 @@
+# test_search_controller.py
+import pytest
+
+from search_controller import SearchController, SearchTimeout
+
+
+def test_check_reads_the_clock_every_interval():
+    controller = SearchController(time_limit=10, check_interval=4)
+    controller.start()
+    controller.deadline = 0  # Long past
+    for _ in range(3):
+        controller.check()
+    with pytest.raises(SearchTimeout):
+        controller.check()
+    # The countdown starts over after every clock read
+    for _ in range(3):
+        controller.check()
+    with pytest.raises(SearchTimeout):
+        controller.check()
+
+
+def test_check_passes_before_the_deadline():
+    controller = SearchController(time_limit=10, check_interval=1)
+    controller.start()
+    for _ in range(100):
+        controller.check()
+    assert not controller.expired() and controller.remaining() > 0
+
+
+def test_iterative_deepening_returns_the_deepest_completed_iteration():
+    controller = SearchController(time_limit=10, check_interval=1)
+    orders = []
+
+    def search(depth, move_order):
+        orders.append(move_order)
+        if depth == 4:
+            controller.deadline = 0  # The deadline passes during the fourth iteration
+            controller.check()
+        # The preferred move changes with every depth
+        return {move: (move - depth) % 3 for move in range(3)}
+
+    best_move, values = controller.iterative_deepening(search, max_depth=6)
+    assert values == {0: 0, 1: 1, 2: 2}
+    assert best_move == 2
+    assert controller.report['completed_depth'] == 3 and controller.report['timed_out']
+    # Every iteration after the first searches the moves best first by the previous one
+    assert orders == [None, [0, 2, 1], [1, 0, 2], [2, 1, 0]]
+
+
+def test_first_iteration_always_completes():
+    controller = SearchController(time_limit=0, check_interval=1)
+
+    def search(depth, move_order):
+        for _ in range(10):
+            controller.check()
+        return {'a': depth, 'b': -depth}
+
+    best_move, values = controller.iterative_deepening(search, max_depth=5, min_depth=2)
+    assert best_move == 'a' and values == {'a': 2, 'b': -2}
+    assert controller.report == {'completed_depth': 2, 'timed_out': True, 'elapsed': controller.report['elapsed']}
+
+
+def test_iterative_deepening_within_the_budget():
+    controller = SearchController(time_limit=10)
+    best_move, values = controller.iterative_deepening(lambda depth, move_order: {'x': depth}, max_depth=4)
+    assert best_move == 'x' and values == {'x': 4}
+    assert controller.report['completed_depth'] == 4 and not controller.report['timed_out']
+
+
+def test_run_batches_stops_when_until_is_true():
+    controller = SearchController(time_limit=10)
+    batches = []
+    done = controller.run_batches(batches.append, batch_size=16, until=lambda: sum(batches) >= 40)
+    # The first batch measures the cost of a single rollout
+    assert batches[0] == 1 and max(batches) <= 16
+    assert done == sum(batches) >= 40
+    assert controller.report['stopped_early'] and controller.report['rollouts'] == done
@@ -0,0 +1,49 @@
+# test_self_play.py
+import csv
+
+import pytest
+
+from self_play import FIELDS, completed_games, run
+
+# Columns that depend on the machine rather than on the game
+TIMING_FIELDS = {'elapsed', 'time_to_2048', 'latency_p50_ms', 'latency_p90_ms', 'latency_p99_ms', 'latency_max_ms'}
+
+
+def read_rows(path):
+    with open(path, newline='') as file:
+        return {int(row['game']): {k: v for k, v in row.items() if k not in TIMING_FIELDS}
+                for row in csv.DictReader(file)}
+
+
+def test_completed_games_of_a_missing_file(tmp_path):
+    assert completed_games(tmp_path / 'missing.csv') == set()
+
+
+def test_completed_games_truncates_a_partial_row(tmp_path):
+    path = tmp_path / 'games.csv'
+    header = ','.join(FIELDS)
+    path.write_text(f"{header}\n0,random,100\n1,random,200\n2,rand")
+    assert completed_games(path) == {0, 1}
+    # The cut row is gone, so the next row is appended after a complete line
+    assert path.read_text() == f"{header}\n0,random,100\n1,random,200\n"
+
+
+def test_resume_plays_only_the_missing_games(tmp_path):
+    path = tmp_path / 'games.csv'
+    assert run('random', {}, 3, str(path), workers=1, seed=5, max_moves=30) == 3
+    played = read_rows(path)
+    assert sorted(played) == [0, 1, 2]
+    assert all(int(row['moves']) <= 30 for row in played.values())
+
+    with pytest.raises(FileExistsError):
+        run('random', {}, 3, str(path), workers=1, seed=5, max_moves=30)
+
+    # A kill in the middle of writing game 2's row, then a resume with two more games
+    lines = path.read_text().splitlines(keepends=True)
+    kept = [line for line in lines if not line.startswith('2,')]
+    path.write_text(''.join(kept) + '2,random,')
+    assert run('random', {}, 5, str(path), workers=1, seed=5, max_moves=30, resume=True) == 3
+    resumed = read_rows(path)
+    assert sorted(resumed) == [0, 1, 2, 3, 4]
+    # Game i is seeded by its number, so the replayed game matches its first run
+    assert all(resumed[game] == played[game] for game in played)
@@ -0,0 +1,82 @@
+# test_time_manager.py
+import time
+
+import numpy as np
+
+from bitboard import BitBoard, pack
+from time_manager import TimeManager
+
+# A 4 in a corner and a lone 2: nothing is critical
+CALM = np.array([[4, 0, 0, 0],
+                 [0, 2, 0, 0],
+                 [0, 0, 0, 0],
+                 [0, 0, 0, 0]])
+# One empty cell, two legal moves and the largest tile off the corners
+CRITICAL = np.array([[2, 4, 2, 4],
+                     [4, 64, 4, 2],
+                     [2, 4, 2, 4],
+                     [4, 2, 4, 0]])
+# A single legal move, sliding into the empty column
+FORCED = np.array([[0, 2, 4, 2],
+                   [0, 4, 2, 4],
+                   [0, 2, 4, 2],
+                   [0, 4, 2, 4]])
+
+
+def test_move_time_scales_with_criticality():
+    manager = TimeManager(move_time=1000)
+    calm = manager.allocate(BitBoard(pack(CALM)))
+    manager.record()
+    critical = manager.allocate(BitBoard(pack(CRITICAL)))
+    manager.record()
+    assert manager.log[0]['criticality'] == 0
+    assert np.isclose(calm, manager.min_fraction)
+    features, legal_moves = manager.features(pack(CRITICAL))
+    assert legal_moves == 2
+    assert np.isclose(critical, manager.min_fraction + (1 - manager.min_fraction) * manager.criticality(features))
+    assert calm < critical <= 1.0
+
+
+def test_single_legal_move_gets_min_time():
+    manager = TimeManager(move_time=1000, game_time=60000)
+    assert manager.allocate(BitBoard(pack(FORCED))) == manager.min_time
+    assert manager.log[-1]['legal_moves'] == 1
+
+
+def test_game_time_is_charged_and_capped():
+    manager = TimeManager(game_time=1000, max_share=0.25)
+    for _ in range(5):
+        remaining = manager.remaining
+        allocation = manager.allocate(BitBoard(pack(CRITICAL)))
+        assert allocation <= remaining * manager.max_share
+        spent = manager.record()
+        assert np.isclose(manager.remaining, remaining - spent)
+        assert manager.log[-1]['spent'] == spent
+    manager.reset()
+    assert manager.remaining == manager.game_time and not manager.log
+
+
+def test_record_measures_closeness():
+    manager = TimeManager(move_time=1000)
+    manager.allocate(BitBoard(pack(CALM)))
+    manager.record({0: 5.0, 1: 5.0, 2: 1.0})
+    assert np.isclose(manager.closeness, 1.0)
+    manager.allocate(BitBoard(pack(CALM)))
+    manager.record({0: 9.0, 1: 1.0}, scale=1.0)
+    assert manager.closeness < 1e-3
+    # A close call makes the next position more critical
+    manager.allocate(BitBoard(pack(CALM)))
+    manager.record({0: 5.0, 1: 5.0})
+    assert manager.allocate(BitBoard(pack(CALM))) > manager.log[0]['allocated']
+    manager.record({0: 5.0})
+    assert manager.closeness == 0.0
+
+
+def test_overrun_is_held_back():
+    manager = TimeManager(move_time=100)
+    allocation = manager.allocate(BitBoard(pack(CALM)))
+    time.sleep(allocation + 0.02)
+    manager.record()
+    assert manager.overhead > 0
+    assert np.isclose(manager.allocate(BitBoard(pack(CALM))), max(manager.min_time, allocation - manager.overhead))
+
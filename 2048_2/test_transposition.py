@@ -0,0 +1,61 @@
+# test_transposition.py
+import numpy as np
+import pytest
+
+from bitboard import pack
+from transposition import TranspositionTable
+from agents_expectimax import ExpectimaxAgent
+from test_agents_expectimax import MID_GAME
+
+
+def colliding_keys(table, count):
+    # Keys that hash to the same bucket as key 1
+    bucket = table._bucket(1)
+    keys = [key for key in range(1, 1 << 16) if table._bucket(key) == bucket]
+    assert len(keys) >= count
+    return keys[:count]
+
+
+def test_replacement_policies():
+    # A deep entry, then a shallower one for another board in the same bucket
+    results = {}
+    for policy in TranspositionTable.POLICIES:
+        table = TranspositionTable(4, policy)
+        deep, shallow, newest = colliding_keys(table, 3)
+        table.store(deep, 'deep', depth=5)
+        table.store(shallow, 'shallow', depth=2)
+        table.store(newest, 'newest', depth=1)
+        results[policy] = (table.probe(deep, 5), table.probe(shallow), table.probe(newest))
+        assert len(table) == (2 if policy == 'two_tier' else 1)
+        assert table.stats()['stores'] == 3 and table.stats()['policy'] == policy
+
+    assert results['depth'] == ('deep', None, None)
+    assert results['always'] == (None, None, 'newest')
+    # The deep entry survives and the always-replace slot holds the newest
+    assert results['two_tier'] == ('deep', None, 'newest')
+
+
+def test_two_tier_demotes_and_deduplicates():
+    table = TranspositionTable(4, 'two_tier')
+    first, second = colliding_keys(table, 2)
+    table.store(first, 'shallow', depth=1)
+    table.store(second, 'deeper', depth=3)
+    # The first board moves to the always-replace slot rather than being lost
+    assert table.probe(first) == 'shallow' and table.probe(second, 3) == 'deeper'
+    # Storing the demoted board deeper brings it back without keeping a stale copy
+    table.store(first, 'deepest', depth=4)
+    assert table.probe(first, 4) == 'deepest' and table.probe(second, 3) == 'deeper'
+    assert len(table) == 2 and table.keys.count(first) == 1
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        TranspositionTable(4, 'lru')
+
+
+def test_policies_give_the_same_search():
+    # The policy only decides what is cached, never the values found
+    bits = pack(MID_GAME)
+    values = [ExpectimaxAgent(max_depth=3, table_size_log2=6, table_policy=policy).search_root(bits, 3)
+              for policy in TranspositionTable.POLICIES]
+    assert values[0] == values[1] == values[2]
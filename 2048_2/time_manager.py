@@ -0,0 +1,156 @@
+# time_manager.py
+import math
+import time
+
+from bitboard import BitBoard, pack, count_empty, tile_sum, legal_mask_bits
+
+# Average value a spawn adds to the board (90% 2, 10% 4), and so the tile sum gained per move
+SPAWN_VALUE = 2.2
+# Cell indexes of the corners of the packed board
+CORNERS = (0, 3, 12, 15)
+
+# Relative importance of the criticality features
+DEFAULT_WEIGHTS = {
+    'empty': 0.5,
+    'corner': 0.15,
+    'legal_moves': 0.15,
+    'closeness': 0.2,
+}
+
+
+class TimeManager:
+    """Decides how much time an agent may spend on every move of a game.
+
+    The manager works with a per-move limit, a budget for the whole game, or both:
+
+    - move_time: every move gets at most this long, scaled down on quiet positions.
+    - game_time: the time left is split over the moves the game is expected to
+      still last, estimated from the tile sum still needed to reach target_sum,
+      and each move gets its share scaled by how critical the position is.
+
+    Criticality is a weighted mean of four features in [0, 1]: few empty cells,
+    the largest tile outside a corner, few legal moves, and how close the root
+    move values of the previous search were. A position with a single legal move
+    gets min_time, since there is nothing to decide. The agent reports the time it
+    actually spent with record, which is charged to the game budget. The time an
+    agent spends around its search (setup, evaluation, process pools) is learned
+    as a moving average of the overruns and held back from later allocations, so
+    whole moves, not just searches, stay within budget. Every allocation is kept
+    in `log`: 'budget' is the time the move may take, 'allocated' what the search
+    was given after the overhead, and 'spent' what the move really took.
+    """
+
+    def __init__(self, move_time: float = None, game_time: float = None, target_sum: int = 4096,
+                 min_moves_left: int = 50, min_fraction: float = 0.05, max_share: float = 0.25,
+                 critical_empty: int = 6, min_time: float = 0.001, weights: dict = None):
+        """
+        Args:
+            move_time (float): Per-move limit in milliseconds.
+            game_time (float): Budget for the whole game in milliseconds.
+            target_sum (int): Tile sum the game is planned to reach; 4096 allows for a
+                2048 tile with room to spare.
+            min_moves_left (int): Lower bound on the estimated number of moves left.
+            min_fraction (float): Share of move_time given to the calmest positions.
+            max_share (float): Largest fraction of the remaining game budget one move may take.
+            critical_empty (int): Number of empty cells from which fewer count as critical.
+            min_time (float): Smallest allocation in seconds.
+            weights (dict): Feature name -> weight, see DEFAULT_WEIGHTS.
+        """
+        if move_time is None and game_time is None:
+            raise ValueError("TimeManager needs a move_time, a game_time or both")
+        self.move_time = move_time / 1000 if move_time is not None else None  # Convert milliseconds to seconds
+        self.game_time = game_time / 1000 if game_time is not None else None
+        self.target_sum = target_sum
+        self.min_moves_left = min_moves_left
+        self.min_fraction = min_fraction
+        self.max_share = max_share
+        self.critical_empty = critical_empty
+        self.min_time = min_time
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.reset()
+
+    def reset(self):
+        """Starts a new game."""
+        self.remaining = self.game_time
+        self.closeness = 0.0
+        self.overhead = 0.0
+        self.log = []
+        self._started = None
+
+    def features(self, bits):
+        """Criticality features of a packed board, each in [0, 1]."""
+        empty = count_empty(bits)
+        exponents = [(bits >> (4 * i)) & 0xF for i in range(16)]
+        highest = max(exponents)
+        legal_moves = sum(legal_mask_bits(bits))
+        return {
+            'empty': max(0, self.critical_empty - empty) / self.critical_empty,
+            'corner': 0.0 if any(exponents[i] == highest for i in CORNERS) else 1.0,
+            'legal_moves': (4 - max(legal_moves, 2)) / 2,
+            'closeness': self.closeness,
+        }, legal_moves
+
+    def criticality(self, features):
+        total = sum(self.weights.values())
+        return sum(self.weights[name] * value for name, value in features.items()) / total
+
+    def allocate(self, game_state):
+        """Returns the time in seconds the next move may take and starts its clock.
+
+        Args:
+            game_state: The position to move in, a Board or a BitBoard.
+        """
+        bits = game_state.bits if isinstance(game_state, BitBoard) else pack(game_state.board)
+        features, legal_moves = self.features(bits)
+        criticality = self.criticality(features)
+
+        if legal_moves <= 1:
+            budget = self.min_time
+        else:
+            budget = math.inf
+            if self.move_time is not None:
+                budget = self.move_time * (self.min_fraction + (1 - self.min_fraction) * criticality)
+            if self.remaining is not None:
+                moves_left = max(self.min_moves_left, (self.target_sum - tile_sum(bits)) / SPAWN_VALUE)
+                # Calm positions get a fifth of the average share, the most critical ones five times it
+                share = self.remaining / moves_left * 5 ** (2 * criticality - 1)
+                budget = min(budget, share, self.remaining * self.max_share)
+            budget = max(self.min_time, budget)
+        allocation = max(self.min_time, budget - self.overhead)
+
+        self.log.append({
+            'move': len(self.log),
+            'budget': budget,
+            'allocated': allocation,
+            'spent': None,
+            'criticality': round(criticality, 3),
+            'empty': count_empty(bits),
+            'legal_moves': legal_moves,
+        })
+        self._started = time.perf_counter()
+        return allocation
+
+    def record(self, values: dict = None, scale: float = 1.0):
+        """Charges the time since the last allocate and notes how close the move values were.
+
+        Args:
+            values (dict): Value of every root move from the search that just ended,
+                higher being better. The closer the two best ones, the more critical the
+                next position is taken to be.
+            scale (float): Value difference between the two best moves that counts as a
+                clear decision, in the units of `values`.
+
+        Returns:
+            float: The seconds spent on the move.
+        """
+        spent = time.perf_counter() - self._started
+        self.overhead = 0.8 * self.overhead + 0.2 * max(0.0, spent - self.log[-1]['allocated'])
+        if self.remaining is not None:
+            self.remaining = max(0.0, self.remaining - spent)
+        if values and len(values) > 1:
+            best, second = sorted(values.values(), reverse=True)[:2]
+            self.closeness = math.exp(-(best - second) / scale)
+        else:
+            self.closeness = 0.0
+        self.log[-1]['spent'] = spent
+        return spent
@@ -0,0 +1,109 @@
+# transposition.py
+
+
+class TranspositionTable:
+    """Fixed-size cache of search results keyed by a packed board.
+
+    Entries live in 2**n buckets addressed by a Fibonacci hash of the key: packed
+    boards share their low bits far too often to index the table directly. Memory is
+    bounded no matter how many positions are searched; when two boards collide the
+    replacement policy decides which entry is kept:
+
+    - 'depth': keep the entry searched to the greater depth (ties are replaced).
+    - 'always': the newest entry always wins.
+    - 'two_tier': every bucket holds a depth-preferred entry and an always-replace
+      entry, so deep results survive while recent shallow ones are still cached.
+    """
+
+    POLICIES = ('depth', 'always', 'two_tier')
+
+    def __init__(self, size_log2: int = 20, policy: str = 'depth'):
+        """
+        Args:
+            size_log2 (int): Log2 of the number of buckets.
+            policy (str): Replacement policy, one of POLICIES.
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown replacement policy {policy!r}, expected one of {self.POLICIES}")
+        self.policy = policy
+        self.buckets = 1 << size_log2
+        self.shift = 64 - size_log2
+        self.ways = 2 if policy == 'two_tier' else 1
+        self.capacity = self.buckets * self.ways
+        # Parallel lists: slot i of bucket b is at index b * ways + i
+        self.keys = [None] * self.capacity
+        self.values = [None] * self.capacity
+        self.depths = [0] * self.capacity
+        self.filled = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zeroes the probe, hit, store and overwrite counters; the entries are kept."""
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def probe(self, key, depth=0):
+        """Returns the value stored for `key` if it was searched at least `depth` deep, else None."""
+        self.probes += 1
+        slot = self._bucket(key) * self.ways
+        for index in range(slot, slot + self.ways):
+            if self.keys[index] == key and self.depths[index] >= depth:
+                self.hits += 1
+                return self.values[index]
+        return None
+
+    def store(self, key, value, depth=0):
+        """Stores a value for `key`, subject to the replacement policy."""
+        self.stores += 1
+        slot = self._bucket(key) * self.ways
+        if self.policy == 'always':
+            self._write(slot, key, value, depth)
+        elif self.policy == 'depth':
+            if self.keys[slot] is None or self.keys[slot] == key or depth >= self.depths[slot]:
+                self._write(slot, key, value, depth)
+        else:
+            if self.keys[slot] is None or self.keys[slot] == key or depth >= self.depths[slot]:
+                # Demote the previous deep entry to the always-replace slot
+                if self.keys[slot] is not None and self.keys[slot] != key:
+                    self._write(slot + 1, self.keys[slot], self.values[slot], self.depths[slot])
+                elif self.keys[slot + 1] == key:
+                    self._clear_slot(slot + 1)
+                self._write(slot, key, value, depth)
+            else:
+                self._write(slot + 1, key, value, depth)
+
+    def _bucket(self, key):
+        return ((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> self.shift
+
+    def _write(self, index, key, value, depth):
+        if self.keys[index] is None:
+            self.filled += 1
+        elif self.keys[index] != key:
+            self.overwrites += 1
+        self.keys[index] = key
+        self.values[index] = value
+        self.depths[index] = depth
+
+    def _clear_slot(self, index):
+        self.keys[index] = None
+        self.values[index] = None
+        self.depths[index] = 0
+        self.filled -= 1
+
+    def stats(self):
+        return {
+            'policy': self.policy,
+            'capacity': self.capacity,
+            'entries': self.filled,
+            'occupancy': self.filled / self.capacity,
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.probes if self.probes else 0.0,
+            'stores': self.stores,
+            'overwrites': self.overwrites,
+        }
+
+    def __len__(self):
+        return self.filled
@@ -7,7 +7,7 @@ import time
 from copy import copy
 
 from agents import RandomAgent
-from agents4 import MCTSAgent
+from agents_expectimax import ExpectimaxAgent
 
 
 def main():
@@ -15,7 +15,7 @@ def main():
     pr.enable()
     game_start_time = time.time()
     board = Board()
-    agent = MCTSAgent(time_limit=1500, max_depth=4)
+    agent = ExpectimaxAgent(max_depth=3)
     visualizer = Visualizer()
 
     running = True
@@ -1,10 +1,15 @@
 # agents.py
 import random
 
+from search_controller import SearchController
+
 # Constants to represent the score for winning and losing.
 WIN_SCORE = 10000  # A high positive score for winning.
 LOSE_SCORE = -WIN_SCORE  # A high negative score for losing.
 
+# Kinds of cached minimax values: exact, or only a lower / upper bound after an alpha-beta cutoff.
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
 
 class Agent:
     """
@@ -49,13 +54,22 @@ class MinimaxAgent(Agent):
     how good it would be for a player to reach that position.
     """
 
-    def __init__(self, depth_limit=3):
+    def __init__(self, depth_limit=3, symmetry=None, time_limit=None):
         """
         Initializes the Minimax agent with a depth limit for the search.
 
         :param depth_limit: The maximum depth the search algorithm will explore.
+        :param symmetry: Optional Symmetry. When given, moves leading to equivalent positions are
+                         searched once and search results are cached under the canonical board.
+        :param time_limit: Optional time per move in milliseconds. When given, the search deepens
+                           iteratively up to depth_limit and stops at the deadline.
         """
         self.depth_limit = depth_limit
+        self.symmetry = symmetry
+        self.time_limit = time_limit / 1000 if time_limit is not None else None  # Convert milliseconds to seconds
+        self.controller = None
+        self.iteration_depth = depth_limit
+        self.cache = {}
 
     def select_move(self, game_state):
         """
@@ -64,26 +78,53 @@ class MinimaxAgent(Agent):
         :param game_state: The current state of the game.
         :return: The best move determined by the minimax algorithm.
         """
+        if self.time_limit is None:
+            values = self._score_moves(game_state, self.depth_limit)
+            # Among equally good moves keep the first one searched.
+            return max(values, key=values.get) if values else None
+
+        # Each completed iteration orders the root moves of the next, deeper one.
+        self.controller = SearchController(self.time_limit)
+        try:
+            best_move, _ = self.controller.iterative_deepening(
+                lambda depth, move_order: self._score_moves(game_state, depth, move_order), self.depth_limit)
+        finally:
+            self.controller = None
+            self.iteration_depth = self.depth_limit
+        return best_move
+
+    def _score_moves(self, game_state, depth, move_order=None):
+        """
+        Searches every legal move to the given depth.
+
+        :param game_state: The current state of the game.
+        :param depth: The number of plies to search, the root move included.
+        :param move_order: Optional order in which to search the moves.
+        :return: A dict mapping every searched move to its score for the player to move.
+        """
+        self.iteration_depth = depth
         # Determine if the current agent is maximizing or minimizing.
         is_maximizing = game_state.current_player == game_state.PLAYER1
-        best_move = None
-        # Initialize best_score to the worst possible score.
-        best_score = -WIN_SCORE if is_maximizing else WIN_SCORE
+        sign = 1 if is_maximizing else -1
+        values = {}
+        seen_positions = set()
 
         # Iterate over all legal moves in the current game state.
-        for move in game_state.legal_actions():
+        for move in move_order or game_state.legal_actions():
             game_state.set_move(*move)  # Apply a move
-            # Start the minimax search.
-            score = self.minimax(game_state, self.depth_limit - 1, -WIN_SCORE, WIN_SCORE, not is_maximizing)
-            game_state.undo_move(*move)  # Undo the move
-
-            # Update the best score and move, considering if we want to maximize or minimize the score.
-            if best_move is None or (is_maximizing and score > best_score) or (
-                    not is_maximizing and score < best_score):
-                best_score = score
-                best_move = move
-
-        return best_move
+            try:
+                if self.symmetry is not None:
+                    # Skip moves that lead to a rotation or reflection of an already searched position.
+                    key = self.symmetry.canonical_key(game_state)
+                    if key in seen_positions:
+                        continue
+                    seen_positions.add(key)
+                # Start the minimax search.
+                values[move] = sign * self.minimax(game_state, depth - 1, -WIN_SCORE, WIN_SCORE, not is_maximizing)
+            finally:
+                game_state.undo_move(*move)  # Undo the move, also when the deadline interrupts the search
+
+        return values
 
     def minimax(self, game_state, depth, alpha, beta, is_maximizing):
         """
@@ -101,19 +142,47 @@ class MinimaxAgent(Agent):
         :param is_maximizing: A boolean flag that is True if the current player is maximizing.
         :return: The best evaluated score for the current move.
         """
+        if self.symmetry is None:
+            return self._search(game_state, depth, alpha, beta, is_maximizing)
+
+        # Look up the canonical position; bounds are only usable if they fall outside the window.
+        key = (self.symmetry.canonical_key(game_state), depth, self.iteration_depth)
+        entry = self.cache.get(key)
+        if entry is not None:
+            value, kind = entry
+            if kind == EXACT or (kind == LOWER_BOUND and value >= beta) or (kind == UPPER_BOUND and value <= alpha):
+                return value
+
+        value = self._search(game_state, depth, alpha, beta, is_maximizing)
+        if value <= alpha:
+            self.cache[key] = (value, UPPER_BOUND)
+        elif value >= beta:
+            self.cache[key] = (value, LOWER_BOUND)
+        else:
+            self.cache[key] = (value, EXACT)
+        return value
+
+    def _search(self, game_state, depth, alpha, beta, is_maximizing):
+        """
+        The uncached body of minimax; recursive calls go through minimax.
+        """
+        if self.controller is not None:
+            self.controller.check()
         # Check the current status of the game or if we've reached the depth limit.
         status = game_state.check_game_status()
         if depth == 0 or status != game_state.NOT_FINISHED:
             # Return the evaluated score of the game state.
-            return self.evaluate(game_state, status, self.depth_limit - depth)
+            return self.evaluate(game_state, status, self.iteration_depth - depth)
 
         # Logic for the maximizing player.
         if is_maximizing:
             max_eval = -WIN_SCORE
             for move in game_state.legal_actions():
                 game_state.set_move(*move)
-                eval = self.minimax(game_state, depth - 1, alpha, beta, False)
-                game_state.undo_move(*move)
+                try:
+                    eval = self.minimax(game_state, depth - 1, alpha, beta, False)
+                finally:
+                    game_state.undo_move(*move)
                 max_eval = max(max_eval, eval)
                 alpha = max(alpha, eval)
                 # Alpha-beta pruning check.
@@ -125,8 +194,10 @@ class MinimaxAgent(Agent):
             min_eval = WIN_SCORE
             for move in game_state.legal_actions():
                 game_state.set_move(*move)
-                eval = self.minimax(game_state, depth - 1, alpha, beta, True)
-                game_state.undo_move(*move)
+                try:
+                    eval = self.minimax(game_state, depth - 1, alpha, beta, True)
+                finally:
+                    game_state.undo_move(*move)
                 min_eval = min(min_eval, eval)
                 beta = min(beta, eval)
                 # Alpha-beta pruning check.
@@ -155,7 +226,7 @@ class MinimaxAgent(Agent):
         else:
             # Implement your heuristic evaluation here for non-terminal states.
             # This heuristic needs to be designed based on game-specific factors.
-            return heuristic_evaluation(game_state)
+            return self.heuristic_evaluation(game_state)
 
     def heuristic_evaluation(self, game_state):
         """
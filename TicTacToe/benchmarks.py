@@ -0,0 +1,87 @@
+# benchmarks.py
+"""
+Search benchmarks of the Tic-Tac-Toe MinimaxAgent.
+
+Counts the nodes the alpha-beta search visits and measures nodes per second, for
+several depth limits and opening positions, with and without the symmetry cache.
+Every result is one record with a metric, a unit and whether higher is better;
+run_benchmarks.py at the repository root runs the suite and compares the records
+with a stored baseline.
+
+    python run_benchmarks.py --suite TicTacToe --table
+"""
+import contextlib
+import io
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from game_logic import TicTacToe  # Plays and prints an example game on import
+from agents import MinimaxAgent
+from symmetry import Symmetry
+from run_benchmarks import MIN_TIME, rate, record
+
+# Opening positions as the moves played to reach them
+POSITIONS = {
+    'empty': [],
+    'center': [(1, 1)],
+    'corner_edge': [(0, 0), (0, 1)],
+}
+
+
+class CountingMinimaxAgent(MinimaxAgent):
+    """
+    MinimaxAgent that counts the positions it searches; cache hits are not counted.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.nodes = 0
+
+    def _search(self, game_state, depth, alpha, beta, is_maximizing):
+        self.nodes += 1
+        return super()._search(game_state, depth, alpha, beta, is_maximizing)
+
+
+def position(moves):
+    """
+    Plays the given moves on a new game.
+
+    :param moves: The (x, y) moves to play, alternating between the players.
+    :return: The resulting TicTacToe game.
+    """
+    game = TicTacToe()
+    for move in moves:
+        game.set_move(*move)
+    return game
+
+
+def bench_minimax(quick):
+    """
+    Nodes searched for one move and nodes per second, on every position and depth limit.
+
+    Every measurement lasts MIN_TIME, so that even the shallowest searches are timed
+    over many calls.
+
+    :param quick: Whether to search with the shallower depth limits only.
+    :return: A list of benchmark records.
+    """
+    depth_limits = (1, 3, 5) if quick else (1, 3, 5, 7, 9)
+    min_time = MIN_TIME[quick]
+    results = []
+    for name, moves in POSITIONS.items():
+        # select_move undoes every move it tries, so all searches start from the same game
+        game = position(moves)
+        for depth in depth_limits:
+            for symmetric in (False, True):
+                def new_agent():
+                    # A new agent for every search, so the symmetry cache starts empty
+                    return CountingMinimaxAgent(depth_limit=depth, symmetry=Symmetry() if symmetric else None)
+
+                agent = new_agent()
+                agent.select_move(game)
+                searches_per_sec = rate(lambda: new_agent().select_move(game), min_time)
+                params = {'position': name, 'depth_limit': depth, 'symmetry': symmetric}
+                results.append(record('MinimaxAgent', params, 'nodes', agent.nodes, 'nodes', higher_is_better=False))
+                results.append(record('MinimaxAgent', params, 'nodes_per_sec', agent.nodes * searches_per_sec,
+                                      'nodes/s'))
+    return results
+
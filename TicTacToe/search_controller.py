@@ -0,0 +1,75 @@
+# search_controller.py
+import time
+
+
+class SearchTimeout(Exception):
+    """
+    Raised from SearchController.check once the deadline has passed.
+    """
+
+
+class SearchController:
+    """
+    Iterative deepening of the minimax search against a hard wall-clock deadline.
+
+    Every completed iteration orders the root moves for the next one, and the answer
+    is always the best move of the deepest iteration that finished. A Tic-Tac-Toe
+    search has at most 9 plies, so check() reads the clock on every call.
+    """
+
+    def __init__(self, time_limit):
+        """
+        :param time_limit: Time budget in seconds.
+        """
+        self.time_limit = time_limit
+        self.deadline = None
+        self.report = {}
+        self._guarded = False
+
+    def check(self):
+        """
+        Deadline check for the inner loop of a search.
+
+        :raises SearchTimeout: If the deadline has passed, unless the first iteration is running.
+        """
+        if not self._guarded and time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+
+    def iterative_deepening(self, search, max_depth):
+        """
+        Runs search at increasing depths from 1 until the deadline or max_depth is reached.
+
+        :param search: Callable search(depth, move_order) returning a dict that maps every root move
+                       to its value, higher being better for the side to move. move_order is None on
+                       the first iteration, then the moves sorted by the values of the previous one.
+        :param max_depth: Deepest iteration to run.
+        :return: The best move and the move values of the deepest completed iteration. The first
+                 iteration always completes, so there is a move even if the budget is tiny.
+        """
+        start_time = time.perf_counter()
+        self.deadline = start_time + self.time_limit
+        best_move, values, move_order = None, {}, None
+        completed_depth = 0
+        timed_out = False
+        for depth in range(1, max_depth + 1):
+            self._guarded = depth == 1
+            try:
+                values = search(depth, move_order)
+            except SearchTimeout:
+                timed_out = True
+                break
+            finally:
+                self._guarded = False
+            completed_depth = depth
+            move_order = sorted(values, key=values.get, reverse=True)
+            best_move = move_order[0] if move_order else None
+            if time.perf_counter() >= self.deadline:
+                timed_out = depth < max_depth
+                break
+
+        self.report = {
+            'completed_depth': completed_depth,
+            'timed_out': timed_out,
+            'elapsed': time.perf_counter() - start_time,
+        }
+        return best_move, values
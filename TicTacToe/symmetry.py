@@ -0,0 +1,58 @@
+# symmetry.py
+from operator import itemgetter
+
+# The 8 rotations and reflections of the 3x3 board as permutations of the flat cell
+# indices: transform t maps a board to one whose cell i holds cell PERMUTATIONS[t][i].
+PERMUTATIONS = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),  # identity
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),  # quarter turn counterclockwise
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),  # half turn
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),  # quarter turn clockwise
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),  # mirrored left to right
+    (8, 5, 2, 7, 4, 1, 6, 3, 0),  # mirrored anti-diagonal
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),  # mirrored top to bottom
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),  # transposed
+)
+
+
+class Symmetry:
+    """
+    Maps Tic-Tac-Toe boards to a canonical form shared by all their rotations and reflections.
+
+    Each form is one tuple gather of the flat board, so a canonical key costs 8 gathers
+    instead of 8 rotated and flipped array copies.
+    """
+
+    def __init__(self):
+        self.gathers = [itemgetter(*permutation) for permutation in PERMUTATIONS]
+
+    def canonical(self, board):
+        """
+        Finds the canonical form of a board.
+
+        :param board: The board as a 3x3 array.
+        :return: The smallest of the 8 symmetric forms as a flat tuple, and the transform that produces it.
+        """
+        cells = board.ravel().tolist()
+        best, best_t = None, 0
+        for t, gather in enumerate(self.gathers):
+            candidate = gather(cells)
+            if best is None or candidate < best:
+                best, best_t = candidate, t
+        return best, best_t
+
+    def canonical_key(self, game_state):
+        """
+        Key function for caches: equivalent positions share the same key.
+
+        :param game_state: The current state of the game.
+        :return: The canonical form of the board as a flat tuple.
+        """
+        return self.canonical(game_state.board)[0]
+
+    def from_canonical_move(self, move, t):
+        """
+        Maps a move (x, y) chosen on the board transformed by t back to the original board.
+        """
+        x, y = move
+        return divmod(PERMUTATIONS[t][x * 3 + y], 3)
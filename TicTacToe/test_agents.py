@@ -0,0 +1,62 @@
+# test_agents.py
+import numpy as np
+
+from game_logic import TicTacToe
+from agents import MinimaxAgent, EXACT, LOWER_BOUND, UPPER_BOUND
+from symmetry import Symmetry
+
+
+def reachable_positions():
+    """Board cells -> player to move of every unfinished position legal play reaches."""
+    game = TicTacToe()
+    positions = {}
+
+    def visit():
+        cells = tuple(game.board.ravel().tolist())
+        if cells in positions or game.check_game_status() != game.NOT_FINISHED:
+            return
+        positions[cells] = game.current_player
+        for move in game.legal_actions():
+            game.set_move(*move)
+            visit()
+            game.undo_move(*move)
+
+    visit()
+    return positions
+
+
+def position(cells, player):
+    game = TicTacToe()
+    game.board = np.array(cells).reshape(3, 3)
+    game.current_player = player
+    return game
+
+
+def test_symmetric_minimax_matches_plain_minimax():
+    positions = reachable_positions()
+    assert len(positions) == 4520
+    symmetry = Symmetry()
+    plain = MinimaxAgent(depth_limit=9)
+    # A single agent for all positions, so entries cached by earlier searches, bounds
+    # included, are looked up again from other roots and under other windows
+    symmetric = MinimaxAgent(depth_limit=9, symmetry=symmetry)
+    for cells, player in positions.items():
+        game = position(cells, player)
+        expected = plain._score_moves(game, 9)
+        values = symmetric._score_moves(game, 9)
+        assert values == {move: value for move, value in expected.items() if move in values}
+        # A move left out leads to a transform of a searched move's position, with its value
+        for move in expected.keys() - values.keys():
+            game.set_move(*move)
+            key = symmetry.canonical_key(game)
+            game.undo_move(*move)
+            twins = []
+            for searched in values:
+                game.set_move(*searched)
+                if symmetry.canonical_key(game) == key:
+                    twins.append(searched)
+                game.undo_move(*searched)
+            assert len(twins) == 1 and values[twins[0]] == expected[move]
+        assert symmetric.select_move(game) == max(expected, key=expected.get)
+        assert tuple(game.board.ravel().tolist()) == cells
+    assert {kind for _, kind in symmetric.cache.values()} == {EXACT, LOWER_BOUND, UPPER_BOUND}
@@ -0,0 +1,49 @@
+# test_symmetry.py
+import numpy as np
+
+from symmetry import PERMUTATIONS, Symmetry
+
+SYMMETRY = Symmetry()
+
+
+def random_board(generator):
+    # Any of 0, 1 and 2 in every cell; the symmetries do not care whether play reaches it
+    return generator.integers(0, 3, size=(3, 3))
+
+
+def transforms(board):
+    return [np.fliplr(np.rot90(board, turns)) if flip else np.rot90(board, turns)
+            for flip in (False, True) for turns in range(4)]
+
+
+def test_permutations_are_the_eight_symmetries():
+    board = np.arange(9).reshape(3, 3)
+    assert sorted(PERMUTATIONS) == sorted(tuple(transformed.ravel().tolist()) for transformed in transforms(board))
+
+
+def test_canonical_form_is_shared_by_all_transforms():
+    generator = np.random.default_rng(0)
+    for _ in range(200):
+        board = random_board(generator)
+        canonical, t = SYMMETRY.canonical(board)
+        assert SYMMETRY.gathers[t](board.ravel().tolist()) == canonical
+        for transformed in transforms(board):
+            assert SYMMETRY.canonical(transformed)[0] == canonical
+        assert canonical == min(tuple(transformed.ravel().tolist()) for transformed in transforms(board))
+
+
+def test_canonical_moves_map_back():
+    generator = np.random.default_rng(1)
+    for _ in range(50):
+        board = random_board(generator)
+        canonical, t = SYMMETRY.canonical(board)
+        mapped = [SYMMETRY.from_canonical_move(divmod(cell, 3), t) for cell in range(9)]
+        assert sorted(mapped) == [divmod(cell, 3) for cell in range(9)]
+        for cell, (x, y) in enumerate(mapped):
+            # A mark at a cell of the canonical board and at the mapped cell of the
+            # original give boards that transform t still maps onto each other
+            marked_canonical = np.array(canonical).reshape(3, 3)
+            marked_canonical.flat[cell] = 7
+            marked = board.copy()
+            marked[x, y] = 7
+            assert SYMMETRY.gathers[t](marked.ravel().tolist()) == tuple(marked_canonical.ravel().tolist())
@@ -0,0 +1,67 @@
+# benchmarks.py
+# Timing benchmarks of tree generation, the DFS solver and the tree layout.
+#
+# For random trees of several depths, measures the time to build the Graph, to run
+# DFSSolver.solve and best_path, and to compute the hierarchical layout of
+# TreeVisualizer (without opening a window). Every result is one record with a
+# metric, a unit and whether higher is better; run_benchmarks.py at the repository
+# root runs the suite and compares the records with a stored baseline:
+#
+#   python run_benchmarks.py --suite TreeVisualization --table
+import random
+import time
+
+from graph import Graph
+from visualizer import TreeVisualizer
+from solvers.dfs_solver import DFSSolver
+from run_benchmarks import REPEAT, record
+
+SEED = 0
+
+
+# Runs fn and returns its result and the seconds it took.
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+# A visualizer with the default canvas size but no Tk window, enough for the layout.
+def headless_visualizer(root, solver):
+    visualizer = TreeVisualizer.__new__(TreeVisualizer)
+    visualizer.root = root
+    visualizer.solver = solver
+    visualizer.canvas_width = 1400
+    visualizer.canvas_height = 1000
+    return visualizer
+
+
+def bench_tree(quick):
+    depths = (4, 6, 8) if quick else (4, 6, 8, 10)
+    results = []
+    for depth in depths:
+        build_time = solve_time = path_time = layout_time = float('inf')
+        for _ in range(REPEAT):
+            # The same tree every time, and a new solver since solve marks the nodes it visits
+            random.seed(SEED)
+            graph, elapsed = timed(lambda: Graph(depth=depth))
+            build_time = min(build_time, elapsed)
+            solver = DFSSolver(graph.root)
+            _, elapsed = timed(solver.solve)
+            solve_time = min(solve_time, elapsed)
+            _, elapsed = timed(solver.best_path)
+            path_time = min(path_time, elapsed)
+            positions, elapsed = timed(headless_visualizer(graph.root, solver).hierarchical_layout)
+            layout_time = min(layout_time, elapsed)
+
+        nodes = len(positions)
+        params = {'depth': depth, 'nodes': nodes}
+        results.append(record('Graph', params, 'build_ms', build_time * 1000, 'ms', higher_is_better=False))
+        results.append(record('DFSSolver.solve', params, 'solve_ms', solve_time * 1000, 'ms', higher_is_better=False))
+        results.append(record('DFSSolver.solve', params, 'nodes_per_sec', nodes / solve_time, 'nodes/s'))
+        results.append(record('DFSSolver.best_path', params, 'time_ms', path_time * 1000, 'ms',
+                              higher_is_better=False))
+        results.append(record('TreeVisualizer.hierarchical_layout', params, 'layout_ms', layout_time * 1000, 'ms',
+                              higher_is_better=False))
+    return results
+
@@ -0,0 +1,247 @@
+# run_benchmarks.py
+"""Runs the benchmark suites of all projects and compares them with a baseline.
+
+Every project directory has a benchmarks.py of bench_*(quick) functions, each
+returning a list of record()s {name, params, metric, value, unit,
+higher_is_better}; they time their code with rate() and REPEAT from this module.
+This script imports each suite in its own process, with the project directory
+first on sys.path (the projects import their modules as siblings), calls all its
+bench_* functions and writes the records, tagged with their suite, with the
+machine they ran on to one JSON file. With --compare, every record is matched to
+the record of the same suite, name, params and metric in a baseline file, and
+changes for the worse beyond --tolerance are reported as regressions; the exit
+status is then 1.
+
+Shared and throttled machines change speed by tens of percent between runs, so
+before every suite a fixed pure-Python loop is timed as a calibration. With
+--normalize, timings are scaled by the ratio of the baseline and current
+calibrations of their suite before they are compared.
+
+Example:
+    python run_benchmarks.py --suite 2048 --quick --table
+    python run_benchmarks.py --output baseline.json
+    python run_benchmarks.py --output current.json --compare baseline.json --tolerance 0.2
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+SUITES = ('2048', '2048_2', 'TicTacToe', 'TreeVisualization')
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CALIBRATION_LOOPS = 200_000
+# Every measurement is repeated and the best kept, since slower runs are disturbed by other work
+REPEAT = 3
+# Seconds that every rate() measurement lasts, by the --quick setting
+MIN_TIME = {False: 0.25, True: 0.05}
+
+
+def record(name, params, metric, value, unit, higher_is_better=True):
+    """One benchmark result; collect() adds the suite it belongs to."""
+    return {'name': name, 'params': params, 'metric': metric, 'value': value, 'unit': unit,
+            'higher_is_better': higher_is_better}
+
+
+def rate(step, min_time):
+    """Calls step() for at least min_time seconds, REPEAT times, and returns the best calls per second."""
+    best = 0.0
+    for _ in range(REPEAT):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            step()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, calls / elapsed)
+    return best
+
+
+def calibrate(repeat=5):
+    """Best speed of a fixed pure-Python loop in million iterations per second."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        total = 0
+        for i in range(CALIBRATION_LOOPS):
+            total += i
+        best = min(best, time.perf_counter() - start)
+    return CALIBRATION_LOOPS / best / 1e6
+
+
+def collect(suite, quick=False):
+    """Imports the benchmarks.py of a suite and returns the records of all its bench_* functions.
+
+    Only called in the process run_suite starts for the suite, since the projects
+    have modules of the same names.
+    """
+    sys.path.insert(0, os.path.join(ROOT, suite))
+    benchmarks = importlib.import_module('benchmarks')
+    records = []
+    for name, bench in vars(benchmarks).items():
+        if name.startswith('bench_') and callable(bench):
+            records += [{'suite': suite, **r} for r in bench(quick)]
+    return records
+
+
+def run_suite(suite, quick=False):
+    """Collects one project's benchmarks in a new process and returns its records, or None and the error."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'records.json')
+        command = [sys.executable, os.path.abspath(__file__), '--collect', suite, '--output', path]
+        command += ['--quick'] if quick else []
+        process = subprocess.run(command, cwd=os.path.join(ROOT, suite), capture_output=True, text=True)
+        if process.returncode != 0:
+            # The last line of a traceback names the error, e.g. a missing dependency
+            lines = process.stderr.strip().splitlines()
+            return None, lines[-1] if lines else f"exit status {process.returncode}"
+        with open(path) as file:
+            return json.load(file), None
+
+
+def key(record):
+    return record['suite'], record['name'], json.dumps(record['params'], sort_keys=True), record['metric']
+
+
+def is_timing(record):
+    return record['unit'] == 'ms' or record['unit'].endswith('/s')
+
+
+def compare(records, baseline, tolerance, speed_ratios=None):
+    """Matches records to the baseline and classifies every change.
+
+    Args:
+        speed_ratios (dict): Optional suite -> current / baseline calibration; the
+            timings of a suite are divided by it, so they compare as if run at the
+            baseline machine speed.
+
+    Returns:
+        list: (status, record, baseline value, compared value, relative change) with
+        status one of 'regression', 'improvement', 'unchanged', 'new' or 'missing'.
+        The compared value is the normalized one, and the relative change is positive
+        when the result got better, whichever way the metric goes.
+    """
+    base = {key(r): r for r in baseline}
+    current = {key(r): r for r in records}
+    rows = []
+    for k, r in current.items():
+        old = base.get(k)
+        if old is None:
+            rows.append(('new', r, None, r['value'], None))
+            continue
+        value = r['value']
+        if speed_ratios and is_timing(r):
+            ratio = speed_ratios.get(r['suite'], 1.0)
+            value = value / ratio if r['higher_is_better'] else value * ratio
+        if old['value'] == 0:
+            change = 0.0 if value == 0 else float('inf')
+        else:
+            change = (value - old['value']) / abs(old['value'])
+        if not r['higher_is_better']:
+            change = -change
+        status = 'regression' if change < -tolerance else 'improvement' if change > tolerance else 'unchanged'
+        rows.append((status, r, old['value'], value, change))
+    # A benchmark that no longer runs counts against the comparison like a regression
+    rows += [('missing', r, r['value'], None, None) for k, r in base.items() if k not in current]
+    return rows
+
+
+def print_table(records):
+    rows = [(r['suite'], r['name'], ', '.join(f'{k}={v}' for k, v in r['params'].items()), r['metric'])
+            for r in records]
+    widths = [max((len(row[i]) for row in rows), default=0) for i in range(4)]
+    for row, r in zip(rows, records):
+        print(' '.join(text.ljust(width) for text, width in zip(row, widths)), f"{r['value']:>14,.1f} {r['unit']}")
+
+
+def print_comparison(rows, verbose=False):
+    for status, r, old, value, change in rows:
+        if status == 'unchanged' and not verbose:
+            continue
+        params = ', '.join(f'{k}={v}' for k, v in r['params'].items())
+        change_text = f"{change:+.1%}" if change is not None else ''
+        old_text = f"{old:,.1f}" if old is not None else '-'
+        value_text = f"{value:,.1f}" if value is not None else '-'
+        print(f"{status:<12} {r['suite']:<18} {r['name']:<34} {params:<44} {r['metric']:<17} "
+              f"{old_text:>14} -> {value_text:>14} {r['unit']:<10} {change_text}")
+    counts = {status: sum(row[0] == status for row in rows)
+              for status in ('regression', 'improvement', 'unchanged', 'new', 'missing')}
+    print(', '.join(f"{count} {status}" for status, count in counts.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--suite', action='append', choices=SUITES, help="Suite to run; repeatable (default: all)")
+    parser.add_argument('--output', default='benchmarks.json', help="Where to write the results")
+    parser.add_argument('--compare', metavar='BASELINE', help="Results file to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Relative change for the worse that counts as a regression (default: 0.2)")
+    parser.add_argument('--quick', action='store_true', help="Shorter measurements and smaller sizes")
+    parser.add_argument('--normalize', action='store_true',
+                        help="Correct timings for the machine speed measured by the calibration loop")
+    parser.add_argument('--verbose', action='store_true', help="Also list unchanged results")
+    parser.add_argument('--table', action='store_true', help="Print every result")
+    # Used by run_suite: collect one suite in this process and write its bare records
+    parser.add_argument('--collect', choices=SUITES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.collect:
+        records = collect(args.collect, args.quick)
+        with open(args.output, 'w') as file:
+            json.dump(records, file, indent=1)
+        return
+
+    suites = args.suite or SUITES
+    records, skipped, calibration = [], {}, {}
+    for suite in suites:
+        calibration[suite] = calibrate()
+        start = time.perf_counter()
+        suite_records, error = run_suite(suite, args.quick)
+        if error is not None:
+            skipped[suite] = error
+            print(f"{suite}: skipped ({error})")
+            continue
+        records += suite_records
+        print(f"{suite}: {len(suite_records)} results in {time.perf_counter() - start:.1f} s")
+
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'quick': args.quick,
+        'skipped': skipped,
+        'calibration': calibration,
+        'records': records,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=1)
+    if args.table:
+        print_table(records)
+    print(f"Results in {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline.get('quick') != args.quick:
+            print("Warning: the baseline and these results were run with different --quick settings")
+        # Only the suites run now are compared; a suite skipped for a missing dependency shows as missing
+        compared = [r for r in baseline['records'] if r['suite'] in suites]
+        speed_ratios = {suite: calibration[suite] / baseline['calibration'][suite]
+                        for suite in suites if suite in baseline.get('calibration', {})}
+        for suite, ratio in speed_ratios.items():
+            print(f"{suite}: machine speed {ratio:.2f}x the baseline's")
+        rows = compare(records, compared, args.tolerance, speed_ratios if args.normalize else None)
+        print_comparison(rows, args.verbose)
+        if any(status in ('regression', 'missing') for status, *_ in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()